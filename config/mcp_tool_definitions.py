@@ -32,6 +32,7 @@ class MCPToolDefinitions:
             # MCPToolDefinitions._get_write_multiple_files_tool(),
             # MCPToolDefinitions._get_execute_python_tool(),
             # MCPToolDefinitions._get_execute_bash_tool(),
+            # MCPToolDefinitions._get_execute_multiple_commands_tool(),
         ]
 
     @staticmethod
@@ -80,6 +81,12 @@ class MCPToolDefinitions:
                         "minimum": 1,
                         "maximum": 10,
                     },
+                    "max_total_bytes": {
+                        "type": "integer",
+                        "description": "Byte budget for all returned content; larger files are cut at a line boundary and report next_start_line (0 for no limit)",
+                        "default": 524288,
+                        "minimum": 0,
+                    },
                 },
                 "required": ["file_requests"],
             },
@@ -186,6 +193,11 @@ class MCPToolDefinitions:
                         "description": "Timeout in seconds",
                         "default": 30,
                     },
+                    "fresh_interpreter": {
+                        "type": "boolean",
+                        "description": "Run in a new interpreter even if the warm worker pool is enabled",
+                        "default": False,
+                    },
                 },
                 "required": ["code"],
             },
@@ -214,6 +226,35 @@ class MCPToolDefinitions:
             },
         }
 
+    @staticmethod
+    def _get_execute_multiple_commands_tool() -> Dict[str, Any]:
+        """并发执行多个Bash命令工具定义"""
+        return {
+            "name": "execute_multiple_commands",
+            "description": "Execute independent bash commands concurrently (for batch checks)",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "commands": {
+                        "type": "string",
+                        "description": 'JSON array of bash commands, e.g., \'["python a.py", "pytest -q tests"]\'',
+                    },
+                    "timeout": {
+                        "type": "integer",
+                        "description": "Timeout in seconds for each command",
+                        "default": 30,
+                    },
+                    "max_commands": {
+                        "type": "integer",
+                        "description": "Maximum number of commands in one operation",
+                        "default": 8,
+                        "minimum": 1,
+                    },
+                },
+                "required": ["commands"],
+            },
+        }
+
     @staticmethod
     def _get_file_structure_tool() -> Dict[str, Any]:
         """文件结构获取工具定义"""
@@ -264,6 +305,12 @@ class MCPToolDefinitions:
                         "description": "Maximum number of results to return",
                         "default": 10,
                     },
+                    "ranking_mode": {
+                        "type": "string",
+                        "enum": ["bm25", "semantic", "hybrid"],
+                        "description": "bm25: keyword ranking; semantic: match by meaning of summaries and concepts; hybrid: both",
+                        "default": "bm25",
+                    },
                 },
                 "required": ["indexes_path", "target_file"],
             },
@@ -33,6 +33,7 @@ class MCPToolDefinitions:
             # MCPToolDefinitions._get_execute_python_tool(),
             # MCPToolDefinitions._get_execute_bash_tool(),
             MCPToolDefinitions._get_search_code_references_tool(),
+            MCPToolDefinitions._get_search_code_references_batch_tool(),
             # MCPToolDefinitions._get_search_code_tool(),
             # MCPToolDefinitions._get_file_structure_tool(),
             # MCPToolDefinitions._get_set_workspace_tool(),
@@ -103,6 +104,12 @@ class MCPToolDefinitions:
                         "minimum": 1,
                         "maximum": 10,
                     },
+                    "max_total_bytes": {
+                        "type": "integer",
+                        "description": "Byte budget for all returned content; larger files are cut at a line boundary and report next_start_line (0 for no limit)",
+                        "default": 524288,
+                        "minimum": 0,
+                    },
                 },
                 "required": ["file_requests"],
             },
@@ -287,11 +294,50 @@ class MCPToolDefinitions:
                         "description": "Maximum number of results to return",
                         "default": 10,
                     },
+                    "ranking_mode": {
+                        "type": "string",
+                        "enum": ["bm25", "semantic", "hybrid"],
+                        "description": "bm25: keyword ranking; semantic: match by meaning of summaries and concepts; hybrid: both",
+                        "default": "bm25",
+                    },
                 },
                 "required": ["indexes_path", "target_file"],
             },
         }
 
+    @staticmethod
+    def _get_search_code_references_batch_tool() -> Dict[str, Any]:
+        """批量代码参考搜索工具定义 - 一次调用搜索多个目标文件"""
+        return {
+            "name": "search_code_references_batch",
+            "description": "Search reference code for several target files in one call. Shared references are returned once; per-file results refer to them by reference_id.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "indexes_path": {
+                        "type": "string",
+                        "description": "Path to the indexes directory containing JSON index files",
+                    },
+                    "queries": {
+                        "type": "string",
+                        "description": 'JSON list of queries, e.g. \'[{"target_file": "src/model.py", "keywords": "attention,encoder"}, "src/train.py"]\'',
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Maximum number of references per target file",
+                        "default": 5,
+                    },
+                    "ranking_mode": {
+                        "type": "string",
+                        "enum": ["bm25", "semantic", "hybrid"],
+                        "description": "bm25: keyword ranking; semantic: match by meaning of summaries and concepts; hybrid: both",
+                        "default": "bm25",
+                    },
+                },
+                "required": ["indexes_path", "queries"],
+            },
+        }
+
     @staticmethod
     def _get_search_code_tool() -> Dict[str, Any]:
         """代码搜索工具定义 - 在当前代码库中搜索模式"""
@@ -335,9 +381,35 @@ class MCPToolDefinitions:
                 "properties": {
                     "last_n": {
                         "type": "integer",
-                        "description": "Return the last N operations",
+                        "description": "Return the last N operations (0 returns every matching operation)",
                         "default": 10,
                     },
+                    "action": {
+                        "type": "string",
+                        "description": "Only return operations whose action matches this name or glob pattern",
+                        "default": "",
+                    },
+                    "since": {
+                        "type": "string",
+                        "description": "Only return operations at or after this ISO timestamp",
+                        "default": "",
+                    },
+                    "until": {
+                        "type": "string",
+                        "description": "Only return operations at or before this ISO timestamp",
+                        "default": "",
+                    },
+                    "source": {
+                        "type": "string",
+                        "enum": ["memory", "log"],
+                        "description": "memory: recent in-memory buffer; log: full persisted JSONL log",
+                        "default": "memory",
+                    },
+                    "include_metrics": {
+                        "type": "boolean",
+                        "description": "Include per-tool latency and payload size statistics",
+                        "default": False,
+                    },
                 },
             },
         }
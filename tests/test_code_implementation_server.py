@@ -0,0 +1,348 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+
+import pytest
+
+from tools import code_implementation_server as server
+
+
+def test_allocate_byte_budget_keeps_small_files_whole():
+    allocation = server.allocate_byte_budget(
+        {"small.py": 100, "medium.py": 400, "large.py": 5000}, 1000
+    )
+
+    assert allocation["small.py"] == 100
+    assert allocation["medium.py"] == 400
+    assert allocation["large.py"] == 500
+    assert sum(allocation.values()) <= 1000
+
+
+def test_truncate_lines_to_budget_keeps_whole_lines():
+    lines = ["a" * 10 + "\n", "b" * 10 + "\n", "c" * 10 + "\n"]
+
+    assert server.truncate_lines_to_budget(lines, 25) == lines[:2]
+
+
+def test_truncate_lines_to_budget_always_keeps_first_line():
+    lines = ["x" * 500 + "\n", "short\n"]
+
+    assert server.truncate_lines_to_budget(lines, 100) == lines[:1]
+
+
+def test_read_multiple_files_paging_moves_forward_past_long_line(tmp_path):
+    workspace = tmp_path / "generate_code"
+    server.initialize_workspace(str(workspace))
+    (workspace / "data.json").write_text(
+        "[" + "1," * 2000 + "1]\n" + "".join(f"line {i}\n" for i in range(50))
+    )
+
+    start_line = 1
+    pages = []
+    while True:
+        response = json.loads(
+            asyncio.run(
+                server.read_multiple_files(
+                    json.dumps({"data.json": {"start_line": start_line}}),
+                    max_total_bytes=200,
+                )
+            )
+        )
+        file_result = response["files"]["data.json"]
+        pages.append(file_result["content"])
+        if not file_result.get("truncated"):
+            break
+        assert file_result["next_start_line"] > start_line
+        start_line = file_result["next_start_line"]
+
+    assert "".join(pages) == (workspace / "data.json").read_text()
+
+
+def run_with_worker_pool(workspace, code, timeout=10):
+    async def run():
+        pool = server.PythonWorkerPool(workspace, 1, [], 50)
+        await pool.start()
+        try:
+            return await pool.execute(code, timeout)
+        finally:
+            pool.shutdown()
+
+    return asyncio.run(run())
+
+
+def test_worker_pool_reports_worker_exit_without_rerunning(tmp_path):
+    marker = tmp_path / "runs.txt"
+    code = (
+        "import os, sys\n"
+        f"open({str(marker)!r}, 'a').write('run\\n')\n"
+        "print('before exit', flush=True)\n"
+        "os._exit(3)\n"
+    )
+
+    result = run_with_worker_pool(tmp_path, code)
+
+    assert result["return_code"] == 3
+    assert result["stdout"] == "before exit\n"
+    assert marker.read_text() == "run\n"
+
+
+def test_worker_pool_timeout_keeps_partial_output(tmp_path):
+    code = "import time\nprint('started', flush=True)\ntime.sleep(30)\n"
+
+    result = run_with_worker_pool(tmp_path, code, timeout=1)
+
+    assert result["timed_out"]
+    assert result["stdout"] == "started\n"
+
+
+def search_files(search_path, pattern, file_pattern):
+    return [
+        event[1]
+        for event in server.get_search_index(search_path).search(
+            pattern, file_pattern, False
+        )
+        if event[0] == "match"
+    ]
+
+
+def test_search_index_evicts_least_recently_used_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "SEARCH_INDEXES", server.OrderedDict())
+    monkeypatch.setattr(server, "SEARCH_INDEX_MAX_BYTES", 5000)
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.py").write_text(f"needle {name}\n" + "x" * 1500)
+
+    assert sorted(search_files(tmp_path, "needle", "*.py")) == ["a.py", "b.py", "c.py"]
+    search_index = server.SEARCH_INDEXES[str(tmp_path)]
+    assert search_index.total_bytes <= 5000
+    assert len(search_index.entries) < 3
+
+    # Results stay the same when evicted files are read back from disk
+    assert sorted(search_files(tmp_path, "needle", "*.py")) == ["a.py", "b.py", "c.py"]
+
+
+def test_search_indexes_share_one_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "SEARCH_INDEXES", server.OrderedDict())
+    monkeypatch.setattr(server, "SEARCH_INDEXES_MAX_BYTES", 5000)
+    first, second = tmp_path / "first", tmp_path / "second"
+    for directory in (first, second):
+        directory.mkdir()
+        for name in ("a", "b"):
+            (directory / f"{name}.py").write_text("needle\n" + "x" * 1000)
+
+    search_files(first, "needle", "*.py")
+    search_files(second, "needle", "*.py")
+
+    indexes = server.SEARCH_INDEXES
+    assert sum(index.total_bytes for index in indexes.values()) <= 5000
+    # The most recently searched directory keeps its entries
+    assert len(indexes[str(second)].entries) == 2
+
+
+def test_search_index_prunes_deleted_files_matching_directory_pattern(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(server, "SEARCH_INDEXES", server.OrderedDict())
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "gone.py").write_text("needle\n")
+    (tmp_path / "src" / "kept.py").write_text("needle\n")
+
+    assert len(search_files(tmp_path, "needle", "src/*.py")) == 2
+    (tmp_path / "src" / "gone.py").unlink()
+    assert search_files(tmp_path, "needle", "src/*.py") == ["src/kept.py"]
+
+    assert list(server.SEARCH_INDEXES[str(tmp_path)].entries) == ["src/kept.py"]
+
+
+def test_operation_history_accepts_timezone_aware_filters(monkeypatch):
+    monkeypatch.setattr(server, "OPERATION_HISTORY", server.deque(maxlen=100))
+    server.OPERATION_HISTORY.append(
+        {"action": "write_file", "timestamp": "2026-01-02T12:00:00"}
+    )
+
+    for since in ("2026-01-01T00:00:00Z", "2026-01-01T00:00:00+00:00"):
+        response = json.loads(
+            asyncio.run(
+                server.get_operation_history(since=since, until="2026-01-03T00:00:00Z")
+            )
+        )
+        assert response["status"] == "success"
+        assert [entry["action"] for entry in response["history"]] == ["write_file"]
+
+
+def process_running(pid):
+    """Whether a process exists and is not a zombie waiting to be reaped"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="checks processes in /proc")
+def test_run_subprocess_timeout_kills_backgrounded_children(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    started = time.monotonic()
+    result = asyncio.run(
+        server.run_subprocess(
+            f"sleep 30 & echo $! > {pid_file}; echo started; wait",
+            shell=True,
+            timeout=0.5,
+        )
+    )
+
+    assert result["timed_out"]
+    assert result["stdout"] == "started\n"
+    # The child holds the output pipes open; it must not hang the call
+    assert time.monotonic() - started < 0.5 + server.EXECUTION_KILL_GRACE_SECONDS
+    time.sleep(0.1)
+    assert not process_running(int(pid_file.read_text()))
+
+
+def test_run_subprocess_caps_output_and_reports_full_size():
+    size = 2 * server.EXECUTION_OUTPUT_LIMIT_BYTES
+    result = asyncio.run(
+        server.run_subprocess(
+            sys.executable,
+            ["-c", f"import sys; sys.stdout.write('x' * {size})"],
+        )
+    )
+
+    assert result["return_code"] == 0
+    assert len(result["stdout"]) == server.EXECUTION_OUTPUT_LIMIT_BYTES
+    assert result["stdout_bytes"] == size
+    assert result["output_truncated"]
+
+
+def test_execute_multiple_commands_keeps_order_and_reports_partial_success(tmp_path):
+    server.initialize_workspace(str(tmp_path / "generate_code"))
+    response = json.loads(
+        asyncio.run(
+            server.execute_multiple_commands(
+                json.dumps(["sleep 0.3; echo first", "exit 3", "echo third"])
+            )
+        )
+    )
+
+    assert response["status"] == "partial_success"
+    assert [result["command"] for result in response["results"]] == [
+        "sleep 0.3; echo first",
+        "exit 3",
+        "echo third",
+    ]
+    assert [result["return_code"] for result in response["results"]] == [0, 3, 0]
+    assert response["results"][0]["stdout"] == "first\n"
+    # Commands run concurrently, so the total is not the sum of their durations
+    assert response["total_duration_seconds"] < 1
+
+
+def baseline_file_section(summary_content, target_file_path):
+    """Full-text extraction that CodeSummaryStore replaced, kept as a reference"""
+    section_pattern = r"={80}\s*\n## IMPLEMENTATION File ([^;]+); ROUND \d+\s*\n={80}(.*?)(?=\n={80}|\Z)"
+    for file_path_in_summary, section_content in re.findall(
+        section_pattern, summary_content, re.DOTALL
+    ):
+        file_path_in_summary = file_path_in_summary.strip()
+        if server._paths_match(
+            server._normalize_file_path(target_file_path),
+            server._normalize_file_path(file_path_in_summary),
+            target_file_path,
+            file_path_in_summary,
+        ):
+            return f"""================================================================================
+## IMPLEMENTATION File {file_path_in_summary}; ROUND [X]
+================================================================================
+
+{section_content.strip()}
+
+---
+*Extracted from implement_code_summary.md*"""
+
+    sections = summary_content.split("=" * 80)
+    for i, section in enumerate(sections):
+        for line in section.strip().split("\n"):
+            if "## IMPLEMENTATION File" not in line:
+                continue
+            file_part = line.split("File ")[1].split("; ROUND")[0].strip()
+            if (
+                server._normalize_file_path(target_file_path)
+                == server._normalize_file_path(file_part)
+                or os.path.basename(target_file_path) == os.path.basename(file_part)
+                or target_file_path in file_part
+                or file_part.endswith(target_file_path)
+            ) and i + 1 < len(sections):
+                return f"""================================================================================
+## IMPLEMENTATION File {file_part}
+================================================================================
+
+{sections[i + 1].strip()}
+
+---
+*Extracted from implement_code_summary.md using alternative method*"""
+    return None
+
+
+def summary_section(header, body):
+    return f"\n{'=' * 80}\n## IMPLEMENTATION File {header}\n{'=' * 80}\n\n{body}\n\n"
+
+
+SUMMARY_TARGETS = [
+    "a.py",
+    "src/utils/b.py",
+    "b.py",
+    "c.py",
+    "d.py",
+    "models/network.py",
+    "missing.py",
+]
+
+
+def test_code_summary_store_matches_full_text_extraction(tmp_path):
+    summary_path = tmp_path / "implement_code_summary.md"
+    store = server.CodeSummaryStore(summary_path)
+
+    def check():
+        content = summary_path.read_text()
+        for target in SUMMARY_TARGETS:
+            assert store.get_file_section(target) == baseline_file_section(
+                content, target
+            ), target
+
+    summary_path.write_text(
+        "# Code Implementation Progress Summary\n"
+        + summary_section("a.py; ROUND 1 ", "First version of a.")
+        + summary_section("utils/b.py; ROUND 1 ", "Helpers in b.")
+    )
+    check()
+
+    # Append new sections, including a newer round of a.py
+    with open(summary_path, "a") as f:
+        f.write(summary_section("models/network.py; ROUND 2 ", "Network layers."))
+        f.write(summary_section("a.py; ROUND 2 ", "Second version of a."))
+    check()
+
+    # Grow the last section without a new header
+    with open(summary_path, "a") as f:
+        f.write("More notes on the second version of a.\n")
+    check()
+
+    # Sections without a round come last: the full-text pattern let a path
+    # run from such a header into the next ROUND header, the store does not
+    with open(summary_path, "a") as f:
+        f.write(summary_section("c.py", "Concise format without a round."))
+        f.write(summary_section("d.py (REVISED)", "Revised d."))
+    check()
+    assert store.statistics == {"full_builds": 1, "incremental_updates": 3}
+
+    # Rewrite the file with the same size, then truncate it
+    content = summary_path.read_text()
+    summary_path.write_text(content.replace("Helpers in b.", "Helpers in B."))
+    check()
+    summary_path.write_text(
+        "# Code Implementation Progress Summary\n"
+        + summary_section("b.py; ROUND 3 ", "Rewritten b.")
+    )
+    check()
+    assert store.statistics["full_builds"] == 3
@@ -0,0 +1,461 @@
+import asyncio
+import io
+import json
+from dataclasses import asdict
+
+from tools import code_indexer
+from tools.code_indexer import (
+    AnalysisCache,
+    CheckpointedResults,
+    FileRelationship,
+    FileSummary,
+    IndexCheckpoint,
+    LLMRateLimiter,
+    RelationshipPreScorer,
+    RepoIndex,
+    write_repo_index,
+)
+
+
+def make_summary(file_path, file_type="python"):
+    return FileSummary(
+        file_path=file_path,
+        file_type=file_type,
+        main_functions=["main"],
+        key_concepts=["parsing"],
+        dependencies=["json"],
+        summary=f"Summary of {file_path}",
+        lines_of_code=10,
+        last_modified="2026-01-01T00:00:00",
+    )
+
+
+def make_relationship(file_path, target="src/model.py", confidence=0.8):
+    return FileRelationship(
+        repo_file_path=file_path,
+        target_file_path=target,
+        relationship_type="reference",
+        confidence_score=confidence,
+        helpful_aspects=["structure"],
+        potential_contributions=["layout"],
+        usage_suggestions="Reuse the layout",
+    )
+
+
+def test_checkpointed_results_stream_the_same_index_as_lists(tmp_path):
+    checkpoint = IndexCheckpoint(tmp_path / "repo.checkpoint.jsonl", {"repo": "r"})
+    checkpoint.open({})
+    checkpoint.append(make_summary("r/a.py"), [make_relationship("r/a.py")], "h1")
+    checkpoint.append(make_summary("r/b.py", "error"), [], None)
+    # b.py analyzed again after the failure; the latest record wins
+    checkpoint.append(make_summary("r/b.py"), [make_relationship("r/b.py")], "h2")
+    checkpoint.close()
+
+    reused = make_summary("r/c.py")
+    reused_relationship = make_relationship("r/c.py", confidence=0.9)
+    offsets = checkpoint.locate()
+    results = CheckpointedResults(
+        checkpoint.path,
+        [
+            ("r/a.py", offsets["r/a.py"]),
+            ("r/b.py", offsets["r/b.py"]),
+            ("r/c.py", (reused, [])),
+        ],
+        [reused_relationship],
+    )
+    streamed = RepoIndex(
+        repo_name="r",
+        total_files=3,
+        file_summaries=results.file_summaries,
+        relationships=results.relationships,
+        analysis_metadata={"total_relationships_found": len(results.relationships)},
+    )
+    in_memory = RepoIndex(
+        repo_name="r",
+        total_files=3,
+        file_summaries=[make_summary("r/a.py"), make_summary("r/b.py"), reused],
+        relationships=[
+            reused_relationship,
+            make_relationship("r/a.py"),
+            make_relationship("r/b.py"),
+        ],
+        analysis_metadata={"total_relationships_found": 3},
+    )
+
+    for indent in (2, None):
+        output = io.StringIO()
+        write_repo_index(output, streamed, indent, True)
+        assert output.getvalue() == json.dumps(asdict(in_memory), indent=indent)
+
+
+def test_checkpoint_resumes_only_successful_files(tmp_path):
+    checkpoint = IndexCheckpoint(tmp_path / "repo.checkpoint.jsonl", {"repo": "r"})
+    checkpoint.open({})
+    checkpoint.append(make_summary("r/a.py"), [], "h1")
+    checkpoint.append(make_summary("r/b.py", "error"), [], None)
+    checkpoint.close()
+
+    assert checkpoint.load() == {"r/a.py": "h1"}
+    assert IndexCheckpoint(checkpoint.path, {"repo": "other"}).load() == {}
+
+
+def test_write_repo_index_can_leave_out_fields():
+    repo_index = RepoIndex("r", 0, [], [], {"analysis_date": "today"})
+    output = io.StringIO()
+
+    code_indexer.write_repo_index(
+        output, repo_index, 2, True, ["repo_name", "file_summaries"]
+    )
+
+    assert json.loads(output.getvalue()) == {"repo_name": "r", "file_summaries": []}
+
+
+TARGET_STRUCTURE = """
+project/
+├── src/
+│   ├── models/
+│   │   ├── transformer.py   # Multi-head attention encoder
+│   │   └── embedding.py
+│   └── training/
+│       └── trainer.py       # Optimizer and learning rate schedule
+└── README.md
+"""
+
+
+def test_relationship_prescorer_scores_related_files_higher():
+    scorer = RelationshipPreScorer(TARGET_STRUCTURE)
+
+    same_name = scorer.score("repo/models/transformer.py", [])
+    related = scorer.score("repo/layers/attention.py", ["MultiHeadAttention"])
+    unrelated = scorer.score("repo/scripts/download_weights.py", ["fetch_url"])
+
+    assert same_name >= 0.5
+    assert related > unrelated
+    assert unrelated == 0.0
+    assert all(0.0 <= score <= 1.0 for score in (same_name, related, unrelated))
+
+
+def test_relationship_prescorer_ignores_repo_name_and_keeps_everything_without_target():
+    scorer = RelationshipPreScorer(TARGET_STRUCTURE)
+
+    # The first path component is the repository name, not a directory hint
+    assert scorer.score("models/setup.py", []) == 0.0
+    assert RelationshipPreScorer("").score("repo/anything.py", []) == 1.0
+
+
+def test_rate_limiter_request_bucket_waits_for_refill():
+    limiter = LLMRateLimiter(requests_per_minute=600)
+    limiter._request_bucket = 0.0
+
+    async def call():
+        await limiter.acquire()
+        await limiter.release()
+
+    asyncio.run(call())
+
+    # One request refills in 60 / 600 seconds
+    assert 0.05 <= limiter.stats["total_wait_seconds"] <= 0.15
+    assert limiter.stats["requests"] == 1
+
+
+def test_rate_limiter_token_bucket_settles_actual_usage():
+    limiter = LLMRateLimiter(tokens_per_minute=6000)
+
+    async def call():
+        await limiter.acquire(estimated_tokens=1000)
+        await limiter.release(estimated_tokens=1000, actual_tokens=400)
+
+    asyncio.run(call())
+
+    assert limiter.stats["total_wait_seconds"] == 0.0
+    # 1000 estimated tokens were taken and the 600 not used are returned
+    assert abs(limiter._token_bucket - 5600) < 1
+
+    limiter._token_bucket = 0.0
+    asyncio.run(limiter.acquire(estimated_tokens=10))
+    # 10 tokens refill in 10 * 60 / 6000 seconds
+    assert 0.05 <= limiter.stats["total_wait_seconds"] <= 0.15
+
+
+def test_rate_limiter_aimd_concurrency_limit():
+    limiter = LLMRateLimiter(
+        initial_concurrency=4, min_concurrency=1, max_concurrency=8
+    )
+
+    async def call(**outcome):
+        await limiter.acquire()
+        await limiter.release(**outcome)
+
+    asyncio.run(call(succeeded=True))
+    assert limiter.concurrency_limit == 4.25
+
+    asyncio.run(call(throttled=True, retry_after=0.01))
+    assert limiter.concurrency_limit == 2.125
+    assert limiter.stats["throttled"] == 1
+
+    for _ in range(3):
+        asyncio.run(call(throttled=True, retry_after=0.01))
+    assert limiter.concurrency_limit == 1.0
+
+    asyncio.run(call(succeeded=False))
+    assert limiter.concurrency_limit == 1.0
+    assert limiter.stats["failed"] == 1
+
+
+def make_indexer(tmp_path, config="llm:\n  request_delay: 0\n"):
+    """Indexer over tmp_path/code_base/repo that writes to tmp_path/indexes"""
+    (tmp_path / "code_base" / "repo").mkdir(parents=True, exist_ok=True)
+    config_path = tmp_path / "indexer_config.yaml"
+    config_path.write_text(config)
+    return code_indexer.CodeIndexer(
+        str(tmp_path / "code_base"),
+        "project/\n└── model.py",
+        str(tmp_path / "indexes"),
+        indexer_config_path=str(config_path),
+        enable_pre_filtering=False,
+    )
+
+
+def test_incremental_plan_reanalyzes_changed_and_failed_files(tmp_path):
+    indexer = make_indexer(tmp_path)
+    repo = tmp_path / "code_base" / "repo"
+    for name in ("unchanged", "modified", "deleted", "failed", "parse_failed"):
+        (repo / f"{name}.py").write_text(f"def {name}():\n    return 1\n")
+    all_files = sorted(repo.glob("*.py"))
+
+    summaries = [make_summary(f"repo/{path.name}") for path in all_files]
+    for summary in summaries:
+        if summary.file_path == "repo/failed.py":
+            summary.file_type = "error"
+        elif summary.file_path == "repo/parse_failed.py":
+            summary.summary = code_indexer.ANALYSIS_FAILED_SUMMARY
+    failed_paths = {"repo/failed.py", "repo/parse_failed.py"}
+    previous_state = {
+        "manifest": indexer._build_repo_manifest(
+            "repo",
+            all_files,
+            {summary.file_path for summary in summaries} - failed_paths,
+            failed_paths,
+        ),
+        "index": {
+            "file_summaries": [asdict(summary) for summary in summaries],
+            "relationships": [
+                asdict(make_relationship(summary.file_path)) for summary in summaries
+            ],
+        },
+    }
+    assert not previous_state["manifest"]["files"]["repo/failed.py"]["analyzed"]
+
+    (repo / "modified.py").write_text("def modified():\n    return 2\n")
+    (repo / "deleted.py").unlink()
+    (repo / "added.py").write_text("def added():\n    return 1\n")
+    current_files = sorted(repo.glob("*.py"))
+
+    files_to_analyze, reused_summaries, reused_relationships, stats = asyncio.run(
+        indexer._plan_incremental_update(repo, "", current_files, previous_state)
+    )
+
+    assert sorted(path.name for path in files_to_analyze) == [
+        "added.py",
+        "failed.py",
+        "modified.py",
+        "parse_failed.py",
+    ]
+    assert list(reused_summaries) == ["repo/unchanged.py"]
+    assert [rel.repo_file_path for rel in reused_relationships] == ["repo/unchanged.py"]
+    assert stats["added_files"] == 1
+    assert stats["modified_files"] == 1
+    assert stats["deleted_files"] == 1
+    assert stats["unchanged_files"] == 3
+    assert stats["retried_failed_files"] == 2
+
+
+BATCHED_CONFIG = """
+performance:
+  enable_batched_analysis: true
+  enable_concurrent_analysis: true
+  batch_max_files: 2
+  batch_token_budget: 1000
+llm:
+  request_delay: 0
+"""
+
+
+def test_plan_analysis_batches_respects_budget_and_file_limit(tmp_path):
+    indexer = make_indexer(tmp_path, BATCHED_CONFIG)
+    # About 130 tokens each; the shared prompt leaves about 390 for contents
+    small = [{"content": "x" * 400, "id": i} for i in range(5)]
+    large = {"content": "x" * 2000, "id": "large"}
+
+    batches, oversized = indexer._plan_analysis_batches(small[:2] + [large] + small[2:])
+
+    assert [[ctx["id"] for ctx in batch] for batch in batches] == [[0, 1], [2, 3], [4]]
+    assert oversized == [large]
+
+    indexer.batch_max_files = 8
+    batches, oversized = indexer._plan_analysis_batches(small)
+    assert [[ctx["id"] for ctx in batch] for batch in batches] == [[0, 1, 2], [3, 4]]
+    assert oversized == []
+
+
+def test_batched_analysis_falls_back_for_missing_and_unknown_file_ids(tmp_path):
+    indexer = make_indexer(tmp_path, BATCHED_CONFIG)
+    repo = tmp_path / "code_base" / "repo"
+    for name in ("a", "b"):
+        (repo / f"{name}.py").write_text(f"def {name}():\n    return 1\n")
+    files = sorted(repo.glob("*.py"))
+
+    async def call_llm(prompt, max_tokens=None):
+        # F1 is answered, F2 is missing and F9 does not exist
+        return json.dumps(
+            {
+                "files": [
+                    {"file_id": "F1", "file_type": "python", "summary": "batched"},
+                    {"file_id": "F9", "file_type": "python", "summary": "unknown"},
+                ]
+            }
+        )
+
+    individually_analyzed = []
+
+    async def analyze_file_content(file_path):
+        individually_analyzed.append(file_path.name)
+        return make_summary(f"repo/{file_path.name}")
+
+    async def find_relationships(file_summary):
+        return []
+
+    indexer._call_llm = call_llm
+    indexer.analyze_file_content = analyze_file_content
+    indexer.find_relationships = find_relationships
+
+    file_summaries, _ = asyncio.run(indexer._process_files_batched(files))
+
+    assert individually_analyzed == ["b.py"]
+    assert [(fs.file_path, fs.summary) for fs in file_summaries] == [
+        ("repo/a.py", "batched"),
+        ("repo/b.py", "Summary of repo/b.py"),
+    ]
+
+
+def test_batched_analysis_finds_cached_file_relationships_concurrently(tmp_path):
+    indexer = make_indexer(tmp_path, BATCHED_CONFIG)
+    repo = tmp_path / "code_base" / "repo"
+    for i in range(4):
+        (repo / f"m{i}.py").write_text("x = 1\n")
+    in_flight = {"current": 0, "peak": 0}
+
+    def prepare_file_analysis(file_path):
+        return make_summary(f"repo/{file_path.name}"), None
+
+    async def find_relationships(file_summary):
+        in_flight["current"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+        return [make_relationship(file_summary.file_path)]
+
+    indexer._prepare_file_analysis = prepare_file_analysis
+    indexer.find_relationships = find_relationships
+
+    file_summaries, relationships = asyncio.run(
+        indexer._process_files_batched(sorted(repo.glob("*.py")))
+    )
+
+    assert in_flight["peak"] > 1
+    assert [fs.file_path for fs in file_summaries] == [
+        f"repo/m{i}.py" for i in range(4)
+    ]
+    assert len(relationships) == 4
+
+
+def test_batched_analysis_skips_relationships_of_low_prescore_files(tmp_path):
+    indexer = make_indexer(
+        tmp_path,
+        BATCHED_CONFIG
+        + "relationships:\n  enable_relationship_prescoring: true\n"
+        + "  relationship_prescore_threshold: 0.1\n",
+    )
+    repo = tmp_path / "code_base" / "repo"
+    (repo / "model.py").write_text("class Model:\n    pass\n")
+    (repo / "download.py").write_text("def fetch():\n    pass\n")
+    prompts = []
+
+    async def call_llm(prompt, max_tokens=None):
+        prompts.append(prompt)
+        relationship = {
+            "target_file_path": "model.py",
+            "relationship_type": "direct_match",
+            "confidence_score": 0.9,
+            "helpful_aspects": [],
+            "potential_contributions": [],
+            "usage_suggestions": "",
+        }
+        return json.dumps(
+            {
+                "files": [
+                    {
+                        "file_id": file_id,
+                        "summary": "ok",
+                        "relationships": [relationship],
+                    }
+                    for file_id in ("F1", "F2")
+                ]
+            }
+        )
+
+    indexer._call_llm = call_llm
+    _, relationships = asyncio.run(
+        indexer._process_files_batched([repo / "download.py", repo / "model.py"])
+    )
+
+    assert [rel.repo_file_path for rel in relationships] == ["repo/model.py"]
+    assert prompts[0].count("\nRelationships: not needed\n") == 1
+    assert (
+        "download.py ===\nStatic facts: unavailable\nRelationships: not needed"
+        in (prompts[0])
+    )
+    assert indexer.relationship_prescore_stats == {"evaluated": 2, "skipped": 1}
+
+
+def test_analysis_cache_evicts_least_recently_used_entries(tmp_path, monkeypatch):
+    clock = iter(range(1, 100))
+    monkeypatch.setattr(code_indexer.time, "time", lambda: next(clock))
+    cache = AnalysisCache(tmp_path / "cache.sqlite", max_entries=2)
+
+    cache.put("summary", "a", {"summary": "a"})
+    cache.put("summary", "b", {"summary": "b"})
+    assert cache.get("summary", "a") == {"summary": "a"}
+    cache.put("summary", "c", {"summary": "c"})
+
+    assert cache.get("summary", "b") is None
+    assert cache.get("summary", "a") == {"summary": "a"}
+    assert cache.get("summary", "c") == {"summary": "c"}
+    assert cache.stats["evictions"] == 1
+
+
+def test_persistent_cache_misses_when_analysis_fingerprint_changes(
+    tmp_path, monkeypatch
+):
+    indexer = make_indexer(
+        tmp_path,
+        "performance:\n  enable_persistent_cache: true\n"
+        f"  persistent_cache_path: {tmp_path / 'cache.sqlite'}\n",
+    )
+    file_path = tmp_path / "code_base" / "repo" / "model.py"
+    file_path.write_text("class Model:\n    pass\n")
+
+    file_summary, analysis_context = indexer._prepare_file_analysis(file_path)
+    assert file_summary is None
+    indexer._store_file_summary(
+        analysis_context, make_summary("repo/model.py"), analysis_succeeded=True
+    )
+    file_summary, _ = indexer._prepare_file_analysis(file_path)
+    assert file_summary.summary == "Summary of repo/model.py"
+
+    # Results of other settings or prompts are not served
+    indexer.max_content_length += 1
+    assert indexer._prepare_file_analysis(file_path)[0] is None
+    indexer.max_content_length -= 1
+    monkeypatch.setattr(code_indexer, "ANALYSIS_PROMPT_VERSION", "changed")
+    assert indexer._prepare_file_analysis(file_path)[0] is None
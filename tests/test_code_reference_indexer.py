@@ -0,0 +1,195 @@
+import json
+import os
+
+from tools import code_reference_indexer as indexer
+
+
+def sample_index():
+    return {
+        "repo_name": "sample",
+        "total_files": 3,
+        "file_summaries": [
+            {
+                "file_path": "sample/model.py",
+                "file_type": "python",
+                "main_functions": ["Model", "forward"],
+                "key_concepts": ["transformer", "attention"],
+                "dependencies": ["torch"],
+                "summary": "Transformer model with multi-head attention",
+                "lines_of_code": 120,
+                "last_modified": "2026-01-01T00:00:00",
+            },
+            {
+                "file_path": "sample/train.py",
+                "file_type": "python",
+                "main_functions": ["train"],
+                "key_concepts": ["training loop", "attention"],
+                "dependencies": [],
+                "summary": "Training loop — schedules and checkpoints",
+                "lines_of_code": 80,
+                "last_modified": "2026-01-02T00:00:00",
+            },
+            # Does not match the column schema and is stored verbatim
+            {"file_path": "sample/odd.py", "lines_of_code": "unknown"},
+        ],
+        "relationships": [
+            {
+                "repo_file_path": "sample/model.py",
+                "target_file_path": "src/model.py",
+                "relationship_type": "direct_match",
+                "confidence_score": 0.9,
+                "helpful_aspects": ["attention"],
+                "potential_contributions": ["model layout"],
+                "usage_suggestions": "Adapt the attention block",
+            }
+        ],
+        "analysis_metadata": {"analysis_date": "2026-01-03", "cache_hits": 0},
+    }
+
+
+def test_compact_index_round_trip(tmp_path):
+    index_data = sample_index()
+    compact_file = indexer.write_compact_index(
+        index_data, tmp_path / f"sample_index{indexer.COMPACT_INDEX_SUFFIX}"
+    )
+
+    loaded = indexer.load_index_file(compact_file)
+
+    assert loaded == index_data
+    assert list(loaded) == list(index_data)
+
+
+def test_up_to_date_compact_copy_is_preferred(tmp_path):
+    json_file = tmp_path / "sample_index.json"
+    json_file.write_text(json.dumps(sample_index()))
+    indexer.convert_indexes_to_compact(str(tmp_path))
+
+    selected = indexer.select_index_files(tmp_path)
+
+    assert selected["sample_index"].suffix == indexer.COMPACT_INDEX_SUFFIX
+
+
+def test_bm25_prefers_rare_terms_and_shorter_documents():
+    bm25 = indexer.BM25Index(
+        [
+            ["attention", "model"],
+            ["attention", "model", "layer", "norm", "dropout", "residual"],
+            ["model", "training"],
+            ["data", "loader"],
+        ]
+    )
+
+    results = bm25.top_k({"attention": 1.0, "model": 1.0}, 10)
+
+    assert [doc_id for doc_id, _ in results] == [0, 1, 2]
+    assert all(0.0 < score <= 1.0 for _, score in results)
+    # "model" appears in more documents, so it weighs less than "attention"
+    assert bm25.idf["attention"] > bm25.idf["model"]
+    assert bm25.top_k({"missing": 1.0}, 10) == []
+
+
+def test_bm25_top_k_limits_results_and_applies_boost():
+    bm25 = indexer.BM25Index([["loss"], ["loss"], ["loss"]])
+
+    assert [doc_id for doc_id, _ in bm25.top_k({"loss": 1.0}, 2)] == [0, 1]
+    boosted = bm25.top_k({"loss": 1.0}, 3, boost_ids={2}, boost=0.1)
+    assert [doc_id for doc_id, _ in boosted] == [2, 0, 1]
+    assert boosted[1][1] == boosted[2][1]
+    assert abs(boosted[0][1] - boosted[1][1] - 0.1) < 1e-3
+
+
+def test_bm25_reference_search_ranks_matching_file_first():
+    results = indexer.find_relevant_references_in_cache(
+        "src/models/transformer_model.py",
+        {"sample": sample_index()},
+        keywords=["attention"],
+    )
+
+    assert results[0][0].file_path == "sample/model.py"
+    assert [score for _, score in results] == sorted(
+        (score for _, score in results), reverse=True
+    )
+
+
+def make_relationship(target_file_path, confidence_score=0.5):
+    return indexer.RelationshipInfo(
+        repo_file_path=f"repo/{target_file_path}",
+        target_file_path=target_file_path,
+        relationship_type="reference",
+        confidence_score=confidence_score,
+        helpful_aspects=[],
+        potential_contributions=[],
+        usage_suggestions="",
+    )
+
+
+def test_relationship_path_trie_match_types():
+    trie = indexer.RelationshipPathTrie(
+        [
+            make_relationship("src/models/user.py", 0.4),
+            make_relationship("app/models/user.py", 0.9),
+            make_relationship("user.py", 0.7),
+            make_relationship("views/user.py", 0.8),
+            make_relationship("models/user_profile.py", 0.99),
+        ]
+    )
+
+    results = [
+        (rel.target_file_path, match_type)
+        for rel, match_type in trie.lookup("models/user.py")
+    ]
+
+    # "src/" is stripped as a common prefix, so the first path matches exactly
+    assert results == [
+        ("src/models/user.py", "exact"),
+        ("app/models/user.py", "suffix"),
+        ("views/user.py", "basename"),
+        ("user.py", "basename"),
+    ]
+
+
+def test_relationship_path_trie_matches_at_component_boundaries():
+    trie = indexer.RelationshipPathTrie(
+        [make_relationship("models/user.py"), make_relationship("mymodels/user.py")]
+    )
+
+    assert [
+        (rel.target_file_path, match_type)
+        for rel, match_type in trie.lookup("app/models/user.py")
+    ] == [("models/user.py", "suffix"), ("mymodels/user.py", "basename")]
+    assert trie.lookup("") == []
+    assert trie.lookup("models/other.py") == []
+
+
+def test_index_store_reloads_only_changed_index_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(indexer, "INDEX_STORES", {})
+    index_file = tmp_path / "sample_index.json"
+    index_file.write_text(json.dumps(sample_index()))
+
+    store = indexer.get_index_store(str(tmp_path))
+    assert store.last_refresh_changed
+    assert [ref.file_path for ref in store.references][:2] == [
+        "sample/model.py",
+        "sample/train.py",
+    ]
+    loaded_cache = store.index_cache["sample_index"]
+
+    # Unchanged mtime and size: the parsed index is kept
+    assert indexer.get_index_store(str(tmp_path)) is store
+    assert not store.last_refresh_changed
+    assert store.index_cache["sample_index"] is loaded_cache
+
+    changed = sample_index()
+    changed["file_summaries"][0]["file_path"] = "sample/renamed_model.py"
+    index_file.write_text(json.dumps(changed))
+    stats = index_file.stat()
+    os.utime(index_file, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1_000_000))
+
+    assert indexer.get_index_store(str(tmp_path)) is store
+    assert store.last_refresh_changed
+    assert store.references[0].file_path == "sample/renamed_model.py"
+
+    index_file.unlink()
+    indexer.get_index_store(str(tmp_path))
+    assert store.index_cache == {}
+    assert store.references == []
@@ -0,0 +1,155 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from tools import document_segmentation_server as server
+
+
+def write_paper(paper_dir, sections):
+    body = "\n\n".join(f"## {title}\n\n{text}" for title, text in sections)
+    (paper_dir / "paper.md").write_text(f"# A Sample Paper\n\n{body}\n")
+
+
+def sample_sections(count=12):
+    return [
+        (
+            f"Section {i}",
+            f"This section discusses topic {i} of the proposed method. " * 40,
+        )
+        for i in range(count)
+    ]
+
+
+def long_sections(count=30, edited=None):
+    sections = []
+    for i in range(count):
+        paragraphs = [
+            f"Here we talk about the history of topic {i} and its context. " * 6
+            for _ in range(3)
+        ]
+        if i == edited:
+            paragraphs[1] = "This paragraph was rewritten for the new draft. " * 5
+        sections.append((f"{i + 1}. Section {i}", "\n\n".join(paragraphs)))
+    return sections
+
+
+def stored_segments(paper_dir):
+    segments_dir = paper_dir / "document_segments"
+    index = json.loads((segments_dir / "document_index.json").read_text())
+    blob = (segments_dir / index["segments_blob"]).read_bytes()
+    return [
+        (
+            segment["title"],
+            segment["content_type"],
+            blob[
+                segment["content_offset"] : segment["content_offset"]
+                + segment["content_length"]
+            ]
+            .decode("utf-8")
+            .strip(),
+            text_range,
+        )
+        for segment, text_range in zip(index["segments"], index["segment_text_ranges"])
+    ]
+
+
+def analyze(paper_dir, **kwargs):
+    return json.loads(
+        asyncio.run(server.analyze_and_segment_document(str(paper_dir), **kwargs))
+    )
+
+
+def test_overview_loads_index_that_is_not_resident(tmp_path):
+    write_paper(tmp_path, sample_sections())
+    assert analyze(tmp_path)["status"] == "success"
+
+    server.DOCUMENT_INDEXES.clear()
+    overview = json.loads(asyncio.run(server.get_document_overview(str(tmp_path))))
+
+    assert overview["status"] == "success"
+    assert overview["total_segments"] > 0
+
+
+def test_edit_inside_one_section_resegments_only_that_section(tmp_path):
+    incremental_dir = tmp_path / "incremental"
+    full_dir = tmp_path / "full"
+    incremental_dir.mkdir()
+    full_dir.mkdir()
+    write_paper(incremental_dir, long_sections())
+    first = analyze(incremental_dir)
+    assert first["segmentation_strategy"] == "semantic_chunking_enhanced"
+
+    write_paper(incremental_dir, long_sections(edited=7))
+    write_paper(full_dir, long_sections(edited=7))
+    incremental = analyze(incremental_dir)
+    full = analyze(full_dir, force_refresh=True)
+
+    assert incremental["resegmented_sections"] == 1
+    assert full["resegmented_sections"] == full["total_sections"]
+    assert stored_segments(incremental_dir) == stored_segments(full_dir)
+
+
+KEYWORD_CONTENTS = [
+    "The Transformer uses multi-head attention. Attention weights are softmaxed.",
+    "Training: Adam optimizer, learning-rate warmup and label smoothing.",
+    "Self-attention vs. cross_attention; attentional pooling (aaa aaaa).",
+    "",
+]
+
+
+def scan_match_stats(contents, keyword_lower):
+    """Per-segment occurrence count and first offset, as the content scan computes"""
+    stats = {}
+    for position, content in enumerate(contents):
+        content_lower = content.lower()
+        count = content_lower.count(keyword_lower)
+        if count:
+            stats[position] = (count, content_lower.find(keyword_lower))
+    return stats
+
+
+def test_keyword_index_match_stats_equal_content_scan():
+    keyword_index = server.KeywordIndex.build(KEYWORD_CONTENTS)
+
+    for keyword in ["attention", "atten", "ATTENTION", "aa", "rate", "adam", "zzz"]:
+        keyword_lower = keyword.lower()
+        assert keyword_index.match_stats(keyword_lower) == scan_match_stats(
+            KEYWORD_CONTENTS, keyword_lower
+        )
+    # Phrases and punctuation are left to the content scan
+    assert keyword_index.match_stats("multi-head") is None
+    assert keyword_index.match_stats("label smoothing") is None
+
+
+class ScanOnlyKeywordIndex(server.KeywordIndex):
+    def match_stats(self, keyword_lower):
+        return None
+
+
+def test_keyword_scores_equal_content_scan_scores():
+    segments = [
+        SimpleNamespace(title=title)
+        for title in ["Attention", "Training", "Variants", "Empty"]
+    ]
+    document_index = SimpleNamespace(segments=segments)
+    contents = dict(zip(map(id, segments), KEYWORD_CONTENTS))
+    keywords = ["attention", "Adam", "multi-head", "aa", "pooling"]
+
+    def read_content(segment):
+        return contents[id(segment)]
+
+    indexed = server._calculate_keyword_scores(
+        document_index,
+        server.KeywordIndex.build(KEYWORD_CONTENTS),
+        keywords,
+        read_content,
+    )
+    scanned = server._calculate_keyword_scores(
+        document_index,
+        ScanOnlyKeywordIndex.build(KEYWORD_CONTENTS),
+        keywords,
+        read_content,
+    )
+
+    assert indexed == scanned
+    assert indexed[0] > indexed[3]
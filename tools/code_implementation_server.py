@@ -13,16 +13,24 @@ python tools/code_implementation_server.py
 """
 
 import os
+import asyncio
+import signal
 import subprocess
+import fnmatch
+import functools
 import json
+import mmap
 import sys
+import threading
 import io
+import time
 from pathlib import Path
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import tempfile
 import shutil
 import logging
+from collections import OrderedDict, deque
 from datetime import datetime
 
 # Set standard output encoding to UTF-8
@@ -47,9 +55,17 @@ logger = logging.getLogger(__name__)
 # Create FastMCP server instance
 mcp = FastMCP("code-implementation-server")
 
+# In-memory operation history is a ring buffer; the full history is appended to
+# a JSONL log next to the workspace (or CODE_IMPL_OPERATION_LOG when set)
+OPERATION_HISTORY_LIMIT = int(os.environ.get("CODE_IMPL_HISTORY_LIMIT", "1000") or 1000)
+OPERATION_LOG_FILENAME = "operation_history.jsonl"
+
 # Global variables: workspace directory and operation history
 WORKSPACE_DIR = None
-OPERATION_HISTORY = []
+OPERATION_HISTORY = deque(maxlen=OPERATION_HISTORY_LIMIT)
+OPERATION_COUNT = 0
+OPERATION_LOG = {"path": None, "handle": None}
+TOOL_METRICS: Dict[str, Dict[str, Any]] = {}
 CURRENT_FILES = {}
 
 
@@ -100,17 +116,289 @@ def validate_path(path: str) -> Path:
     return full_path
 
 
+def get_operation_log_path() -> Path:
+    """Path of the persistent JSONL operation log, or None before a workspace exists"""
+    configured_path = os.environ.get("CODE_IMPL_OPERATION_LOG")
+    if configured_path:
+        return Path(configured_path)
+    if WORKSPACE_DIR is None or not WORKSPACE_DIR.exists():
+        return None
+    # Keep the log beside generate_code so it never ends up in the generated repo
+    return WORKSPACE_DIR.parent / OPERATION_LOG_FILENAME
+
+
+def _append_operation_log(entry: Dict[str, Any]):
+    """Append one record to the JSONL operation log, reopening it if the workspace moved"""
+    log_path = get_operation_log_path()
+    if log_path is None:
+        return
+    try:
+        if OPERATION_LOG["path"] != log_path:
+            if OPERATION_LOG["handle"] is not None:
+                OPERATION_LOG["handle"].close()
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            OPERATION_LOG["handle"] = open(log_path, "a", encoding="utf-8", buffering=1)
+            OPERATION_LOG["path"] = log_path
+        OPERATION_LOG["handle"].write(
+            json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        )
+    except OSError as e:
+        logger.warning(f"Failed to write operation log {log_path}: {e}")
+        OPERATION_LOG["path"] = None
+        OPERATION_LOG["handle"] = None
+
+
 def log_operation(action: str, details: Dict[str, Any]):
     """Log operation history"""
-    OPERATION_HISTORY.append(
-        {"timestamp": datetime.now().isoformat(), "action": action, "details": details}
+    global OPERATION_COUNT
+    OPERATION_COUNT += 1
+    entry = {
+        "seq": OPERATION_COUNT,
+        "timestamp": datetime.now().isoformat(),
+        "action": action,
+        "details": details,
+    }
+    OPERATION_HISTORY.append(entry)
+    _append_operation_log(entry)
+
+
+def _payload_size(value: Any) -> int:
+    """Approximate payload size in bytes of a tool argument or result"""
+    if value is None:
+        return 0
+    if isinstance(value, bytes):
+        return len(value)
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+    return len(value.encode("utf-8", errors="replace"))
+
+
+def record_tool_metrics(
+    tool_name: str, duration: float, input_bytes: int, output_bytes: int, failed: bool
+):
+    """Accumulate per-tool latency and payload statistics"""
+    metrics = TOOL_METRICS.setdefault(
+        tool_name,
+        {
+            "calls": 0,
+            "errors": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "input_bytes": 0,
+            "output_bytes": 0,
+            "max_output_bytes": 0,
+        },
     )
+    metrics["calls"] += 1
+    metrics["errors"] += int(failed)
+    metrics["total_seconds"] += duration
+    metrics["max_seconds"] = max(metrics["max_seconds"], duration)
+    metrics["input_bytes"] += input_bytes
+    metrics["output_bytes"] += output_bytes
+    metrics["max_output_bytes"] = max(metrics["max_output_bytes"], output_bytes)
+    _append_operation_log(
+        {
+            "timestamp": datetime.now().isoformat(),
+            "action": "tool_call",
+            "tool": tool_name,
+            "duration_ms": round(duration * 1000, 3),
+            "input_bytes": input_bytes,
+            "output_bytes": output_bytes,
+            "failed": failed,
+        }
+    )
+
+
+def profiled_tool(func):
+    """Record latency and payload sizes of every call to an MCP tool"""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        input_bytes = sum(_payload_size(value) for value in args) + sum(
+            _payload_size(value) for value in kwargs.values()
+        )
+        result = None
+        failed = True
+        try:
+            result = await func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            record_tool_metrics(
+                func.__name__,
+                time.perf_counter() - start_time,
+                input_bytes,
+                _payload_size(result),
+                failed,
+            )
+
+    return wrapper
+
+
+def summarize_tool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Per-tool metrics with derived averages, slowest tools first"""
+    summary = {}
+    for tool_name, metrics in sorted(
+        TOOL_METRICS.items(), key=lambda item: -item[1]["total_seconds"]
+    ):
+        calls = metrics["calls"] or 1
+        summary[tool_name] = {
+            "calls": metrics["calls"],
+            "errors": metrics["errors"],
+            "total_ms": round(metrics["total_seconds"] * 1000, 3),
+            "avg_ms": round(metrics["total_seconds"] * 1000 / calls, 3),
+            "max_ms": round(metrics["max_seconds"] * 1000, 3),
+            "avg_input_bytes": metrics["input_bytes"] // calls,
+            "avg_output_bytes": metrics["output_bytes"] // calls,
+            "max_output_bytes": metrics["max_output_bytes"],
+        }
+    return summary
 
 
 # ==================== File Operation Tools ====================
 
+# Read cache shared by read_file and read_multiple_files, keyed by resolved path
+# and validated against (mtime, size, inode) on every read
+FILE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Files above this size are never cached; line ranges are read through mmap
+FILE_CACHE_MAX_FILE_BYTES = 4 * 1024 * 1024
+# Default total content size returned by one read_multiple_files call
+READ_MULTIPLE_FILES_BYTE_BUDGET = 512 * 1024
+READ_MULTIPLE_FILES_WORKERS = 8
+FILE_CONTENT_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+FILE_CACHE_LOCK = threading.Lock()
+FILE_CACHE_STATISTICS = {"hits": 0, "misses": 0, "cached_bytes": 0}
+
+
+def _file_signature(stat_result: os.stat_result) -> tuple:
+    return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+
+def _slice_lines(lines: List[str], start_line: int = None, end_line: int = None):
+    if start_line is None and end_line is None:
+        return lines
+    start_idx = (start_line - 1) if start_line else 0
+    end_idx = end_line if end_line else len(lines)
+    return lines[start_idx:end_idx]
+
+
+def _read_line_range_mmap(full_path: Path, start_line: int, end_line: int):
+    """Read a line range of a large file without decoding the whole file"""
+    with open(full_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            total_lines = 0
+            position = 0
+            start_offset = 0 if not start_line or start_line <= 1 else size
+            end_offset = size
+            while position < size:
+                newline = mapped.find(b"\n", position)
+                line_end = size if newline < 0 else newline + 1
+                total_lines += 1
+                if start_line and total_lines == start_line - 1:
+                    start_offset = line_end
+                position = line_end
+                if end_line and total_lines == end_line:
+                    end_offset = line_end
+                    break
+            data = mapped[start_offset : max(start_offset, end_offset)]
+            # Count the remaining lines in large chunks instead of line by line
+            while position < size:
+                chunk = mapped[position : position + 8 * 1024 * 1024]
+                total_lines += chunk.count(b"\n")
+                position += len(chunk)
+            if size and mapped[size - 1 : size] != b"\n" and end_offset < size:
+                total_lines += 1
+    text = data.decode("utf-8").replace("\r\n", "\n")
+    return text.splitlines(keepends=True), total_lines
+
+
+def read_file_lines(full_path: Path, start_line: int = None, end_line: int = None):
+    """
+    Read the lines of a workspace file, using the shared content cache
+
+    Returns:
+        (selected lines, total line count of the file, cache hit)
+    """
+    key = str(full_path)
+    stat_result = full_path.stat()
+    signature = _file_signature(stat_result)
+    with FILE_CACHE_LOCK:
+        entry = FILE_CONTENT_CACHE.get(key)
+        if entry is not None and entry["signature"] == signature:
+            FILE_CONTENT_CACHE.move_to_end(key)
+            FILE_CACHE_STATISTICS["hits"] += 1
+            lines = entry["lines"]
+            return _slice_lines(lines, start_line, end_line), len(lines), True
+        FILE_CACHE_STATISTICS["misses"] += 1
+
+    if stat_result.st_size > FILE_CACHE_MAX_FILE_BYTES:
+        if start_line is not None or end_line is not None:
+            lines, total_lines = _read_line_range_mmap(full_path, start_line, end_line)
+            return lines, total_lines, False
+        with open(full_path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        return lines, len(lines), False
+
+    with open(full_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    with FILE_CACHE_LOCK:
+        previous = FILE_CONTENT_CACHE.pop(key, None)
+        if previous is not None:
+            FILE_CACHE_STATISTICS["cached_bytes"] -= previous["size"]
+        FILE_CONTENT_CACHE[key] = {
+            "signature": signature,
+            "lines": lines,
+            "size": stat_result.st_size,
+        }
+        FILE_CACHE_STATISTICS["cached_bytes"] += stat_result.st_size
+        while FILE_CACHE_STATISTICS["cached_bytes"] > FILE_CACHE_MAX_BYTES:
+            _, evicted = FILE_CONTENT_CACHE.popitem(last=False)
+            FILE_CACHE_STATISTICS["cached_bytes"] -= evicted["size"]
+    return _slice_lines(lines, start_line, end_line), len(lines), False
+
+
+def allocate_byte_budget(sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+    """
+    Split a byte budget across files so small files are returned whole
+
+    Files are served smallest first; each gets at most an equal share of the
+    budget that is still unallocated, so space left by small files goes to
+    the larger ones instead of being cut evenly.
+    """
+    allocation = {}
+    remaining = budget
+    pending = sorted(sizes.items(), key=lambda item: item[1])
+    for index, (file_path, size) in enumerate(pending):
+        share = remaining // (len(pending) - index)
+        allocation[file_path] = min(size, share)
+        remaining -= allocation[file_path]
+    return allocation
+
+
+def truncate_lines_to_budget(lines: List[str], budget: int) -> List[str]:
+    """
+    Keep whole lines from the start while they fit within the byte budget
+
+    The first line is always kept, even when it alone exceeds the budget, so
+    a caller paging with next_start_line always moves forward.
+    """
+    kept = []
+    used = 0
+    for line in lines:
+        line_size = len(line.encode("utf-8"))
+        if kept and used + line_size > budget:
+            break
+        kept.append(line)
+        used += line_size
+    return kept
+
 
 @mcp.tool()
+@profiled_tool
 async def read_file(
     file_path: str, start_line: int = None, end_line: int = None
 ) -> str:
@@ -135,14 +423,10 @@ async def read_file(
             )
             return json.dumps(result, ensure_ascii=False, indent=2)
 
-        with open(full_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
         # 处理行号范围
-        if start_line is not None or end_line is not None:
-            start_idx = (start_line - 1) if start_line else 0
-            end_idx = end_line if end_line else len(lines)
-            lines = lines[start_idx:end_idx]
+        lines, _, cache_hit = await asyncio.to_thread(
+            read_file_lines, full_path, start_line, end_line
+        )
 
         content = "".join(lines)
 
@@ -161,6 +445,7 @@ async def read_file(
                 "start_line": start_line,
                 "end_line": end_line,
                 "lines_read": len(lines),
+                "cache_hit": cache_hit,
             },
         )
 
@@ -177,15 +462,26 @@ async def read_file(
 
 
 @mcp.tool()
-async def read_multiple_files(file_requests: str, max_files: int = 5) -> str:
+@profiled_tool
+async def read_multiple_files(
+    file_requests: str,
+    max_files: int = 5,
+    max_total_bytes: int = READ_MULTIPLE_FILES_BYTE_BUDGET,
+) -> str:
     """
     Read multiple files in a single operation (for batch reading)
 
+    Files are read concurrently through the shared content cache. When the
+    combined content exceeds max_total_bytes, small files are kept whole and
+    the larger ones are cut at a line boundary; their result carries
+    "truncated" and the start_line to continue from.
+
     Args:
         file_requests: JSON string with file requests, e.g.,
                       '{"file1.py": {}, "file2.py": {"start_line": 1, "end_line": 10}}'
                       or simple array: '["file1.py", "file2.py"]'
         max_files: Maximum number of files to read in one operation (default: 5)
+        max_total_bytes: Byte budget for all returned content (0 for no limit)
 
     Returns:
         JSON string of operation results for all files
@@ -263,10 +559,34 @@ async def read_multiple_files(file_requests: str, max_files: int = 5) -> str:
                 "total_size_bytes": 0,
                 "total_lines": 0,
                 "files_not_found": 0,
+                "truncated_files": 0,
+                "cache_hits": 0,
             },
         }
 
-        # Process each file individually
+        def record_file_error(file_path: str, options: Dict[str, Any], error):
+            results["files"][file_path] = {
+                "status": "error",
+                "message": f"Failed to read file: {str(error)}",
+                "file_path": file_path,
+                "content": "",
+                "total_lines": 0,
+                "size_bytes": 0,
+                "start_line": options.get("start_line"),
+                "end_line": options.get("end_line"),
+            }
+            results["summary"]["failed"] += 1
+            log_operation(
+                "read_file_multi_error",
+                {
+                    "file_path": file_path,
+                    "error": str(error),
+                    "batch_operation": True,
+                },
+            )
+
+        # Validate every request first, then read the existing files concurrently
+        pending_reads = {}
         for file_path, options in normalized_requests.items():
             try:
                 full_path = validate_path(file_path)
@@ -288,77 +608,103 @@ async def read_multiple_files(file_requests: str, max_files: int = 5) -> str:
                     results["summary"]["files_not_found"] += 1
                     continue
 
-                with open(full_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
+                pending_reads[file_path] = (full_path, start_line, end_line)
+            except Exception as file_error:
+                record_file_error(file_path, options, file_error)
 
-                # Handle line range
-                original_line_count = len(lines)
-                if start_line is not None or end_line is not None:
-                    start_idx = (start_line - 1) if start_line else 0
-                    end_idx = end_line if end_line else len(lines)
-                    lines = lines[start_idx:end_idx]
+        read_semaphore = asyncio.Semaphore(READ_MULTIPLE_FILES_WORKERS)
 
-                content = "".join(lines)
-                size_bytes = len(content.encode("utf-8"))
-                lines_count = len(lines)
+        async def read_one(full_path: Path, start_line: int, end_line: int):
+            async with read_semaphore:
+                return await asyncio.to_thread(
+                    read_file_lines, full_path, start_line, end_line
+                )
 
-                # Record individual file result
-                results["files"][file_path] = {
-                    "status": "success",
-                    "message": f"File read successfully: {file_path}",
-                    "file_path": file_path,
-                    "content": content,
-                    "total_lines": lines_count,
-                    "original_total_lines": original_line_count,
-                    "size_bytes": size_bytes,
-                    "start_line": start_line,
-                    "end_line": end_line,
-                    "line_range_applied": start_line is not None
-                    or end_line is not None,
-                }
+        read_outcomes = await asyncio.gather(
+            *(read_one(*request) for request in pending_reads.values()),
+            return_exceptions=True,
+        )
+        file_reads = {}
+        for file_path, outcome in zip(pending_reads, read_outcomes):
+            if isinstance(outcome, Exception):
+                record_file_error(file_path, normalized_requests[file_path], outcome)
+            else:
+                file_reads[file_path] = outcome
 
-                # Update summary
-                results["summary"]["successful"] += 1
-                results["summary"]["total_size_bytes"] += size_bytes
-                results["summary"]["total_lines"] += lines_count
+        # Share the byte budget so small files survive and large ones are cut
+        full_sizes = {
+            file_path: sum(len(line.encode("utf-8")) for line in lines)
+            for file_path, (lines, _, _) in file_reads.items()
+        }
+        if max_total_bytes and sum(full_sizes.values()) > max_total_bytes:
+            byte_allocation = allocate_byte_budget(full_sizes, max_total_bytes)
+        else:
+            byte_allocation = full_sizes
 
-                # Log individual file operation
-                log_operation(
-                    "read_file_multi",
-                    {
-                        "file_path": file_path,
-                        "start_line": start_line,
-                        "end_line": end_line,
-                        "lines_read": lines_count,
-                        "size_bytes": size_bytes,
-                        "batch_operation": True,
-                    },
+        for file_path in normalized_requests:
+            if file_path not in file_reads:
+                continue
+            lines, original_line_count, cache_hit = file_reads[file_path]
+            _, start_line, end_line = pending_reads[file_path]
+            truncated = byte_allocation[file_path] < full_sizes[file_path]
+            if truncated:
+                lines = truncate_lines_to_budget(lines, byte_allocation[file_path])
+
+            content = "".join(lines)
+            size_bytes = len(content.encode("utf-8"))
+            lines_count = len(lines)
+
+            # Record individual file result
+            file_result = {
+                "status": "success",
+                "message": f"File read successfully: {file_path}",
+                "file_path": file_path,
+                "content": content,
+                "total_lines": lines_count,
+                "original_total_lines": original_line_count,
+                "size_bytes": size_bytes,
+                "start_line": start_line,
+                "end_line": end_line,
+                "line_range_applied": start_line is not None or end_line is not None,
+                "cache_hit": cache_hit,
+            }
+            if truncated:
+                file_result["truncated"] = True
+                file_result["full_size_bytes"] = full_sizes[file_path]
+                file_result["next_start_line"] = (start_line or 1) + lines_count
+                file_result["message"] = (
+                    f"File truncated to fit the byte budget: {file_path}"
                 )
+            results["files"][file_path] = file_result
 
-            except Exception as file_error:
-                # Record individual file error
-                results["files"][file_path] = {
-                    "status": "error",
-                    "message": f"Failed to read file: {str(file_error)}",
-                    "file_path": file_path,
-                    "content": "",
-                    "total_lines": 0,
-                    "size_bytes": 0,
-                    "start_line": options.get("start_line"),
-                    "end_line": options.get("end_line"),
-                }
+            # Update summary
+            results["summary"]["successful"] += 1
+            results["summary"]["total_size_bytes"] += size_bytes
+            results["summary"]["total_lines"] += lines_count
+            results["summary"]["cache_hits"] += int(cache_hit)
+            results["summary"]["truncated_files"] += int(truncated)
 
-                results["summary"]["failed"] += 1
+            # Log individual file operation
+            log_operation(
+                "read_file_multi",
+                {
+                    "file_path": file_path,
+                    "start_line": start_line,
+                    "end_line": end_line,
+                    "lines_read": lines_count,
+                    "size_bytes": size_bytes,
+                    "truncated": truncated,
+                    "cache_hit": cache_hit,
+                    "batch_operation": True,
+                },
+            )
 
-                # Log individual file error
-                log_operation(
-                    "read_file_multi_error",
-                    {
-                        "file_path": file_path,
-                        "error": str(file_error),
-                        "batch_operation": True,
-                    },
-                )
+        # Keep the per-file results in request order
+        results["files"] = {
+            file_path: results["files"][file_path]
+            for file_path in normalized_requests
+            if file_path in results["files"]
+        }
 
         # Determine overall status
         if results["summary"]["failed"] > 0:
@@ -400,6 +746,7 @@ async def read_multiple_files(file_requests: str, max_files: int = 5) -> str:
 
 
 @mcp.tool()
+@profiled_tool
 async def write_file(
     file_path: str, content: str, create_dirs: bool = True, create_backup: bool = False
 ) -> str:
@@ -432,6 +779,7 @@ async def write_file(
         # Write file
         with open(full_path, "w", encoding="utf-8") as f:
             f.write(content)
+        update_search_indexes(full_path, content)
 
         # Update current file record
         CURRENT_FILES[file_path] = {
@@ -472,6 +820,7 @@ async def write_file(
 
 
 @mcp.tool()
+@profiled_tool
 async def write_multiple_files(
     file_implementations: str,
     create_dirs: bool = True,
@@ -581,6 +930,7 @@ async def write_multiple_files(
                 # Write file
                 with open(full_path, "w", encoding="utf-8") as f:
                     f.write(content)
+                update_search_indexes(full_path, content)
 
                 # Calculate file metrics
                 size_bytes = len(content.encode("utf-8"))
@@ -682,77 +1032,614 @@ async def write_multiple_files(
 
 # ==================== Code Execution Tools ====================
 
+# Per-stream capture limit; output beyond it is drained and discarded
+EXECUTION_OUTPUT_LIMIT_BYTES = 1024 * 1024
+# Independent commands run concurrently up to this many processes
+MAX_CONCURRENT_EXECUTIONS = 4
+# Time a timed-out process group gets between SIGTERM and SIGKILL
+EXECUTION_KILL_GRACE_SECONDS = 2
+_EXECUTION_SEMAPHORE = None
+
+
+def _get_execution_semaphore() -> asyncio.Semaphore:
+    global _EXECUTION_SEMAPHORE
+    if _EXECUTION_SEMAPHORE is None:
+        _EXECUTION_SEMAPHORE = asyncio.Semaphore(MAX_CONCURRENT_EXECUTIONS)
+    return _EXECUTION_SEMAPHORE
+
+
+async def _read_stream_capped(
+    stream: asyncio.StreamReader, capture: Dict[str, Any], limit: int
+):
+    """Read a stream to EOF into capture, keeping at most limit bytes"""
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        capture["total"] += len(chunk)
+        kept = len(capture["data"])
+        if kept < limit:
+            capture["data"] += chunk[: limit - kept]
+
+
+def _discard_future_outcome(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
+
+def _kill_process_group(process: asyncio.subprocess.Process, sig=None):
+    """Signal the process and everything it started (it leads its own group)"""
+    try:
+        if os.name == "nt":
+            process.kill()
+        else:
+            os.killpg(process.pid, sig or signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_subprocess(
+    program: str,
+    args: List[str] = None,
+    shell: bool = False,
+    timeout: float = 30,
+    cwd: Path = None,
+    output_limit: int = EXECUTION_OUTPUT_LIMIT_BYTES,
+) -> Dict[str, Any]:
+    """
+    Run a command without blocking the event loop
+
+    stdout/stderr are streamed and capped at output_limit bytes each. The
+    process runs in its own process group, so on timeout the whole group
+    (including children it spawned) is terminated.
+
+    Returns:
+        Dict with return_code, stdout, stderr, timed_out and capture sizes
+    """
+    if os.name == "nt":
+        group_options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group_options = {"start_new_session": True}
+
+    async with _get_execution_semaphore():
+        start_time = time.monotonic()
+        if shell:
+            process = await asyncio.create_subprocess_shell(
+                program,
+                cwd=cwd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                **group_options,
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                program,
+                *(args or []),
+                cwd=cwd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                **group_options,
+            )
+
+        stdout_capture = {"data": bytearray(), "total": 0}
+        stderr_capture = {"data": bytearray(), "total": 0}
+        readers = asyncio.gather(
+            _read_stream_capped(process.stdout, stdout_capture, output_limit),
+            _read_stream_capped(process.stderr, stderr_capture, output_limit),
+        )
+        completion = asyncio.gather(readers, process.wait())
+        # Outcomes of cancelled waits are not needed; mark them retrieved
+        completion.add_done_callback(_discard_future_outcome)
+        readers.add_done_callback(_discard_future_outcome)
+        timed_out = False
+        try:
+            await asyncio.wait_for(asyncio.shield(completion), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill_process_group(process, getattr(signal, "SIGTERM", None))
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(process.wait()), EXECUTION_KILL_GRACE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            _kill_process_group(process)
+            await process.wait()
+            try:
+                # Pipes close once the group is gone; processes that left the
+                # group and keep them open must not hang the call
+                await asyncio.wait_for(
+                    asyncio.shield(readers), EXECUTION_KILL_GRACE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                completion.cancel()
+        except asyncio.CancelledError:
+            _kill_process_group(process)
+            completion.cancel()
+            raise
+
+        stdout_bytes = stdout_capture["total"]
+        stderr_bytes = stderr_capture["total"]
+        return {
+            "return_code": process.returncode,
+            "stdout": stdout_capture["data"].decode("utf-8", errors="replace"),
+            "stderr": stderr_capture["data"].decode("utf-8", errors="replace"),
+            "timed_out": timed_out,
+            "stdout_bytes": stdout_bytes,
+            "stderr_bytes": stderr_bytes,
+            "output_truncated": stdout_bytes > output_limit
+            or stderr_bytes > output_limit,
+            "duration_seconds": round(time.monotonic() - start_time, 3),
+        }
+
+
+def _output_fields(run_result: Dict[str, Any]) -> Dict[str, Any]:
+    """stdout/stderr fields of an execution result, with a note when truncated"""
+    fields = {"stdout": run_result["stdout"], "stderr": run_result["stderr"]}
+    if run_result["output_truncated"]:
+        fields["output_truncated"] = True
+        fields["stdout_bytes"] = run_result["stdout_bytes"]
+        fields["stderr_bytes"] = run_result["stderr_bytes"]
+    return fields
+
+
+# ==================== Python Worker Pool ====================
+
+# Opt-in pool of warm interpreters for execute_python (size 0 disables it).
+# Defaults come from the environment so the server config can enable it;
+# configure_python_worker_pool changes them at runtime.
+PYTHON_POOL_SIZE = int(os.environ.get("CODE_IMPL_PYTHON_POOL_SIZE", "0") or 0)
+PYTHON_POOL_PRELOAD_MODULES = [
+    name.strip()
+    for name in os.environ.get("CODE_IMPL_PYTHON_POOL_PRELOAD", "").split(",")
+    if name.strip()
+]
+PYTHON_POOL_MAX_TASKS_PER_WORKER = int(
+    os.environ.get("CODE_IMPL_PYTHON_POOL_MAX_TASKS", "50") or 50
+)
+# Importing heavy modules (e.g. torch) can take a while
+PYTHON_WORKER_STARTUP_TIMEOUT = 120
+
+# Worker process: preloads modules, then runs one request per JSON line.
+# Requests and replies use private copies of fds 0/1; during a task fds 1/2
+# point to capture files named by the server, so output of subprocesses and C
+# extensions is captured and survives a timeout or a crash of the worker.
+PYTHON_WORKER_SCRIPT = r"""
+import importlib, json, os, sys, traceback
+
+def main():
+    config = json.loads(sys.argv[1])
+    workspace = os.getcwd()
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+
+    preloaded, failed = [], {}
+    for name in config["preload"]:
+        try:
+            importlib.import_module(name)
+            preloaded.append(name)
+        except Exception as e:
+            failed[name] = f"{type(e).__name__}: {e}"
+    baseline_path = list(sys.path)
+    baseline_environ = dict(os.environ)
+    replies.write(json.dumps({"ready": True, "preloaded": preloaded, "failed": failed}) + "\n")
+    replies.flush()
+
+    for line in requests:
+        request = json.loads(line)
+        out_file = open(request["stdout_path"], "wb")
+        err_file = open(request["stderr_path"], "wb")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_out, saved_err = os.dup(1), os.dup(2)
+        os.dup2(out_file.fileno(), 1)
+        os.dup2(err_file.fileno(), 2)
+        return_code = 0
+        sys.argv = ["<string>"]
+        try:
+            exec(compile(request["code"], "<string>", "exec"), {"__name__": "__main__"})
+        except SystemExit as e:
+            if e.code is None:
+                return_code = 0
+            elif isinstance(e.code, int):
+                return_code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                return_code = 1
+        except BaseException as e:
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            return_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_out, 1)
+            os.dup2(saved_err, 2)
+            os.close(saved_out)
+            os.close(saved_err)
+            out_file.close()
+            err_file.close()
+
+        # Undo state a fresh interpreter would not carry over; modules imported
+        # from the workspace are dropped so edited files are re-imported
+        os.chdir(workspace)
+        sys.path[:] = baseline_path
+        os.environ.clear()
+        os.environ.update(baseline_environ)
+        workspace_prefix = os.path.join(workspace, "")
+        for name, module in list(sys.modules.items()):
+            module_file = getattr(module, "__file__", None)
+            if module_file and os.path.abspath(module_file).startswith(workspace_prefix):
+                del sys.modules[name]
+
+        replies.write(json.dumps({"return_code": return_code}) + "\n")
+        replies.flush()
+
+main()
+"""
+
+
+class PythonWorkerUnavailable(RuntimeError):
+    """No worker could take the task; the code has not been run"""
+
+
+def _read_capture_file(path: str, limit: int) -> Tuple[str, int]:
+    """Text of a capture file, capped at limit bytes, and its full size"""
+    with open(path, "rb") as f:
+        data = f.read(limit)
+        total = f.seek(0, 2)
+    return data.decode("utf-8", errors="replace"), total
+
+
+class PythonWorker:
+    """One warm interpreter running PYTHON_WORKER_SCRIPT in its own process group"""
+
+    def __init__(self, process: asyncio.subprocess.Process, ready_info: Dict[str, Any]):
+        self.process = process
+        self.ready_info = ready_info
+        self.tasks_completed = 0
+
+    @classmethod
+    async def start(cls, workspace: Path, preload_modules: List[str]) -> "PythonWorker":
+        if os.name == "nt":
+            group_options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group_options = {"start_new_session": True}
+        config = {"preload": preload_modules}
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-c",
+                PYTHON_WORKER_SCRIPT,
+                json.dumps(config),
+                cwd=workspace,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                **group_options,
+            )
+        except OSError as e:
+            raise PythonWorkerUnavailable(f"Python worker failed to start: {e}")
+        worker = cls(process, {})
+        try:
+            line = await asyncio.wait_for(
+                process.stdout.readline(), PYTHON_WORKER_STARTUP_TIMEOUT
+            )
+            worker.ready_info = json.loads(line)
+        except asyncio.CancelledError:
+            worker.kill()
+            raise
+        except Exception:
+            worker.kill()
+            raise PythonWorkerUnavailable("Python worker failed to start")
+        return worker
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    def kill(self):
+        _kill_process_group(self.process)
+
+    async def _terminate(self):
+        """Stop the worker the way run_subprocess stops a timed-out process"""
+        _kill_process_group(self.process, getattr(signal, "SIGTERM", None))
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(self.process.wait()), EXECUTION_KILL_GRACE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+        self.kill()
+        await self.process.wait()
+
+    async def run(self, code: str, timeout: float, output_limit: int) -> Dict[str, Any]:
+        """
+        Run code in the worker; same result fields as run_subprocess
+
+        Raises PythonWorkerUnavailable only when the task could not be handed
+        to the worker. Once it is sent, a timeout or the worker dying is
+        reported in the result with the output captured so far, like a
+        fresh interpreter would, so the code is never run twice.
+        """
+        start_time = time.monotonic()
+        capture_paths = {}
+        try:
+            for stream_name in ("stdout", "stderr"):
+                fd, capture_paths[stream_name] = tempfile.mkstemp(
+                    prefix="deepcode_python_", suffix=f".{stream_name}"
+                )
+                os.close(fd)
+            request = {
+                "code": code,
+                "stdout_path": capture_paths["stdout"],
+                "stderr_path": capture_paths["stderr"],
+            }
+            try:
+                self.process.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+                await self.process.stdin.drain()
+            except ConnectionError as e:
+                self.kill()
+                raise PythonWorkerUnavailable(
+                    f"Python worker is not accepting tasks: {e}"
+                )
+
+            timed_out = False
+            try:
+                line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                await self._terminate()
+                line = b""
+            except asyncio.CancelledError:
+                self.kill()
+                raise
+
+            if line:
+                return_code = json.loads(line)["return_code"]
+                self.tasks_completed += 1
+            elif timed_out:
+                return_code = None
+            else:
+                # The code ended the worker itself (os._exit, crash, signal)
+                await self.process.wait()
+                return_code = self.process.returncode
+
+            stdout, stdout_bytes = _read_capture_file(
+                capture_paths["stdout"], output_limit
+            )
+            stderr, stderr_bytes = _read_capture_file(
+                capture_paths["stderr"], output_limit
+            )
+        finally:
+            for path in capture_paths.values():
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+        return {
+            "return_code": return_code,
+            "stdout": stdout,
+            "stderr": stderr,
+            "timed_out": timed_out,
+            "stdout_bytes": stdout_bytes,
+            "stderr_bytes": stderr_bytes,
+            "output_truncated": stdout_bytes > output_limit
+            or stderr_bytes > output_limit,
+            "duration_seconds": round(time.monotonic() - start_time, 3),
+        }
+
+
+class PythonWorkerPool:
+    """
+    Pre-started worker interpreters for one workspace
+
+    Up to size workers run code concurrently; each is replaced after
+    max_tasks_per_worker runs, on timeout or when it dies.
+    """
+
+    def __init__(
+        self,
+        workspace: Path,
+        size: int,
+        preload_modules: List[str],
+        max_tasks_per_worker: int,
+        output_limit: int = EXECUTION_OUTPUT_LIMIT_BYTES,
+    ):
+        self.workspace = workspace
+        self.size = size
+        self.preload_modules = preload_modules
+        self.max_tasks_per_worker = max(1, max_tasks_per_worker)
+        self.output_limit = output_limit
+        self.idle_workers: List[PythonWorker] = []
+        self.refill_tasks = set()
+        self.semaphore = asyncio.Semaphore(size)
+        self.statistics = {"tasks": 0, "workers_started": 0, "workers_recycled": 0}
+        self.last_ready_info: Dict[str, Any] = {}
+
+    async def _start_worker(self) -> PythonWorker:
+        worker = await PythonWorker.start(self.workspace, self.preload_modules)
+        self.statistics["workers_started"] += 1
+        self.last_ready_info = worker.ready_info
+        return worker
+
+    async def start(self):
+        """Pre-start all workers"""
+        missing = self.size - len(self.idle_workers)
+        workers = await asyncio.gather(
+            *(self._start_worker() for _ in range(missing)), return_exceptions=True
+        )
+        for worker in workers:
+            if isinstance(worker, PythonWorker):
+                self.idle_workers.append(worker)
+            else:
+                logger.warning(f"Failed to start Python worker: {worker}")
+
+    async def _refill(self):
+        try:
+            worker = await self._start_worker()
+        except Exception as e:
+            logger.warning(f"Failed to start Python worker: {e}")
+            return
+        if len(self.idle_workers) < self.size:
+            self.idle_workers.append(worker)
+        else:
+            worker.kill()
+
+    async def execute(self, code: str, timeout: float) -> Dict[str, Any]:
+        async with self.semaphore:
+            worker = None
+            while self.idle_workers and worker is None:
+                candidate = self.idle_workers.pop()
+                if candidate.alive:
+                    worker = candidate
+            if worker is None:
+                worker = await self._start_worker()
+
+            try:
+                result = await worker.run(code, timeout, self.output_limit)
+            except BaseException:
+                worker.kill()
+                raise
+            self.statistics["tasks"] += 1
+
+            if (
+                worker.alive
+                and worker.tasks_completed < self.max_tasks_per_worker
+                and len(self.idle_workers) < self.size
+            ):
+                self.idle_workers.append(worker)
+            else:
+                # Recycled, timed out or crashed: replace it in the background
+                self.statistics["workers_recycled"] += 1
+                worker.kill()
+                refill_task = asyncio.ensure_future(self._refill())
+                self.refill_tasks.add(refill_task)
+                refill_task.add_done_callback(self.refill_tasks.discard)
+            return result
+
+    def shutdown(self):
+        for refill_task in list(self.refill_tasks):
+            refill_task.cancel()
+        for worker in self.idle_workers:
+            worker.kill()
+        self.idle_workers = []
+
+
+PYTHON_WORKER_POOL: PythonWorkerPool = None
+
+
+async def get_python_worker_pool() -> PythonWorkerPool:
+    """Worker pool of the current workspace, or None if the pool is disabled"""
+    global PYTHON_WORKER_POOL
+    if PYTHON_POOL_SIZE <= 0:
+        return None
+    ensure_workspace_exists()
+    if PYTHON_WORKER_POOL is not None and PYTHON_WORKER_POOL.workspace != WORKSPACE_DIR:
+        PYTHON_WORKER_POOL.shutdown()
+        PYTHON_WORKER_POOL = None
+    if PYTHON_WORKER_POOL is None:
+        PYTHON_WORKER_POOL = PythonWorkerPool(
+            WORKSPACE_DIR,
+            PYTHON_POOL_SIZE,
+            PYTHON_POOL_PRELOAD_MODULES,
+            PYTHON_POOL_MAX_TASKS_PER_WORKER,
+        )
+        await PYTHON_WORKER_POOL.start()
+    return PYTHON_WORKER_POOL
+
 
 @mcp.tool()
-async def execute_python(code: str, timeout: int = 30) -> str:
+@profiled_tool
+async def execute_python(
+    code: str, timeout: int = 30, fresh_interpreter: bool = False
+) -> str:
     """
     Execute Python code and return output
 
     Args:
         code: Python code to execute
         timeout: Timeout in seconds
+        fresh_interpreter: Run in a new interpreter even if the warm worker pool is enabled
 
     Returns:
         JSON string of execution result
     """
     try:
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".py", delete=False, encoding="utf-8"
-        ) as f:
-            f.write(code)
-            temp_file = f.name
+        # Ensure workspace directory exists
+        ensure_workspace_exists()
 
-        try:
-            # Ensure workspace directory exists
-            ensure_workspace_exists()
+        result = None
+        execution_mode = "subprocess"
+        pool = None if fresh_interpreter else await get_python_worker_pool()
+        if pool is not None:
+            try:
+                result = await pool.execute(code, timeout)
+                execution_mode = "worker_pool"
+            except PythonWorkerUnavailable as e:
+                # Nothing ran yet, so a new interpreter cannot repeat side effects
+                logger.warning(
+                    f"Python worker pool failed, using a new interpreter: {e}"
+                )
 
-            # Execute Python code
-            result = subprocess.run(
-                [sys.executable, temp_file],
-                cwd=WORKSPACE_DIR,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                encoding="utf-8",
-            )
+        if result is None:
+            # Create temporary file
+            with tempfile.NamedTemporaryFile(
+                mode="w", suffix=".py", delete=False, encoding="utf-8"
+            ) as f:
+                f.write(code)
+                temp_file = f.name
 
-            execution_result = {
-                "status": "success" if result.returncode == 0 else "error",
-                "return_code": result.returncode,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
+            try:
+                # Execute Python code
+                result = await run_subprocess(
+                    sys.executable, [temp_file], timeout=timeout, cwd=WORKSPACE_DIR
+                )
+            finally:
+                # Clean up temporary file
+                os.unlink(temp_file)
+
+        if result["timed_out"]:
+            timeout_result = {
+                "status": "error",
+                "message": f"Python code execution timeout ({timeout}秒)",
                 "timeout": timeout,
+                "execution_mode": execution_mode,
+                **_output_fields(result),
             }
+            log_operation("execute_python_timeout", {"timeout": timeout})
+            return json.dumps(timeout_result, ensure_ascii=False, indent=2)
 
-            if result.returncode != 0:
-                execution_result["message"] = "Python code execution failed"
-            else:
-                execution_result["message"] = "Python code execution successful"
-
-            log_operation(
-                "execute_python",
-                {
-                    "return_code": result.returncode,
-                    "stdout_length": len(result.stdout),
-                    "stderr_length": len(result.stderr),
-                },
-            )
+        execution_result = {
+            "status": "success" if result["return_code"] == 0 else "error",
+            "return_code": result["return_code"],
+            **_output_fields(result),
+            "timeout": timeout,
+            "execution_mode": execution_mode,
+        }
 
-            return json.dumps(execution_result, ensure_ascii=False, indent=2)
+        if result["return_code"] != 0:
+            execution_result["message"] = "Python code execution failed"
+        else:
+            execution_result["message"] = "Python code execution successful"
 
-        finally:
-            # Clean up temporary file
-            os.unlink(temp_file)
+        log_operation(
+            "execute_python",
+            {
+                "return_code": result["return_code"],
+                "stdout_length": result["stdout_bytes"],
+                "stderr_length": result["stderr_bytes"],
+                "duration_seconds": result["duration_seconds"],
+                "execution_mode": execution_mode,
+            },
+        )
 
-    except subprocess.TimeoutExpired:
-        result = {
-            "status": "error",
-            "message": f"Python code execution timeout ({timeout}秒)",
-            "timeout": timeout,
-        }
-        log_operation("execute_python_timeout", {"timeout": timeout})
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return json.dumps(execution_result, ensure_ascii=False, indent=2)
 
     except Exception as e:
         result = {
@@ -764,80 +1651,149 @@ async def execute_python(code: str, timeout: int = 30) -> str:
 
 
 @mcp.tool()
-async def execute_bash(command: str, timeout: int = 30) -> str:
+@profiled_tool
+async def configure_python_worker_pool(
+    pool_size: int = 2, preload_modules: str = "", max_tasks_per_worker: int = 50
+) -> str:
     """
-    Execute bash command
+    Enable, resize or disable the warm Python worker pool used by execute_python
 
     Args:
-        command: Bash command to execute
-        timeout: Timeout in seconds
+        pool_size: Number of warm interpreters (0 disables the pool)
+        preload_modules: Comma-separated modules imported when a worker starts, e.g. "numpy,torch"
+        max_tasks_per_worker: Runs after which a worker is replaced by a fresh one
 
     Returns:
-        JSON string of execution result
+        JSON string of the pool configuration and preload results
     """
+    global \
+        PYTHON_POOL_SIZE, \
+        PYTHON_POOL_PRELOAD_MODULES, \
+        PYTHON_POOL_MAX_TASKS_PER_WORKER
+    global PYTHON_WORKER_POOL
     try:
-        # 安全检查：禁止危险命令
-        dangerous_commands = ["rm -rf", "sudo", "chmod 777", "mkfs", "dd if="]
-        if any(dangerous in command.lower() for dangerous in dangerous_commands):
-            result = {
-                "status": "error",
-                "message": f"Dangerous command execution prohibited: {command}",
-            }
-            log_operation(
-                "execute_bash_blocked",
-                {"command": command, "reason": "dangerous_command"},
-            )
-            return json.dumps(result, ensure_ascii=False, indent=2)
-
-        # Ensure workspace directory exists
-        ensure_workspace_exists()
+        PYTHON_POOL_SIZE = max(0, pool_size)
+        PYTHON_POOL_PRELOAD_MODULES = [
+            name.strip() for name in preload_modules.split(",") if name.strip()
+        ]
+        PYTHON_POOL_MAX_TASKS_PER_WORKER = max(1, max_tasks_per_worker)
+        if PYTHON_WORKER_POOL is not None:
+            PYTHON_WORKER_POOL.shutdown()
+            PYTHON_WORKER_POOL = None
+
+        pool = await get_python_worker_pool()
+        result = {
+            "status": "success",
+            "message": "Python worker pool enabled"
+            if pool
+            else "Python worker pool disabled",
+            "pool_size": PYTHON_POOL_SIZE,
+            "preload_modules": PYTHON_POOL_PRELOAD_MODULES,
+            "max_tasks_per_worker": PYTHON_POOL_MAX_TASKS_PER_WORKER,
+        }
+        if pool is not None:
+            result["workers_ready"] = len(pool.idle_workers)
+            result["preloaded"] = pool.last_ready_info.get("preloaded", [])
+            result["preload_failed"] = pool.last_ready_info.get("failed", {})
+            result["workspace"] = str(pool.workspace)
 
-        # Execute command
-        result = subprocess.run(
-            command,
-            shell=True,
-            cwd=WORKSPACE_DIR,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            encoding="utf-8",
+        log_operation(
+            "configure_python_worker_pool",
+            {
+                "pool_size": PYTHON_POOL_SIZE,
+                "preload_modules": PYTHON_POOL_PRELOAD_MODULES,
+                "max_tasks_per_worker": PYTHON_POOL_MAX_TASKS_PER_WORKER,
+            },
         )
+        return json.dumps(result, ensure_ascii=False, indent=2)
 
-        execution_result = {
-            "status": "success" if result.returncode == 0 else "error",
-            "return_code": result.returncode,
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "command": command,
-            "timeout": timeout,
+    except Exception as e:
+        result = {
+            "status": "error",
+            "message": f"Failed to configure Python worker pool: {str(e)}",
         }
+        log_operation("configure_python_worker_pool_error", {"error": str(e)})
+        return json.dumps(result, ensure_ascii=False, indent=2)
 
-        if result.returncode != 0:
-            execution_result["message"] = "Bash command execution failed"
-        else:
-            execution_result["message"] = "Bash command execution successful"
 
+def _check_dangerous_command(command: str) -> bool:
+    """安全检查：禁止危险命令"""
+    dangerous_commands = ["rm -rf", "sudo", "chmod 777", "mkfs", "dd if="]
+    return any(dangerous in command.lower() for dangerous in dangerous_commands)
+
+
+async def _run_bash_command(command: str, timeout: int) -> Dict[str, Any]:
+    """Run one bash command and build its execution result"""
+    if _check_dangerous_command(command):
         log_operation(
-            "execute_bash",
-            {
-                "command": command,
-                "return_code": result.returncode,
-                "stdout_length": len(result.stdout),
-                "stderr_length": len(result.stderr),
-            },
+            "execute_bash_blocked",
+            {"command": command, "reason": "dangerous_command"},
         )
+        return {
+            "status": "error",
+            "message": f"Dangerous command execution prohibited: {command}",
+        }
 
-        return json.dumps(execution_result, ensure_ascii=False, indent=2)
+    # Ensure workspace directory exists
+    ensure_workspace_exists()
 
-    except subprocess.TimeoutExpired:
-        result = {
+    # Execute command
+    result = await run_subprocess(
+        command, shell=True, timeout=timeout, cwd=WORKSPACE_DIR
+    )
+
+    if result["timed_out"]:
+        log_operation("execute_bash_timeout", {"command": command, "timeout": timeout})
+        return {
             "status": "error",
             "message": f"Bash command execution timeout ({timeout} seconds)",
             "command": command,
             "timeout": timeout,
+            **_output_fields(result),
         }
-        log_operation("execute_bash_timeout", {"command": command, "timeout": timeout})
-        return json.dumps(result, ensure_ascii=False, indent=2)
+
+    execution_result = {
+        "status": "success" if result["return_code"] == 0 else "error",
+        "return_code": result["return_code"],
+        **_output_fields(result),
+        "command": command,
+        "timeout": timeout,
+    }
+
+    if result["return_code"] != 0:
+        execution_result["message"] = "Bash command execution failed"
+    else:
+        execution_result["message"] = "Bash command execution successful"
+
+    log_operation(
+        "execute_bash",
+        {
+            "command": command,
+            "return_code": result["return_code"],
+            "stdout_length": result["stdout_bytes"],
+            "stderr_length": result["stderr_bytes"],
+            "duration_seconds": result["duration_seconds"],
+        },
+    )
+    return execution_result
+
+
+@mcp.tool()
+@profiled_tool
+async def execute_bash(command: str, timeout: int = 30) -> str:
+    """
+    Execute bash command
+
+    Args:
+        command: Bash command to execute
+        timeout: Timeout in seconds
+
+    Returns:
+        JSON string of execution result
+    """
+    try:
+        execution_result = await _run_bash_command(command, timeout)
+        return json.dumps(execution_result, ensure_ascii=False, indent=2)
 
     except Exception as e:
         result = {
@@ -850,6 +1806,102 @@ async def execute_bash(command: str, timeout: int = 30) -> str:
 
 
 @mcp.tool()
+@profiled_tool
+async def execute_multiple_commands(
+    commands: str, timeout: int = 30, max_commands: int = 8
+) -> str:
+    """
+    Execute independent bash commands concurrently (for batch checks)
+
+    Args:
+        commands: JSON array of bash commands, e.g., '["python a.py", "pytest -q tests"]'
+        timeout: Timeout in seconds for each command
+        max_commands: Maximum number of commands in one operation (default: 8)
+
+    Returns:
+        JSON string of execution results in the order of the commands
+    """
+    try:
+        try:
+            command_list = json.loads(commands)
+        except json.JSONDecodeError as e:
+            return json.dumps(
+                {
+                    "status": "error",
+                    "message": f"Invalid JSON format for commands: {str(e)}",
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+
+        if not isinstance(command_list, list) or not all(
+            isinstance(command, str) for command in command_list
+        ):
+            return json.dumps(
+                {
+                    "status": "error",
+                    "message": "commands must be a JSON array of strings",
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+
+        if len(command_list) > max_commands:
+            return json.dumps(
+                {
+                    "status": "error",
+                    "message": f"Too many commands provided ({len(command_list)}), maximum is {max_commands}",
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+
+        start_time = time.monotonic()
+        outcomes = await asyncio.gather(
+            *(_run_bash_command(command, timeout) for command in command_list),
+            return_exceptions=True,
+        )
+
+        results = []
+        for command, outcome in zip(command_list, outcomes):
+            if isinstance(outcome, Exception):
+                outcome = {
+                    "status": "error",
+                    "message": f"Failed to execute bash command: {str(outcome)}",
+                    "command": command,
+                }
+            results.append(outcome)
+
+        successful = sum(1 for outcome in results if outcome["status"] == "success")
+        if successful == len(results):
+            status = "success"
+        elif successful:
+            status = "partial_success"
+        else:
+            status = "error"
+        response = {
+            "status": status,
+            "message": f"{successful}/{len(results)} commands succeeded",
+            "total_duration_seconds": round(time.monotonic() - start_time, 3),
+            "results": results,
+        }
+        log_operation(
+            "execute_multiple_commands",
+            {"commands_count": len(results), "successful": successful},
+        )
+        return json.dumps(response, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        result = {
+            "status": "error",
+            "message": f"Failed to execute commands: {str(e)}",
+        }
+        log_operation("execute_multiple_commands_error", {"error": str(e)})
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+
+@mcp.tool()
+@profiled_tool
 async def read_code_mem(file_paths: List[str]) -> str:
     """
     Check if file summaries exist in implement_code_summary.md for multiple files
@@ -894,11 +1946,10 @@ async def read_code_mem(file_paths: List[str]) -> str:
             )
             return json.dumps(result, ensure_ascii=False, indent=2)
 
-        # Read the summary file
-        with open(summary_file_path, "r", encoding="utf-8") as f:
-            summary_content = f.read()
+        # Index new appends to the summary file instead of re-reading it
+        summary_store = get_code_summary_store(summary_file_path)
 
-        if not summary_content.strip():
+        if summary_store.is_empty():
             result = {
                 "status": "no_summary",
                 "file_paths": unique_file_paths,
@@ -917,9 +1968,7 @@ async def read_code_mem(file_paths: List[str]) -> str:
 
         for file_path in unique_file_paths:
             # Extract file-specific section from summary
-            file_section = _extract_file_section_from_summary(
-                summary_content, file_path
-            )
+            file_section = summary_store.get_file_section(file_path)
 
             if file_section:
                 file_result = {
@@ -983,58 +2032,6 @@ async def read_code_mem(file_paths: List[str]) -> str:
         return json.dumps(result, ensure_ascii=False, indent=2)
 
 
-def _extract_file_section_from_summary(
-    summary_content: str, target_file_path: str
-) -> str:
-    """
-    Extract the specific section for a file from the summary content
-
-    Args:
-        summary_content: Full summary content
-        target_file_path: Path of the target file
-
-    Returns:
-        File-specific section or None if not found
-    """
-    import re
-
-    # Normalize the target path for comparison
-    normalized_target = _normalize_file_path(target_file_path)
-
-    # Pattern to match implementation sections with separator lines
-    section_pattern = r"={80}\s*\n## IMPLEMENTATION File ([^;]+); ROUND \d+\s*\n={80}(.*?)(?=\n={80}|\Z)"
-
-    matches = re.findall(section_pattern, summary_content, re.DOTALL)
-
-    for file_path_in_summary, section_content in matches:
-        file_path_in_summary = file_path_in_summary.strip()
-        section_content = section_content.strip()
-
-        # Normalize the path from summary for comparison
-        normalized_summary_path = _normalize_file_path(file_path_in_summary)
-
-        # Check if paths match using multiple strategies
-        if _paths_match(
-            normalized_target,
-            normalized_summary_path,
-            target_file_path,
-            file_path_in_summary,
-        ):
-            # Return the complete section with proper formatting
-            file_section = f"""================================================================================
-## IMPLEMENTATION File {file_path_in_summary}; ROUND [X]
-================================================================================
-
-{section_content}
-
----
-*Extracted from implement_code_summary.md*"""
-            return file_section
-
-    # If no section-based match, try alternative parsing method
-    return _extract_file_section_alternative(summary_content, target_file_path)
-
-
 def _normalize_file_path(file_path: str) -> str:
     """Normalize file path for comparison"""
     # Remove leading/trailing slashes and convert to lowercase
@@ -1103,56 +2100,482 @@ def _remove_common_prefixes(file_path: str) -> str:
     return path
 
 
-def _extract_file_section_alternative(
-    summary_content: str, target_file_path: str
-) -> str:
-    """Alternative method to extract file section using simpler pattern matching"""
-
-    # Get the basename for fallback matching
-    target_basename = os.path.basename(target_file_path)
-
-    # Split by separator lines to get individual sections
-    sections = summary_content.split("=" * 80)
-
-    for i, section in enumerate(sections):
-        if "## IMPLEMENTATION File" in section:
-            # Extract the file path from the header
-            lines = section.strip().split("\n")
-            for line in lines:
-                if "## IMPLEMENTATION File" in line:
-                    # Extract file path between "File " and "; ROUND"
-                    try:
-                        file_part = line.split("File ")[1].split("; ROUND")[0].strip()
-
-                        # Check if this matches our target
-                        if (
-                            _normalize_file_path(target_file_path)
-                            == _normalize_file_path(file_part)
-                            or target_basename == os.path.basename(file_part)
-                            or target_file_path in file_part
-                            or file_part.endswith(target_file_path)
-                        ):
-                            # Get the next section which contains the content
-                            if i + 1 < len(sections):
-                                content_section = sections[i + 1].strip()
-                                return f"""================================================================================
-## IMPLEMENTATION File {file_part}
+SUMMARY_SEPARATOR = b"=" * 80
+SUMMARY_HEADER_PATTERN = re.compile(
+    rb"={80}\s*\n## IMPLEMENTATION File ([^\n]*?)\s*\n={80}"
+)
+SUMMARY_ROUND_PATTERN = re.compile(r"; ROUND \d+$")
+# Bytes hashed at each end of the indexed region to detect rewrites
+SUMMARY_FINGERPRINT_BYTES = 4096
+
+
+class CodeSummaryStore:
+    """
+    Offset index over implement_code_summary.md
+
+    The memory agent only appends sections to the summary file, so the store
+    keeps the header, file path and content byte range of every section and
+    parses just the bytes appended since the last call. Section contents are
+    read with a single seek. If the file shrinks, is replaced, or its indexed
+    region changes (a revision rewrite), the index is rebuilt from scratch.
+
+    Lookups follow the same matching order as the original full-text parsing:
+    the first "ROUND" section whose path matches wins, otherwise the first
+    section of any kind matched by the looser alternative rules.
+    """
+
+    def __init__(self, summary_path: Path):
+        self.summary_path = Path(summary_path)
+        self.sections: List[Dict[str, Any]] = []
+        self.indexed_size = 0
+        self.file_id = None
+        self.fingerprint = None
+        self.has_text = False
+        # target path -> (sections checked, primary index, alternative index)
+        self.lookup_cache: Dict[str, Tuple[int, Any, Any]] = {}
+        self.statistics = {"full_builds": 0, "incremental_updates": 0}
+
+    def _fingerprint(self, handle, size: int) -> str:
+        handle.seek(0)
+        head = handle.read(min(size, SUMMARY_FINGERPRINT_BYTES))
+        handle.seek(max(0, size - SUMMARY_FINGERPRINT_BYTES))
+        tail = handle.read(min(size, SUMMARY_FINGERPRINT_BYTES))
+        return f"{size}:{hash(head)}:{hash(tail)}"
+
+    def _reset(self):
+        self.sections = []
+        self.indexed_size = 0
+        self.fingerprint = None
+        self.has_text = False
+        self.lookup_cache = {}
+
+    def refresh(self):
+        """Bring the index up to date with the file on disk"""
+        stat = self.summary_path.stat()
+        file_id = (stat.st_dev, stat.st_ino)
+        with open(self.summary_path, "rb") as handle:
+            appended = (
+                file_id == self.file_id
+                and stat.st_size >= self.indexed_size
+                and self.fingerprint == self._fingerprint(handle, self.indexed_size)
+            )
+            if appended and stat.st_size == self.indexed_size:
+                return
+            if appended:
+                self.statistics["incremental_updates"] += 1
+            else:
+                self._reset()
+                self.file_id = file_id
+                self.statistics["full_builds"] += 1
+
+            # Re-parse from the last header: its content may have grown
+            resume_offset = self.sections.pop()["offset"] if self.sections else 0
+            handle.seek(resume_offset)
+            data = handle.read(stat.st_size - resume_offset)
+            self._parse(data, resume_offset)
+            self.has_text = self.has_text or bool(data.strip())
+            self.indexed_size = resume_offset + len(data)
+            self.fingerprint = self._fingerprint(handle, self.indexed_size)
+
+    def _parse(self, data: bytes, base_offset: int):
+        for match in SUMMARY_HEADER_PATTERN.finditer(data):
+            header = match.group(1).decode("utf-8", errors="replace").strip()
+            content_end = data.find(b"\n" + SUMMARY_SEPARATOR, match.end())
+            if content_end < 0:
+                content_end = len(data)
+            self.sections.append(
+                {
+                    "offset": base_offset + match.start(),
+                    "header": header,
+                    "file_path": header.split("; ROUND")[0].strip(),
+                    "round_format": bool(SUMMARY_ROUND_PATTERN.search(header)),
+                    "content_start": base_offset + match.end(),
+                    "content_end": base_offset + content_end,
+                }
+            )
+
+    def is_empty(self) -> bool:
+        self.refresh()
+        return not self.has_text
+
+    def read_section_content(self, section: Dict[str, Any]) -> str:
+        with open(self.summary_path, "rb") as handle:
+            handle.seek(section["content_start"])
+            data = handle.read(section["content_end"] - section["content_start"])
+        return data.decode("utf-8", errors="replace").strip()
+
+    @staticmethod
+    def _primary_match(section: Dict[str, Any], target_file_path: str) -> bool:
+        if not section["round_format"]:
+            return False
+        summary_path = section["file_path"]
+        return _paths_match(
+            _normalize_file_path(target_file_path),
+            _normalize_file_path(summary_path),
+            target_file_path,
+            summary_path,
+        )
+
+    @staticmethod
+    def _alternative_match(section: Dict[str, Any], target_file_path: str) -> bool:
+        file_part = section["file_path"]
+        return (
+            _normalize_file_path(target_file_path) == _normalize_file_path(file_part)
+            or os.path.basename(target_file_path) == os.path.basename(file_part)
+            or target_file_path in file_part
+            or file_part.endswith(target_file_path)
+        )
+
+    def _first_match(self, matcher, target_file_path: str, start: int):
+        for index in range(start, len(self.sections)):
+            if matcher(self.sections[index], target_file_path):
+                return index
+        return None
+
+    def find_section(self, target_file_path: str):
+        """Return (section, matched_by_alternative_rules) or (None, False)"""
+        self.refresh()
+        # Headers never change once written, so only new sections are checked;
+        # indices are cached because the last section is re-parsed as it grows
+        checked, primary, alternative = self.lookup_cache.get(
+            target_file_path, (0, None, None)
+        )
+        if primary is None:
+            primary = self._first_match(self._primary_match, target_file_path, checked)
+        if primary is None and alternative is None:
+            alternative = self._first_match(
+                self._alternative_match, target_file_path, checked
+            )
+        self.lookup_cache[target_file_path] = (len(self.sections), primary, alternative)
+        if primary is not None:
+            return self.sections[primary], False
+        if alternative is not None:
+            return self.sections[alternative], True
+        return None, False
+
+    def get_file_section(self, target_file_path: str) -> str:
+        """Formatted summary section for a file, or None if not found"""
+        section, alternative = self.find_section(target_file_path)
+        if section is None:
+            return None
+        content = self.read_section_content(section)
+        if alternative:
+            return f"""================================================================================
+## IMPLEMENTATION File {section["file_path"]}
 ================================================================================
 
-{content_section}
+{content}
 
 ---
 *Extracted from implement_code_summary.md using alternative method*"""
-                    except (IndexError, AttributeError):
-                        continue
+        return f"""================================================================================
+## IMPLEMENTATION File {section["file_path"]}; ROUND [X]
+================================================================================
 
-    return None
+{content}
+
+---
+*Extracted from implement_code_summary.md*"""
+
+
+CODE_SUMMARY_STORES: Dict[str, CodeSummaryStore] = {}
+
+
+def get_code_summary_store(summary_path: Path) -> CodeSummaryStore:
+    """Get the summary store for a summary file, creating it on first use"""
+    key = str(Path(summary_path).resolve())
+    if key not in CODE_SUMMARY_STORES:
+        CODE_SUMMARY_STORES[key] = CodeSummaryStore(summary_path)
+    return CODE_SUMMARY_STORES[key]
 
 
 # ==================== Code Search Tools ====================
 
 
+# ==================== Code Search Index ====================
+
+# search_code returns at most this many matches and stops scanning once reached
+SEARCH_MAX_MATCHES = 50
+# Larger files are not kept in the index and are always scanned from disk
+SEARCH_INDEX_MAX_FILE_BYTES = 1024 * 1024
+# Memory budget of one index and of all indexes together; least recently used
+# files (and then least recently used indexes) are evicted beyond it
+SEARCH_INDEX_MAX_BYTES = 64 * 1024 * 1024
+SEARCH_INDEXES_MAX_BYTES = 128 * 1024 * 1024
+# Approximate memory of one trigram held in an entry's set
+SEARCH_INDEX_TRIGRAM_BYTES = 64
+REGEX_META_CHARACTERS = set(".^$*+?{}[]\\|()")
+
+
+def _trigrams(text: str) -> set:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _required_regex_literals(pattern: str) -> List[str]:
+    """
+    Literal strings every match of a regex must contain (conservative)
+
+    Only runs of plain or escaped-punctuation characters outside groups and
+    character classes count; a quantifier drops the character before it, and
+    any alternation disables filtering.
+    """
+    literals = []
+    current = []
+    depth = 0
+    index = 0
+
+    def flush():
+        if depth == 0 and len(current) >= 3:
+            literals.append("".join(current))
+        current.clear()
+
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            escaped = pattern[index + 1 : index + 2]
+            if escaped and not escaped.isalnum():
+                current.append(escaped)
+            else:
+                flush()
+            index += 2
+            continue
+        if char == "|":
+            return []
+        if char == "[":
+            flush()
+            index += 1
+            if pattern[index : index + 1] == "^":
+                index += 1
+            if pattern[index : index + 1] == "]":
+                index += 1
+            while index < len(pattern) and pattern[index] != "]":
+                index += 2 if pattern[index] == "\\" else 1
+            index += 1
+            continue
+        if char in "*?{+":
+            # The quantified character may be absent (or repeated)
+            if current:
+                current.pop()
+            flush()
+            if char == "{":
+                closing = pattern.find("}", index)
+                index = closing + 1 if closing != -1 else index + 1
+            else:
+                index += 1
+            continue
+        if char == "(":
+            flush()
+            depth += 1
+        elif char == ")":
+            flush()
+            depth = max(depth - 1, 0)
+        elif char in REGEX_META_CHARACTERS:
+            flush()
+        else:
+            current.append(char)
+        index += 1
+    flush()
+    return literals
+
+
+class WorkspaceSearchIndex:
+    """
+    Trigram index over the text files below one search directory
+
+    Each file's text and lowercase trigrams are kept in memory and refreshed
+    when its mtime/size changes (write_file and write_multiple_files update
+    entries directly). A search only reads files containing every trigram of
+    the pattern's required literals. Entries are kept in least recently used
+    order and evicted beyond SEARCH_INDEX_MAX_BYTES.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.resolved_root = root.resolve()
+        # relative path -> (signature, text, trigrams, bytes); text is None if unreadable
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.total_bytes = 0
+
+    def update_file(self, relative_path: str, content: str, signature: tuple):
+        if len(content) > SEARCH_INDEX_MAX_FILE_BYTES:
+            self.discard(relative_path)
+            return
+        trigrams = _trigrams(content.lower())
+        size = (
+            len(relative_path)
+            + len(content)
+            + SEARCH_INDEX_TRIGRAM_BYTES * len(trigrams)
+        )
+        self._store(relative_path, (signature, content, trigrams, size))
+
+    def _store(self, relative_path: str, entry: tuple):
+        self.discard(relative_path)
+        self.entries[relative_path] = entry
+        self.total_bytes += entry[3]
+        while self.total_bytes > SEARCH_INDEX_MAX_BYTES:
+            self.evict_oldest()
+        _enforce_search_indexes_budget(self)
+
+    def discard(self, relative_path: str):
+        entry = self.entries.pop(relative_path, None)
+        if entry is not None:
+            self.total_bytes -= entry[3]
+
+    def evict_oldest(self) -> int:
+        """Drop the least recently used entry and return the bytes it held"""
+        relative_path, entry = self.entries.popitem(last=False)
+        self.total_bytes -= entry[3]
+        return entry[3]
+
+    def _load(self, file_path: str, relative_path: str) -> tuple:
+        """Cached (text, trigrams) of a file, re-read if it changed; text None if unreadable"""
+        stats = os.stat(file_path)
+        signature = (stats.st_mtime_ns, stats.st_size)
+        entry = self.entries.get(relative_path)
+        if entry is not None and entry[0] == signature:
+            self.entries.move_to_end(relative_path)
+            return entry[1], entry[2]
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                content = f.read()
+        except Exception as e:
+            logger.warning(f"Error searching file {file_path}: {e}")
+            self._store(relative_path, (signature, None, None, len(relative_path)))
+            return None, None
+        if stats.st_size > SEARCH_INDEX_MAX_FILE_BYTES:
+            self.discard(relative_path)
+            return content, None
+        self.update_file(relative_path, content, signature)
+        entry = self.entries.get(relative_path)
+        return content, entry[2] if entry is not None else None
+
+    def search(self, pattern: str, file_pattern: str, use_regex: bool):
+        """
+        Yield matches in file order; the caller stops iterating when it has enough
+
+        Also yields ("file", relative_path, scanned) events so the caller can
+        count files scanned and skipped by the trigram filter.
+        """
+        import glob
+
+        if use_regex:
+            regex = re.compile(pattern)
+            required = (
+                []
+                if regex.flags & re.VERBOSE
+                else [literal.lower() for literal in _required_regex_literals(pattern)]
+            )
+        else:
+            pattern_lower = pattern.lower()
+            required = [pattern_lower] if len(pattern_lower) >= 3 else []
+        required_trigrams = set()
+        for literal in required:
+            required_trigrams |= _trigrams(literal)
+
+        file_paths = glob.glob(str(self.root / "**" / file_pattern), recursive=True)
+        seen = set()
+        for file_path in file_paths:
+            relative_path = os.path.relpath(file_path, self.root)
+            seen.add(relative_path)
+            try:
+                content, trigrams = self._load(file_path, relative_path)
+            except OSError:
+                continue
+            if content is None:
+                continue
+            if trigrams is not None and not required_trigrams <= trigrams:
+                yield ("file", relative_path, False)
+                continue
+            yield ("file", relative_path, True)
+
+            # Same line splitting as readlines(): lines keep their "\n"
+            lines = content.split("\n")
+            last_line = lines.pop()
+            for line_num, line in enumerate(lines, 1):
+                line += "\n"
+                if use_regex:
+                    if regex.search(line):
+                        yield ("match", relative_path, line_num, line.strip(), "regex")
+                elif pattern_lower in line.lower():
+                    yield ("match", relative_path, line_num, line.strip(), "substring")
+            if last_line:
+                line_num = len(lines) + 1
+                if use_regex:
+                    if regex.search(last_line):
+                        yield (
+                            "match",
+                            relative_path,
+                            line_num,
+                            last_line.strip(),
+                            "regex",
+                        )
+                elif pattern_lower in last_line.lower():
+                    yield (
+                        "match",
+                        relative_path,
+                        line_num,
+                        last_line.strip(),
+                        "substring",
+                    )
+
+        # Drop entries of deleted files covered by the searched glob; a
+        # "**/<file_pattern>" glob matches the pattern's trailing path parts
+        for relative_path in list(self.entries):
+            if relative_path not in seen and Path(relative_path).match(file_pattern):
+                if not (self.root / relative_path).exists():
+                    self.discard(relative_path)
+
+
+# Search indexes keyed by search directory, least recently used first
+SEARCH_INDEXES: "OrderedDict[str, WorkspaceSearchIndex]" = OrderedDict()
+
+
+def get_search_index(search_path: Path) -> WorkspaceSearchIndex:
+    search_index = SEARCH_INDEXES.get(str(search_path))
+    if search_index is None:
+        search_index = SEARCH_INDEXES[str(search_path)] = WorkspaceSearchIndex(
+            search_path
+        )
+    SEARCH_INDEXES.move_to_end(str(search_path))
+    return search_index
+
+
+def _enforce_search_indexes_budget(current: WorkspaceSearchIndex):
+    """Evict entries of the least recently used indexes beyond SEARCH_INDEXES_MAX_BYTES"""
+    total_bytes = sum(index.total_bytes for index in SEARCH_INDEXES.values())
+    while total_bytes > SEARCH_INDEXES_MAX_BYTES:
+        oldest_key = next(
+            (key for key, index in SEARCH_INDEXES.items() if index is not current),
+            None,
+        )
+        if oldest_key is None:
+            break
+        oldest = SEARCH_INDEXES[oldest_key]
+        if not oldest.entries:
+            del SEARCH_INDEXES[oldest_key]
+            continue
+        total_bytes -= oldest.evict_oldest()
+
+
+def update_search_indexes(full_path: Path, content: str):
+    """Refresh a written file in every search index that covers it"""
+    if not SEARCH_INDEXES:
+        return
+    try:
+        stats = full_path.stat()
+    except OSError:
+        return
+    signature = (stats.st_mtime_ns, stats.st_size)
+    for search_index in SEARCH_INDEXES.values():
+        try:
+            relative_path = str(full_path.relative_to(search_index.resolved_root))
+        except ValueError:
+            continue
+        search_index.update_file(relative_path, content, signature)
+
+
 @mcp.tool()
+@profiled_tool
 async def search_code(
     pattern: str,
     file_pattern: str = "*.json",
@@ -1194,47 +2617,33 @@ async def search_code(
             }
             return json.dumps(result, ensure_ascii=False, indent=2)
 
-        import glob
-
-        # Get matching files
-        file_paths = glob.glob(str(search_path / "**" / file_pattern), recursive=True)
-
+        # Stream matches from the search index and stop at the match cap
         matches = []
         total_files_searched = 0
+        files_skipped_by_index = 0
+        truncated = False
 
-        for file_path in file_paths:
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-
-                total_files_searched += 1
-                relative_path = os.path.relpath(file_path, search_path)
-
-                for line_num, line in enumerate(lines, 1):
-                    if use_regex:
-                        if re.search(pattern, line):
-                            matches.append(
-                                {
-                                    "file": relative_path,
-                                    "line_number": line_num,
-                                    "line_content": line.strip(),
-                                    "match_type": "regex",
-                                }
-                            )
-                    else:
-                        if pattern.lower() in line.lower():
-                            matches.append(
-                                {
-                                    "file": relative_path,
-                                    "line_number": line_num,
-                                    "line_content": line.strip(),
-                                    "match_type": "substring",
-                                }
-                            )
-
-            except Exception as e:
-                logger.warning(f"Error searching file {file_path}: {e}")
+        for event in get_search_index(search_path).search(
+            pattern, file_pattern, use_regex
+        ):
+            if event[0] == "file":
+                if event[2]:
+                    total_files_searched += 1
+                else:
+                    files_skipped_by_index += 1
                 continue
+            if len(matches) >= SEARCH_MAX_MATCHES:
+                truncated = True
+                break
+            _, relative_path, line_num, line_content, match_type = event
+            matches.append(
+                {
+                    "file": relative_path,
+                    "line_number": line_num,
+                    "line_content": line_content,
+                    "match_type": match_type,
+                }
+            )
 
         result = {
             "status": "success",
@@ -1244,11 +2653,15 @@ async def search_code(
             "search_directory": str(search_path),
             "total_matches": len(matches),
             "total_files_searched": total_files_searched,
-            "matches": matches[:50],  # 限制返回前50个匹配
+            "files_skipped_by_index": files_skipped_by_index,
+            "truncated": truncated,
+            "matches": matches,
         }
 
-        if len(matches) > 50:
-            result["note"] = f"显示前50个匹配，总共找到{len(matches)}个匹配"
+        if truncated:
+            result["note"] = (
+                f"显示前{SEARCH_MAX_MATCHES}个匹配，搜索已提前停止，可能还有更多匹配"
+            )
 
         log_operation(
             "search_code",
@@ -1259,6 +2672,8 @@ async def search_code(
                 "search_directory": str(search_path),
                 "total_matches": len(matches),
                 "files_searched": total_files_searched,
+                "files_skipped_by_index": files_skipped_by_index,
+                "truncated": truncated,
             },
         )
 
@@ -1278,6 +2693,7 @@ async def search_code(
 
 
 @mcp.tool()
+@profiled_tool
 async def get_file_structure(directory: str = ".", max_depth: int = 5) -> str:
     """
     Get directory file structure
@@ -1393,6 +2809,7 @@ async def get_file_structure(directory: str = ".", max_depth: int = 5) -> str:
 
 
 @mcp.tool()
+@profiled_tool
 async def set_workspace(workspace_path: str) -> str:
     """
     Set workspace directory
@@ -1447,29 +2864,123 @@ async def set_workspace(workspace_path: str) -> str:
         return json.dumps(result, ensure_ascii=False, indent=2)
 
 
+def _parse_history_time(value: str) -> datetime:
+    """
+    Parse an ISO timestamp as naive local time; empty values disable the filter
+
+    Log timestamps are naive local time, so timezone-aware values (e.g. with a
+    "Z" or "+00:00" suffix) are converted to local time before dropping tzinfo.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _operation_matches(
+    entry: Dict[str, Any], action: str, since: datetime, until: datetime
+) -> bool:
+    """Check one history entry against the action pattern and time window"""
+    if action and not fnmatch.fnmatchcase(entry.get("action", ""), action):
+        return False
+    if since or until:
+        try:
+            timestamp = _parse_history_time(entry["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        if since and timestamp < since:
+            return False
+        if until and timestamp > until:
+            return False
+    return True
+
+
+def _read_operation_log(
+    log_path: Path, last_n: int, action: str, since: datetime, until: datetime
+) -> tuple:
+    """Stream the JSONL log and keep only the last N matching records"""
+    matched = deque(maxlen=last_n) if last_n > 0 else []
+    total = 0
+    with open(log_path, "r", encoding="utf-8") as log_file:
+        for line in log_file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            # Tool call profiling records are only returned when asked for explicitly
+            if entry.get("action") == "tool_call" and action != "tool_call":
+                continue
+            total += 1
+            if _operation_matches(entry, action, since, until):
+                matched.append(entry)
+    return list(matched), total
+
+
 @mcp.tool()
-async def get_operation_history(last_n: int = 10) -> str:
+@profiled_tool
+async def get_operation_history(
+    last_n: int = 10,
+    action: str = "",
+    since: str = "",
+    until: str = "",
+    source: str = "memory",
+    include_metrics: bool = False,
+) -> str:
     """
     Get operation history
 
     Args:
-        last_n: Return the last N operations
+        last_n: Return the last N operations (0 returns every matching operation)
+        action: Only return operations whose action matches this name or glob pattern
+        since: Only return operations at or after this ISO timestamp
+        until: Only return operations at or before this ISO timestamp
+        source: "memory" for the recent in-memory buffer, "log" for the full persisted log
+        include_metrics: Include per-tool latency and payload size statistics
 
     Returns:
         JSON string of operation history
     """
     try:
-        recent_history = (
-            OPERATION_HISTORY[-last_n:] if last_n > 0 else OPERATION_HISTORY
-        )
+        since_time = _parse_history_time(since)
+        until_time = _parse_history_time(until)
+
+        if source == "log":
+            log_path = get_operation_log_path()
+            if log_path is None or not log_path.exists():
+                raise FileNotFoundError("Operation log has not been created yet")
+            recent_history, total_operations = _read_operation_log(
+                log_path, last_n, action, since_time, until_time
+            )
+        elif source == "memory":
+            if action or since_time or until_time:
+                matched = [
+                    entry
+                    for entry in OPERATION_HISTORY
+                    if _operation_matches(entry, action, since_time, until_time)
+                ]
+            else:
+                matched = list(OPERATION_HISTORY)
+            recent_history = matched[-last_n:] if last_n > 0 else matched
+            total_operations = OPERATION_COUNT
+        else:
+            raise ValueError(f"Unknown history source: {source}")
 
+        log_path = get_operation_log_path()
         result = {
             "status": "success",
-            "total_operations": len(OPERATION_HISTORY),
+            "total_operations": total_operations,
             "returned_operations": len(recent_history),
+            "retained_in_memory": len(OPERATION_HISTORY),
+            "history_limit": OPERATION_HISTORY.maxlen,
+            "source": source,
+            "log_file": str(log_path) if log_path else None,
             "workspace": str(WORKSPACE_DIR) if WORKSPACE_DIR else None,
             "history": recent_history,
         }
+        if include_metrics:
+            result["tool_metrics"] = summarize_tool_metrics()
 
         return json.dumps(result, ensure_ascii=False, indent=2)
 
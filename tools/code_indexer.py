@@ -13,19 +13,38 @@ Features:
 - Automatic LLM provider selection based on API key availability
 """
 
+import ast
 import asyncio
+import contextvars
+import hashlib
 import json
 import logging
 import os
 import re
+import sqlite3
+import time
 from datetime import datetime
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Any
+from dataclasses import dataclass, asdict, field
+from typing import List, Dict, Any, Optional
 
 # MCP Agent imports for LLM
 from utils.llm_utils import get_preferred_llm_class, get_default_models
 
+# Bump when the file analysis or relationship prompts change so that
+# persistently cached LLM results from older prompts are not reused
+ANALYSIS_PROMPT_VERSION = "1.1"
+
+# Summary of files whose LLM response could not be parsed; like "error" file
+# types these results are never reused, so the file is analyzed again next run
+ANALYSIS_FAILED_SUMMARY = "File analysis failed - JSON parsing error"
+
+# Progress and counters of the repository being processed. Each repository task
+# gets its own value so parallel repositories do not mix their statistics.
+_REPO_PROGRESS: contextvars.ContextVar = contextvars.ContextVar(
+    "code_indexer_repo_progress", default=None
+)
+
 
 @dataclass
 class FileRelationship:
@@ -63,6 +82,936 @@ class RepoIndex:
     file_summaries: List[FileSummary]
     relationships: List[FileRelationship]
     analysis_metadata: Dict[str, Any]
+    import_graph: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class AnalysisCache:
+    """
+    Persistent SQLite cache for LLM analysis results
+
+    Entries are keyed by the SHA-256 of the file content plus a fingerprint of the
+    prompt/model settings, so results carry over across runs, repositories and papers.
+    Eviction is least-recently-used once max_entries is exceeded.
+    """
+
+    def __init__(self, db_path: Path, max_entries: int = 20000):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON analysis_cache(last_access)"
+        )
+        self.conn.commit()
+
+        self.stats = {
+            "summary_hits": 0,
+            "summary_misses": 0,
+            "relationship_hits": 0,
+            "relationship_misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    @staticmethod
+    def make_key(kind: str, content_hash: str, fingerprint: str) -> str:
+        """Build the cache key for a content hash and prompt/model fingerprint"""
+        return f"{kind}:{content_hash}:{fingerprint}"
+
+    def get(self, kind: str, cache_key: str) -> Optional[Any]:
+        """Return the cached payload for a key, or None on a miss"""
+        row = self.conn.execute(
+            "SELECT payload FROM analysis_cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+
+        stat_prefix = "summary" if kind == "summary" else "relationship"
+        if row is None:
+            self.stats[f"{stat_prefix}_misses"] += 1
+            return None
+
+        self.stats[f"{stat_prefix}_hits"] += 1
+        self.conn.execute(
+            "UPDATE analysis_cache SET last_access = ? WHERE cache_key = ?",
+            (time.time(), cache_key),
+        )
+        self.conn.commit()
+        return json.loads(row[0])
+
+    def put(self, kind: str, cache_key: str, payload: Any):
+        """Store a payload and evict least recently used entries if over capacity"""
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO analysis_cache "
+            "(cache_key, kind, payload, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (cache_key, kind, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        self.stats["writes"] += 1
+        self._evict_if_needed()
+        self.conn.commit()
+
+    def _evict_if_needed(self):
+        """Keep the number of entries within max_entries (LRU eviction)"""
+        total_entries = self.conn.execute(
+            "SELECT COUNT(*) FROM analysis_cache"
+        ).fetchone()[0]
+        excess_count = total_entries - self.max_entries
+        if excess_count <= 0:
+            return
+
+        self.conn.execute(
+            "DELETE FROM analysis_cache WHERE cache_key IN ("
+            "SELECT cache_key FROM analysis_cache ORDER BY last_access ASC LIMIT ?)",
+            (excess_count,),
+        )
+        self.stats["evictions"] += excess_count
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Return hit/miss statistics for reporting"""
+        total_entries = self.conn.execute(
+            "SELECT COUNT(*) FROM analysis_cache"
+        ).fetchone()[0]
+        lookups = sum(
+            self.stats[key]
+            for key in (
+                "summary_hits",
+                "summary_misses",
+                "relationship_hits",
+                "relationship_misses",
+            )
+        )
+        hits = self.stats["summary_hits"] + self.stats["relationship_hits"]
+
+        return {
+            "cache_path": str(self.db_path),
+            "max_entries": self.max_entries,
+            "total_entries": total_entries,
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0,
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class LLMRateLimiter:
+    """
+    Shared limiter for LLM calls
+
+    Combines requests-per-minute and tokens-per-minute token buckets with an
+    AIMD concurrency limit: the limit grows additively while calls succeed and
+    is cut multiplicatively on rate-limit (429) or timeout errors.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        initial_concurrency: int = 5,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        backoff_factor: float = 0.5,
+        throttle_cooldown: float = 5.0,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.concurrency_limit = float(
+            min(max(initial_concurrency, self.min_concurrency), self.max_concurrency)
+        )
+        self.backoff_factor = backoff_factor
+        self.throttle_cooldown = throttle_cooldown
+
+        # Buckets start full so the first minute is not artificially slow
+        self._request_bucket = float(requests_per_minute or 0)
+        self._token_bucket = float(tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._condition = None
+        self._condition_loop = None
+
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "failed": 0,
+            "total_wait_seconds": 0.0,
+            "peak_in_flight": 0,
+            "peak_concurrency_limit": self.concurrency_limit,
+        }
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Get the condition for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+            self._in_flight = 0
+        return self._condition
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_bucket = min(
+                float(self.requests_per_minute),
+                self._request_bucket + elapsed * self.requests_per_minute / 60.0,
+            )
+        if self.tokens_per_minute:
+            self._token_bucket = min(
+                float(self.tokens_per_minute),
+                self._token_bucket + elapsed * self.tokens_per_minute / 60.0,
+            )
+
+    async def _wait_for_budget(self, estimated_tokens: int):
+        # Requests larger than the whole bucket only wait for a full bucket
+        if self.tokens_per_minute:
+            estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+
+        while True:
+            self._refill()
+            wait_time = self._paused_until - time.monotonic()
+            if self.requests_per_minute and self._request_bucket < 1:
+                wait_time = max(
+                    wait_time,
+                    (1 - self._request_bucket) * 60.0 / self.requests_per_minute,
+                )
+            if self.tokens_per_minute and self._token_bucket < estimated_tokens:
+                wait_time = max(
+                    wait_time,
+                    (estimated_tokens - self._token_bucket)
+                    * 60.0
+                    / self.tokens_per_minute,
+                )
+
+            if wait_time <= 0:
+                if self.requests_per_minute:
+                    self._request_bucket -= 1
+                if self.tokens_per_minute:
+                    self._token_bucket -= estimated_tokens
+                return
+
+            self.stats["total_wait_seconds"] += wait_time
+            await asyncio.sleep(wait_time)
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """Wait for a concurrency slot and enough request/token budget"""
+        condition = self._get_condition()
+        async with condition:
+            while self._in_flight >= int(self.concurrency_limit):
+                await condition.wait()
+            self._in_flight += 1
+            self.stats["peak_in_flight"] = max(
+                self.stats["peak_in_flight"], self._in_flight
+            )
+
+        try:
+            await self._wait_for_budget(estimated_tokens)
+        except BaseException:
+            await self.release(estimated_tokens, succeeded=False)
+            raise
+
+        self.stats["requests"] += 1
+
+    async def release(
+        self,
+        estimated_tokens: int = 0,
+        actual_tokens: Optional[int] = None,
+        succeeded: bool = True,
+        throttled: bool = False,
+        retry_after: Optional[float] = None,
+    ):
+        """Release a slot and adjust the concurrency limit from the call outcome"""
+        # Settle the token bucket against the usage reported by the provider
+        if self.tokens_per_minute and actual_tokens is not None:
+            self._token_bucket = min(
+                float(self.tokens_per_minute),
+                self._token_bucket + estimated_tokens - actual_tokens,
+            )
+
+        if throttled:
+            self.stats["throttled"] += 1
+            self.concurrency_limit = max(
+                float(self.min_concurrency),
+                self.concurrency_limit * self.backoff_factor,
+            )
+            self._paused_until = max(
+                self._paused_until,
+                time.monotonic() + (retry_after or self.throttle_cooldown),
+            )
+        elif succeeded:
+            self.concurrency_limit = min(
+                float(self.max_concurrency),
+                self.concurrency_limit + 1.0 / self.concurrency_limit,
+            )
+            self.stats["peak_concurrency_limit"] = max(
+                self.stats["peak_concurrency_limit"], self.concurrency_limit
+            )
+        else:
+            self.stats["failed"] += 1
+
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            condition.notify_all()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get limiter statistics"""
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "current_concurrency_limit": round(self.concurrency_limit, 2),
+            "min_concurrency": self.min_concurrency,
+            "max_concurrency": self.max_concurrency,
+            **{
+                key: round(value, 2) if isinstance(value, float) else value
+                for key, value in self.stats.items()
+            },
+        }
+
+
+class StaticCodeAnalyzer:
+    """
+    Deterministic extraction of file facts that do not need an LLM
+
+    Python files are parsed with ``ast``; other source languages use lightweight
+    regex patterns. Structured non-source files (configuration/data) are
+    summarized from their top-level keys.
+    """
+
+    LANGUAGE_NAMES = {
+        ".py": "Python module",
+        ".js": "JavaScript module",
+        ".ts": "TypeScript module",
+        ".java": "Java source file",
+        ".cpp": "C++ source file",
+        ".c": "C source file",
+        ".h": "C header file",
+        ".hpp": "C++ header file",
+        ".cs": "C# source file",
+        ".php": "PHP script",
+        ".rb": "Ruby script",
+        ".go": "Go source file",
+        ".rs": "Rust source file",
+        ".scala": "Scala source file",
+        ".kt": "Kotlin source file",
+        ".swift": "Swift source file",
+        ".r": "R script",
+        ".sql": "SQL script",
+        ".sh": "Shell script",
+        ".bat": "Batch script",
+        ".ps1": "PowerShell script",
+    }
+
+    NON_SOURCE_NAMES = {
+        ".yaml": "YAML configuration",
+        ".yml": "YAML configuration",
+        ".json": "JSON data file",
+        ".xml": "XML document",
+        ".toml": "TOML configuration",
+    }
+
+    # (definition patterns, import patterns) per extension
+    SOURCE_PATTERNS = {
+        ".js": (
+            [
+                r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)",
+                r"^\s*(?:export\s+)?(?:default\s+)?class\s+(\w+)",
+                r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>",
+            ],
+            [
+                r"^\s*import\s+(?:[^'\"]*?\s+from\s+)?['\"]([^'\"]+)['\"]",
+                r"require\(\s*['\"]([^'\"]+)['\"]\s*\)",
+            ],
+        ),
+        ".java": (
+            [r"\b(?:class|interface|enum|record)\s+(\w+)"],
+            [r"^\s*import\s+(?:static\s+)?([\w.]+)"],
+        ),
+        ".kt": (
+            [r"\b(?:class|interface|object)\s+(\w+)", r"^\s*(?:\w+\s+)*fun\s+(\w+)"],
+            [r"^\s*import\s+([\w.]+)"],
+        ),
+        ".scala": (
+            [r"\b(?:class|trait|object)\s+(\w+)", r"^\s*def\s+(\w+)"],
+            [r"^\s*import\s+([\w.]+)"],
+        ),
+        ".go": (
+            [
+                r"^func\s+(?:\([^)]*\)\s*)?(\w+)",
+                r"^type\s+(\w+)\s+(?:struct|interface)",
+            ],
+            [
+                r"^\s*import\s+(?:\w+\s+)?\"([^\"]+)\"",
+                r"^\s+(?:\w+\s+)?\"([^\"]+)\"\s*$",
+            ],
+        ),
+        ".c": (
+            [
+                r"^(?:[\w*]+\s+)+\**(\w+)\s*\([^;]*$",
+                r"^\s*(?:typedef\s+)?struct\s+(\w+)",
+            ],
+            [r"^\s*#\s*include\s*[<\"]([^>\"]+)[>\"]"],
+        ),
+        ".cpp": (
+            [
+                r"^\s*(?:class|struct)\s+(\w+)",
+                r"^(?:[\w:<>*&]+\s+)+\**([\w:]+)\s*\([^;]*$",
+            ],
+            [r"^\s*#\s*include\s*[<\"]([^>\"]+)[>\"]"],
+        ),
+        ".cs": (
+            [r"\b(?:class|interface|struct|enum|record)\s+(\w+)"],
+            [r"^\s*using\s+([\w.]+)\s*;"],
+        ),
+        ".php": (
+            [r"^\s*(?:abstract\s+|final\s+)?class\s+(\w+)", r"\bfunction\s+(\w+)"],
+            [
+                r"^\s*use\s+([\w\\\\]+)",
+                r"\b(?:require|include)(?:_once)?\s*\(?\s*['\"]([^'\"]+)['\"]",
+            ],
+        ),
+        ".rb": (
+            [r"^\s*(?:class|module)\s+([\w:]+)", r"^\s*def\s+(?:self\.)?(\w+[?!]?)"],
+            [r"^\s*require(?:_relative)?\s+['\"]([^'\"]+)['\"]"],
+        ),
+        ".rs": (
+            [
+                r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?fn\s+(\w+)",
+                r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait)\s+(\w+)",
+            ],
+            [r"^\s*(?:pub\s+)?use\s+([\w:]+)", r"^\s*extern\s+crate\s+(\w+)"],
+        ),
+        ".swift": (
+            [r"\b(?:class|struct|protocol|enum)\s+(\w+)", r"\bfunc\s+(\w+)"],
+            [r"^\s*import\s+(\w+)"],
+        ),
+        ".r": (
+            [r"^\s*([\w.]+)\s*(?:<-|=)\s*function\b"],
+            [r"\b(?:library|require)\(\s*['\"]?([\w.]+)['\"]?\s*\)"],
+        ),
+        ".sh": (
+            [r"^\s*(?:function\s+)?([\w-]+)\s*\(\)\s*\{?"],
+            [r"^\s*(?:source|\.)\s+(\S+)"],
+        ),
+        ".ps1": (
+            [r"^\s*function\s+([\w-]+)"],
+            [r"^\s*Import-Module\s+(\S+)", r"^\s*\.\s+(\S+\.ps1)"],
+        ),
+    }
+    SOURCE_PATTERNS[".ts"] = SOURCE_PATTERNS[".js"]
+    SOURCE_PATTERNS[".h"] = SOURCE_PATTERNS[".c"]
+    SOURCE_PATTERNS[".hpp"] = SOURCE_PATTERNS[".cpp"]
+
+    # Keywords the C-family definition patterns would otherwise pick up
+    _NON_DEFINITION_NAMES = {"if", "for", "while", "switch", "return", "sizeof", "else"}
+
+    def __init__(self, max_items: int = 50):
+        self.max_items = max_items
+        self._compiled_patterns = {
+            extension: (
+                [re.compile(p, re.MULTILINE) for p in definition_patterns],
+                [re.compile(p, re.MULTILINE) for p in import_patterns],
+            )
+            for extension, (
+                definition_patterns,
+                import_patterns,
+            ) in self.SOURCE_PATTERNS.items()
+        }
+
+    def is_non_source(self, file_path: str) -> bool:
+        """Check if a file is a configuration/data file rather than source code"""
+        return Path(file_path).suffix.lower() in self.NON_SOURCE_NAMES
+
+    def analyze(self, file_path: str, content: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract file_type, main_functions and dependencies from source code
+
+        Returns:
+            Extracted facts, or None if the language is not supported or the
+            file could not be parsed
+        """
+        extension = Path(file_path).suffix.lower()
+        if extension == ".py":
+            return self._analyze_python(content)
+
+        patterns = self._compiled_patterns.get(extension)
+        if patterns is None:
+            return None
+
+        definition_patterns, import_patterns = patterns
+        definitions = [
+            name
+            for pattern in definition_patterns
+            for name in pattern.findall(content)
+            if name not in self._NON_DEFINITION_NAMES
+        ]
+        imports = [
+            name for pattern in import_patterns for name in pattern.findall(content)
+        ]
+        return {
+            "file_type": self.LANGUAGE_NAMES.get(extension, f"{extension} file"),
+            "main_functions": self._unique(definitions),
+            "dependencies": self._unique(imports),
+        }
+
+    def _analyze_python(self, content: str) -> Optional[Dict[str, Any]]:
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return None
+
+        definitions = []
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                definitions.append(node.name)
+
+        dependencies = []
+        for module, level, names in self.python_imports(tree):
+            if module:
+                dependencies.append("." * level + module)
+            else:
+                dependencies.extend("." * level + name for name in names)
+
+        return {
+            "file_type": self.LANGUAGE_NAMES[".py"],
+            "main_functions": self._unique(definitions),
+            "dependencies": self._unique(dependencies),
+        }
+
+    @staticmethod
+    def python_imports(tree: ast.AST) -> List[tuple]:
+        """Collect (module, relative level, imported names) for all imports in a Python AST"""
+        imports = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                imports.extend((alias.name, 0, []) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                imports.append(
+                    (
+                        node.module or "",
+                        node.level,
+                        [alias.name for alias in node.names if alias.name != "*"],
+                    )
+                )
+        return imports
+
+    def build_import_graph(self, python_files: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        Resolve imports between the Python files of one repository
+
+        Args:
+            python_files: Mapping of repository-relative path to file content
+
+        Returns:
+            Mapping of file path to the repository files it imports
+        """
+        module_paths = {}
+        suffix_paths = {}
+        for path in python_files:
+            parts = list(Path(path).with_suffix("").parts)
+            if parts and parts[-1] == "__init__":
+                parts = parts[:-1]
+            if not parts:
+                continue
+            module_paths[".".join(parts)] = path
+            # Allow absolute imports rooted below the repository root (e.g. src/)
+            for i in range(1, len(parts)):
+                suffix_paths.setdefault(".".join(parts[i:]), []).append(path)
+
+        def resolve_absolute(module_name: str) -> Optional[str]:
+            if module_name in module_paths:
+                return module_paths[module_name]
+            candidates = suffix_paths.get(module_name, [])
+            return candidates[0] if len(candidates) == 1 else None
+
+        import_graph = {}
+        for path, content in python_files.items():
+            try:
+                tree = ast.parse(content)
+            except (SyntaxError, ValueError):
+                continue
+
+            package_parts = list(Path(path).parent.parts)
+            imported_paths = set()
+            for module, level, names in self.python_imports(tree):
+                if level:
+                    if level - 1 > len(package_parts):
+                        continue
+                    base_parts = package_parts[: len(package_parts) - (level - 1)]
+                    prefix = ".".join(base_parts + ([module] if module else []))
+                    resolve = module_paths.get
+                else:
+                    prefix = module
+                    resolve = resolve_absolute
+
+                # "from pkg import name" may import the submodule pkg.name
+                candidates = [f"{prefix}.{name}" if prefix else name for name in names]
+                candidates.append(prefix)
+                for candidate in candidates:
+                    imported_path = resolve(candidate) if candidate else None
+                    if imported_path and imported_path != path:
+                        imported_paths.add(imported_path)
+
+            if imported_paths:
+                import_graph[path] = sorted(imported_paths)
+
+        return import_graph
+
+    def analyze_non_source(self, file_path: str, content: str) -> Dict[str, Any]:
+        """Summarize a configuration/data file from its top-level structure"""
+        extension = Path(file_path).suffix.lower()
+        file_type = self.NON_SOURCE_NAMES.get(extension, f"{extension} file")
+        top_level_keys = []
+        try:
+            if extension in (".yaml", ".yml"):
+                import yaml
+
+                data = yaml.safe_load(content)
+            elif extension == ".json":
+                data = json.loads(content)
+            elif extension == ".toml":
+                import tomllib
+
+                data = tomllib.loads(content)
+            else:
+                import xml.etree.ElementTree as ElementTree
+
+                root = ElementTree.fromstring(content)
+                data = {root.tag: None, **{child.tag: None for child in root}}
+            if isinstance(data, dict):
+                top_level_keys = [str(key) for key in data.keys()]
+        except Exception:
+            top_level_keys = re.findall(
+                r"^([A-Za-z_][\w.-]*)\s*[:=]", content, re.MULTILINE
+            )
+
+        top_level_keys = self._unique(top_level_keys)
+        if top_level_keys:
+            summary = f"{file_type} defining: {', '.join(top_level_keys[:15])}"
+            if len(top_level_keys) > 15:
+                summary += f" and {len(top_level_keys) - 15} more keys"
+        else:
+            summary = f"{file_type} without top-level keys"
+
+        return {
+            "file_type": file_type,
+            "main_functions": [],
+            "key_concepts": top_level_keys,
+            "dependencies": [],
+            "summary": summary + ".",
+        }
+
+    def _unique(self, items) -> List[str]:
+        return list(dict.fromkeys(item for item in items if item))[: self.max_items]
+
+
+class RelationshipPreScorer:
+    """
+    Cheap local estimate of how likely a file relates to the target structure
+
+    File names, directory names, symbols and key concepts are matched against
+    the file names, directories and comments parsed from the target structure.
+    Files scoring below the configured threshold skip the LLM relationship call.
+    """
+
+    STOPWORDS = set(
+        "the and for with from into this that file files src lib init main "
+        "project module modules code test tests implementation txt".split()
+    )
+
+    TREE_CHARS = "│├└─┬┼|`+ \t"
+
+    def __init__(self, target_structure: str):
+        self.target_structure = target_structure
+        self.target_stems = set()
+        self.target_tokens = set()
+
+        for line in (target_structure or "").splitlines():
+            entry, _, comment = line.partition("#")
+            entry = entry.strip(self.TREE_CHARS).strip()
+            if entry:
+                name = entry.rstrip("/").split("/")[-1]
+                stem = Path(name).stem.lower()
+                if "." in name and stem:
+                    self.target_stems.add(stem)
+                self.target_tokens.update(self.tokenize(entry))
+            self.target_tokens.update(self.tokenize(comment))
+
+    @classmethod
+    def tokenize(cls, text: str) -> set:
+        """Split camelCase/snake_case identifiers and text into lowercase tokens"""
+        tokens = set()
+        for word in re.findall(r"[A-Za-z0-9]+", text or ""):
+            for token in re.findall(
+                r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+", word
+            ):
+                token = token.lower()
+                if len(token) < 3 or token in cls.STOPWORDS or token.isdigit():
+                    continue
+                tokens.add(token)
+                # Crude singularization so "layers" matches "layer"
+                if len(token) > 4 and token.endswith("s"):
+                    tokens.add(token[:-1])
+        return tokens
+
+    def score(self, file_path: str, symbols: List[str]) -> float:
+        """Score a file path and its symbols/concepts against the target structure (0.0 to 1.0)"""
+        if not self.target_tokens:
+            return 1.0
+
+        # The first path component is the repository name
+        path = Path(file_path)
+        directories = path.parent.parts[1:]
+        stem = path.stem.lower()
+
+        stem_tokens = self.tokenize(path.stem)
+        if stem in self.target_stems:
+            name_score = 1.0
+        elif stem_tokens:
+            name_score = len(stem_tokens & self.target_tokens) / len(stem_tokens)
+        else:
+            name_score = 0.0
+
+        directory_tokens = self.tokenize(" ".join(directories))
+        directory_score = (
+            len(directory_tokens & self.target_tokens) / len(directory_tokens)
+            if directory_tokens
+            else 0.0
+        )
+
+        symbol_tokens = self.tokenize(" ".join(symbols))
+        symbol_score = min(1.0, len(symbol_tokens & self.target_tokens) / 3)
+
+        return round(0.5 * name_score + 0.2 * directory_score + 0.3 * symbol_score, 3)
+
+
+class IndexCheckpoint:
+    """
+    Append-only JSONL checkpoint of per-file analysis results for one repository
+
+    The first line is a header describing the settings the results depend on;
+    each following line holds one file's summary and relationships. A crashed
+    run resumes from the records whose header and file content still match,
+    and the final index is compacted from the records once all files are done.
+    """
+
+    def __init__(self, path: Path, header: Dict[str, Any]):
+        self.path = path
+        self.header = {"type": "header", **header}
+        self._file = None
+
+    def load(self) -> Dict[str, Optional[str]]:
+        """
+        Content hashes of the files that can be resumed
+
+        Returns nothing if the header does not match. Files whose analysis
+        failed are left out so they are analyzed again.
+        """
+        if not self.path.exists():
+            return {}
+
+        content_hashes = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header != self.header:
+                    return {}
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line may be truncated if the process was killed
+                        continue
+                    file_path = record["summary"]["file_path"]
+                    if (
+                        record["summary"]["file_type"] == "error"
+                        or record["summary"]["summary"] == ANALYSIS_FAILED_SUMMARY
+                    ):
+                        content_hashes.pop(file_path, None)
+                    else:
+                        content_hashes[file_path] = record.get("content_hash")
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            return {}
+
+        return content_hashes
+
+    def locate(self) -> Dict[str, int]:
+        """Byte offset of the latest record of every file"""
+        offsets = {}
+        with open(self.path, "rb") as f:
+            f.readline()
+            offset = f.tell()
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    offsets[record["summary"]["file_path"]] = offset
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+        return offsets
+
+    def open(self, records: Dict[str, Any]):
+        """Open for appending, rewriting the file when it cannot be resumed"""
+        if records:
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps(self.header, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def append(
+        self,
+        file_summary: FileSummary,
+        relationships: List[FileRelationship],
+        content_hash: Optional[str],
+    ):
+        """Append one completed file"""
+        if self._file is None:
+            return
+
+        record = {
+            "type": "file",
+            "content_hash": content_hash,
+            "summary": asdict(file_summary),
+            "relationships": [asdict(r) for r in relationships],
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the checkpoint once the final index has been written"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class CheckpointedResults:
+    """
+    Per-file results of a repository, read back from its checkpoint
+
+    Only the checkpoint offset of each file's record is kept in memory; files
+    are decoded one at a time whenever file_summaries or relationships are
+    iterated. Results reused from a previous index are held as they are.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        entries: List[tuple],
+        leading_relationships: List[FileRelationship],
+    ):
+        self.path = path
+        # (file path, checkpoint offset or (file_summary, relationships))
+        self.entries = entries
+        self.leading_relationships = leading_relationships
+        self.file_summaries = _CheckpointedView(self, "file_summaries")
+        self.relationships = _CheckpointedView(self, "relationships")
+        self.relationship_count = len(leading_relationships) + sum(
+            len(relationships) for _, relationships in self.iter_results()
+        )
+
+    def file_paths(self) -> set:
+        return {file_path for file_path, _ in self.entries}
+
+    def iter_results(self):
+        """Yield (file_summary, relationships) of every file in order"""
+        with open(self.path, "rb") as f:
+            for _, entry in self.entries:
+                if not isinstance(entry, int):
+                    yield entry
+                    continue
+                f.seek(entry)
+                record = json.loads(f.readline())
+                yield (
+                    FileSummary(**record["summary"]),
+                    [FileRelationship(**r) for r in record["relationships"]],
+                )
+
+
+class _CheckpointedView:
+    """Sized, re-iterable stand-in for the file_summaries or relationships list"""
+
+    def __init__(self, results: CheckpointedResults, kind: str):
+        self.results = results
+        self.kind = kind
+
+    def __len__(self) -> int:
+        if self.kind == "file_summaries":
+            return len(self.results.entries)
+        return self.results.relationship_count
+
+    def __iter__(self):
+        if self.kind == "relationships":
+            yield from self.results.leading_relationships
+        for file_summary, relationships in self.results.iter_results():
+            if self.kind == "file_summaries":
+                yield file_summary
+            else:
+                yield from relationships
+
+
+def write_repo_index(
+    f, repo_index: RepoIndex, indent: Optional[int], ensure_ascii: bool, fields=None
+):
+    """
+    Write a RepoIndex like json.dump(asdict(repo_index)) would
+
+    file_summaries and relationships are encoded one item at a time, so
+    checkpointed results never have to be materialized as lists.
+    """
+    item_separator = "," if indent is not None else ", "
+
+    def newline(level: int) -> str:
+        return "" if indent is None else "\n" + " " * (indent * level)
+
+    def encode(value, level: int) -> str:
+        text = json.dumps(value, indent=indent, ensure_ascii=ensure_ascii)
+        return text if indent is None else text.replace("\n", newline(level))
+
+    f.write("{")
+    for field_index, name in enumerate(fields or RepoIndex.__dataclass_fields__):
+        if field_index:
+            f.write(item_separator)
+        f.write(newline(1) + json.dumps(name, ensure_ascii=ensure_ascii) + ": ")
+        value = getattr(repo_index, name)
+        if name not in ("file_summaries", "relationships"):
+            f.write(encode(value, 1))
+            continue
+        f.write("[")
+        item_count = 0
+        for item in value:
+            if item_count:
+                f.write(item_separator)
+            f.write(newline(2) + encode(asdict(item), 2))
+            item_count += 1
+        f.write((newline(1) if item_count else "") + "]")
+    f.write(newline(0) + "}")
 
 
 class CodeIndexer:
@@ -165,6 +1114,13 @@ class CodeIndexer:
         self.max_file_size = file_analysis_config.get("max_file_size", 1048576)  # 1MB
         self.max_content_length = file_analysis_config.get("max_content_length", 3000)
 
+        # Static pre-analysis fills file_type/main_functions/dependencies locally
+        # so the LLM is only asked for summary and key_concepts
+        self.enable_static_analysis = file_analysis_config.get(
+            "enable_static_analysis", False
+        )
+        self.static_analyzer = StaticCodeAnalyzer()
+
         # Load LLM configuration
         llm_config = self.indexer_config.get("llm", {})
         self.model_provider = llm_config.get("model_provider", "anthropic")
@@ -177,6 +1133,8 @@ class CodeIndexer:
         self.request_delay = llm_config.get("request_delay", 0.1)
         self.max_retries = llm_config.get("max_retries", 3)
         self.retry_delay = llm_config.get("retry_delay", 1.0)
+        self.requests_per_minute = llm_config.get("requests_per_minute", None)
+        self.tokens_per_minute = llm_config.get("tokens_per_minute", None)
 
         # Load relationship configuration
         relationship_config = self.indexer_config.get("relationships", {})
@@ -184,6 +1142,12 @@ class CodeIndexer:
         self.high_confidence_threshold = relationship_config.get(
             "high_confidence_threshold", 0.7
         )
+        self.enable_relationship_prescoring = relationship_config.get(
+            "enable_relationship_prescoring", False
+        )
+        self.relationship_prescore_threshold = relationship_config.get(
+            "relationship_prescore_threshold", 0.1
+        )
         self.relationship_types = relationship_config.get(
             "relationship_types",
             {
@@ -200,10 +1164,45 @@ class CodeIndexer:
             "enable_concurrent_analysis", False
         )
         self.max_concurrent_files = performance_config.get("max_concurrent_files", 5)
+        self.min_concurrent_requests = performance_config.get(
+            "min_concurrent_requests", 1
+        )
+        self.max_concurrent_requests = performance_config.get(
+            "max_concurrent_requests", 16
+        )
+        self.enable_checkpointing = performance_config.get(
+            "enable_checkpointing", False
+        )
+        self.enable_parallel_repositories = performance_config.get(
+            "enable_parallel_repositories", False
+        )
+        self.max_concurrent_repositories = performance_config.get(
+            "max_concurrent_repositories", 4
+        )
         self.enable_content_caching = performance_config.get(
             "enable_content_caching", False
         )
         self.max_cache_size = performance_config.get("max_cache_size", 100)
+        self.enable_persistent_cache = performance_config.get(
+            "enable_persistent_cache", False
+        )
+        self.persistent_cache_path = performance_config.get(
+            "persistent_cache_path", None
+        )
+        self.persistent_cache_max_entries = performance_config.get(
+            "persistent_cache_max_entries", 20000
+        )
+        self.enable_incremental_indexing = performance_config.get(
+            "enable_incremental_indexing", False
+        )
+        self.enable_batched_analysis = performance_config.get(
+            "enable_batched_analysis", False
+        )
+        self.batch_max_files = performance_config.get("batch_max_files", 8)
+        self.batch_token_budget = performance_config.get("batch_token_budget", 8000)
+        self.batch_max_output_tokens = performance_config.get(
+            "batch_max_output_tokens", 6000
+        )
 
         # Load debug configuration
         debug_config = self.indexer_config.get("debug", {})
@@ -219,6 +1218,7 @@ class CodeIndexer:
         self.generate_summary = output_config.get("generate_summary", True)
         self.generate_statistics = output_config.get("generate_statistics", True)
         self.include_metadata = output_config.get("include_metadata", True)
+        self.build_semantic_index = output_config.get("build_semantic_index", False)
         self.index_filename_pattern = output_config.get(
             "index_filename_pattern", "{repo_name}_index.json"
         )
@@ -232,6 +1232,25 @@ class CodeIndexer:
         # Initialize caching if enabled
         self.content_cache = {} if self.enable_content_caching else None
 
+        # Persistent analysis cache is opened lazily so that attribute overrides
+        # applied after construction (e.g. by the workflow) are respected
+        self.persistent_cache = None
+        self.file_content_hashes = {}
+
+        # Manifests are written after each repository index has been saved
+        self._pending_manifests = {}
+
+        # Rate limiter shared by every LLM call, created on first use
+        self.rate_limiter = None
+
+        # Optional callable receiving per-repository progress events (dict)
+        self.progress_callback = None
+        self._llm_client_lock = None
+
+        # Relationship pre-scorer, rebuilt when the target structure changes
+        self._relationship_prescorer = None
+        self.relationship_prescore_stats = {"evaluated": 0, "skipped": 0}
+
         # Create debug directory if needed
         if self.save_raw_responses:
             Path(self.raw_responses_dir).mkdir(parents=True, exist_ok=True)
@@ -246,6 +1265,8 @@ class CodeIndexer:
             self.logger.info(f"Model provider: {self.model_provider}")
             self.logger.info(f"Concurrent analysis: {self.enable_concurrent_analysis}")
             self.logger.info(f"Content caching: {self.enable_content_caching}")
+            self.logger.info(f"Persistent cache: {self.enable_persistent_cache}")
+            self.logger.info(f"Batched analysis: {self.enable_batched_analysis}")
             self.logger.info(f"Mock LLM responses: {self.mock_llm_responses}")
 
     def _setup_logger(self) -> logging.Logger:
@@ -313,6 +1334,17 @@ class CodeIndexer:
         if self.llm_client is not None:
             return self.llm_client, self.llm_client_type
 
+        # Concurrent files and repositories share a single client initialization
+        if self._llm_client_lock is None:
+            self._llm_client_lock = asyncio.Lock()
+        async with self._llm_client_lock:
+            if self.llm_client is not None:
+                return self.llm_client, self.llm_client_type
+            return await self._create_llm_client()
+
+    async def _create_llm_client(self):
+        """Create and test the LLM client"""
+
         # Check if mock responses are enabled
         if self.mock_llm_responses:
             self.logger.info("Using mock LLM responses for testing")
@@ -380,10 +1412,63 @@ class CodeIndexer:
             "No available LLM API - please check your API keys in configuration"
         )
 
+    def _get_rate_limiter(self) -> LLMRateLimiter:
+        """Get the rate limiter shared by all LLM calls of this indexer"""
+        if self.rate_limiter is None:
+            self.rate_limiter = LLMRateLimiter(
+                requests_per_minute=self.requests_per_minute,
+                tokens_per_minute=self.tokens_per_minute,
+                initial_concurrency=(
+                    self.max_concurrent_files if self.enable_concurrent_analysis else 1
+                )
+                * (
+                    self.max_concurrent_repositories
+                    if self.enable_parallel_repositories
+                    else 1
+                ),
+                min_concurrency=self.min_concurrent_requests,
+                max_concurrency=self.max_concurrent_requests,
+            )
+        return self.rate_limiter
+
+    def _classify_llm_error(self, error: Exception) -> tuple:
+        """
+        Classify an LLM call error for the rate limiter
+
+        Returns:
+            (throttled, retry_after) - throttled is True for rate-limit (429),
+            overload and timeout errors
+        """
+        response = getattr(error, "response", None)
+        status_code = getattr(error, "status_code", None) or getattr(
+            response, "status_code", None
+        )
+
+        retry_after = None
+        headers = getattr(response, "headers", None)
+        if headers is not None:
+            try:
+                retry_after = float(headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+
+        error_name = type(error).__name__.lower()
+        error_message = str(error).lower()
+        throttled = (
+            status_code in (429, 503, 529)
+            or isinstance(error, (asyncio.TimeoutError, TimeoutError))
+            or "ratelimit" in error_name
+            or "timeout" in error_name
+            or "overloaded" in error_name
+            or "rate limit" in error_message
+            or "429" in error_message
+        )
+        return throttled, retry_after
+
     async def _call_llm(
         self, prompt: str, system_prompt: str = None, max_tokens: int = None
     ) -> str:
-        """Call LLM for code analysis with retry mechanism and debugging support"""
+        """Call LLM for code analysis with rate limiting, retry mechanism and debugging support"""
         if system_prompt is None:
             system_prompt = self.llm_system_prompt
         if max_tokens is None:
@@ -397,9 +1482,17 @@ class CodeIndexer:
             return mock_response
 
         last_error = None
+        rate_limiter = self._get_rate_limiter()
+        estimated_tokens = self._estimate_tokens(system_prompt + prompt) + max_tokens
 
         # Retry mechanism
         for attempt in range(self.max_retries):
+            actual_tokens = None
+            succeeded = False
+            throttled = False
+            retry_after = None
+
+            await rate_limiter.acquire(estimated_tokens)
             try:
                 if self.verbose_output and attempt > 0:
                     self.logger.info(
@@ -422,10 +1515,17 @@ class CodeIndexer:
                         if block.type == "text":
                             content += block.text
 
+                    usage = getattr(response, "usage", None)
+                    if usage is not None:
+                        actual_tokens = (getattr(usage, "input_tokens", 0) or 0) + (
+                            getattr(usage, "output_tokens", 0) or 0
+                        )
+
                     # Save debug response if enabled
                     if self.save_raw_responses:
                         self._save_debug_response("anthropic", prompt, content)
 
+                    succeeded = True
                     return content
 
                 elif client_type == "openai":
@@ -443,22 +1543,40 @@ class CodeIndexer:
 
                     content = response.choices[0].message.content or ""
 
+                    usage = getattr(response, "usage", None)
+                    if usage is not None:
+                        actual_tokens = getattr(usage, "total_tokens", None)
+
                     # Save debug response if enabled
                     if self.save_raw_responses:
                         self._save_debug_response("openai", prompt, content)
 
+                    succeeded = True
                     return content
                 else:
                     raise ValueError(f"Unsupported client type: {client_type}")
 
             except Exception as e:
                 last_error = e
-                self.logger.warning(f"LLM call attempt {attempt + 1} failed: {e}")
+                throttled, retry_after = self._classify_llm_error(e)
+                self.logger.warning(
+                    f"LLM call attempt {attempt + 1} failed{' (throttled)' if throttled else ''}: {e}"
+                )
+
+            finally:
+                await rate_limiter.release(
+                    estimated_tokens,
+                    actual_tokens=actual_tokens,
+                    succeeded=succeeded,
+                    throttled=throttled,
+                    retry_after=retry_after,
+                )
 
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(
-                        self.retry_delay * (attempt + 1)
-                    )  # Exponential backoff
+            # Throttled calls wait in the limiter's cooldown instead of sleeping here
+            if attempt < self.max_retries - 1 and not throttled:
+                await asyncio.sleep(
+                    self.retry_delay * (2**attempt)
+                )  # Exponential backoff
 
         # All retries failed
         error_msg = f"LLM call failed after {self.max_retries} attempts. Last error: {str(last_error)}"
@@ -467,7 +1585,34 @@ class CodeIndexer:
 
     def _generate_mock_response(self, prompt: str) -> str:
         """Generate mock LLM response for testing"""
-        if "JSON format" in prompt and "file_type" in prompt:
+        if '"file_id"' in prompt:
+            # Batched file analysis mock, one entry per file in the prompt
+            return json.dumps(
+                {
+                    "files": [
+                        {
+                            "file_id": file_id,
+                            "file_type": "Python module",
+                            "main_functions": ["main_function", "helper_function"],
+                            "key_concepts": ["data_processing", "algorithm"],
+                            "dependencies": ["numpy", "pandas"],
+                            "summary": "Mock analysis of code file functionality.",
+                            "relationships": [
+                                {
+                                    "target_file_path": "src/core/mock.py",
+                                    "relationship_type": "partial_match",
+                                    "confidence_score": 0.8,
+                                    "helpful_aspects": ["algorithm implementation"],
+                                    "potential_contributions": ["core functionality"],
+                                    "usage_suggestions": "Mock relationship suggestion for testing.",
+                                }
+                            ],
+                        }
+                        for file_id in re.findall(r"=== FILE (F\d+):", prompt)
+                    ]
+                }
+            )
+        elif "JSON format" in prompt and "file_type" in prompt:
             # File analysis mock
             return """
             {
@@ -478,6 +1623,14 @@ class CodeIndexer:
                 "summary": "Mock analysis of code file functionality."
             }
             """
+        elif "JSON format" in prompt and "key_concepts" in prompt:
+            # Summary-only mock for files with static facts
+            return """
+            {
+                "key_concepts": ["data_processing", "algorithm"],
+                "summary": "Mock analysis of code file functionality."
+            }
+            """
         elif "relationships" in prompt:
             # Relationship analysis mock
             return """
@@ -750,16 +1903,74 @@ class CodeIndexer:
                     f"Cache cleaned: removed {excess_count} entries, {len(self.content_cache)} entries remaining"
                 )
 
-    async def analyze_file_content(self, file_path: Path) -> FileSummary:
-        """Analyze a single file and create summary with caching support"""
-        try:
-            # Check file size before reading
-            file_size = file_path.stat().st_size
-            if file_size > self.max_file_size:
+    def _get_persistent_cache(self) -> Optional[AnalysisCache]:
+        """Open the persistent analysis cache on first use"""
+        if not self.enable_persistent_cache:
+            return None
+
+        if self.persistent_cache is None:
+            cache_path = (
+                Path(self.persistent_cache_path)
+                if self.persistent_cache_path
+                else self.output_dir / ".cache" / "analysis_cache.sqlite"
+            )
+            try:
+                self.persistent_cache = AnalysisCache(
+                    cache_path, max_entries=self.persistent_cache_max_entries
+                )
+                self.logger.info(f"Persistent analysis cache: {cache_path}")
+            except Exception as e:
                 self.logger.warning(
-                    f"Skipping file {file_path} - size {file_size} bytes exceeds limit {self.max_file_size}"
+                    f"Failed to open persistent cache at {cache_path}: {e}"
                 )
-                return FileSummary(
+                self.enable_persistent_cache = False
+                return None
+
+        return self.persistent_cache
+
+    def _analysis_fingerprint(self) -> str:
+        """Fingerprint of the settings that determine a file analysis result"""
+        fingerprint_data = {
+            "prompt_version": ANALYSIS_PROMPT_VERSION,
+            "models": self.default_models,
+            "mock": self.mock_llm_responses,
+            "max_content_length": self.max_content_length,
+            "temperature": self.llm_temperature,
+            "static_analysis": self.enable_static_analysis,
+        }
+        return hashlib.sha256(
+            json.dumps(fingerprint_data, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _relationship_fingerprint(self) -> str:
+        """Fingerprint of the settings that determine a relationship analysis result"""
+        fingerprint_data = {
+            "analysis": self._analysis_fingerprint(),
+            "target_structure": self.target_structure or "",
+            "relationship_types": self.relationship_types,
+            "min_confidence_score": self.min_confidence_score,
+        }
+        return hashlib.sha256(
+            json.dumps(fingerprint_data, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _prepare_file_analysis(self, file_path: Path) -> tuple:
+        """
+        Read a file and resolve its summary from the size limit or the caches
+
+        Returns:
+            (file_summary, analysis_context) - file_summary is set when no LLM
+            call is needed, otherwise analysis_context holds what is needed to
+            build the prompt and store the result
+        """
+        # Check file size before reading
+        file_size = file_path.stat().st_size
+        if file_size > self.max_file_size:
+            self.logger.warning(
+                f"Skipping file {file_path} - size {file_size} bytes exceeds limit {self.max_file_size}"
+            )
+            return (
+                FileSummary(
                     file_path=str(file_path.relative_to(self.code_base_path)),
                     file_type="skipped - too large",
                     main_functions=[],
@@ -770,36 +1981,169 @@ class CodeIndexer:
                     last_modified=datetime.fromtimestamp(
                         file_path.stat().st_mtime
                     ).isoformat(),
-                )
-
-            # Check cache if enabled
-            cache_key = None
-            if self.enable_content_caching:
-                cache_key = self._get_cache_key(file_path)
-                if cache_key in self.content_cache:
-                    if self.verbose_output:
-                        self.logger.info(f"Using cached analysis for {file_path.name}")
-                    return self.content_cache[cache_key]
+                ),
+                None,
+            )
 
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
+        # Check cache if enabled
+        cache_key = None
+        if self.enable_content_caching:
+            cache_key = self._get_cache_key(file_path)
+            if cache_key in self.content_cache:
+                if self.verbose_output:
+                    self.logger.info(f"Using cached analysis for {file_path.name}")
+                return self.content_cache[cache_key], None
+
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read()
+
+        # Get file stats
+        stats = file_path.stat()
+        analysis_context = {
+            "file_path": file_path,
+            "relative_path": str(file_path.relative_to(self.code_base_path)),
+            "content": content,
+            "lines_of_code": len(
+                [line for line in content.split("\n") if line.strip()]
+            ),
+            "last_modified": datetime.fromtimestamp(stats.st_mtime).isoformat(),
+            "cache_key": cache_key,
+            "persistent_key": None,
+            "static_facts": None,
+        }
 
-            # Get file stats
-            stats = file_path.stat()
-            lines_of_code = len([line for line in content.split("\n") if line.strip()])
+        # Check persistent cache keyed by content hash
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        self.file_content_hashes[analysis_context["relative_path"]] = content_hash
+
+        if self.enable_static_analysis:
+            # Configuration/data files are summarized without the LLM
+            if self.static_analyzer.is_non_source(analysis_context["relative_path"]):
+                file_summary = self._build_file_summary(
+                    analysis_context,
+                    self.static_analyzer.analyze_non_source(
+                        analysis_context["relative_path"], content
+                    ),
+                )
+                if self.enable_content_caching and cache_key:
+                    self.content_cache[cache_key] = file_summary
+                    self._manage_cache_size()
+                return file_summary, None
+
+            analysis_context["static_facts"] = self.static_analyzer.analyze(
+                analysis_context["relative_path"], content
+            )
+
+        persistent_cache = self._get_persistent_cache()
+        if persistent_cache is not None:
+            persistent_key = AnalysisCache.make_key(
+                "summary", content_hash, self._analysis_fingerprint()
+            )
+            analysis_context["persistent_key"] = persistent_key
+            cached_data = persistent_cache.get("summary", persistent_key)
+            if cached_data is not None:
+                if self.verbose_output:
+                    self.logger.info(
+                        f"Using persistently cached analysis for {file_path.name}"
+                    )
+                file_summary = self._build_file_summary(analysis_context, cached_data)
+                if self.enable_content_caching and cache_key:
+                    self.content_cache[cache_key] = file_summary
+                    self._manage_cache_size()
+                return file_summary, None
+
+        return None, analysis_context
+
+    def _build_file_summary(
+        self, analysis_context: Dict[str, Any], analysis_data: Dict[str, Any]
+    ) -> FileSummary:
+        """Build a FileSummary from parsed LLM analysis data"""
+        # Statically extracted facts take precedence over the LLM's answer
+        if analysis_context.get("static_facts"):
+            analysis_data = {**analysis_data, **analysis_context["static_facts"]}
+
+        return FileSummary(
+            file_path=analysis_context["relative_path"],
+            file_type=analysis_data.get("file_type", "unknown"),
+            main_functions=analysis_data.get("main_functions", []),
+            key_concepts=analysis_data.get("key_concepts", []),
+            dependencies=analysis_data.get("dependencies", []),
+            summary=analysis_data.get("summary", "No summary available"),
+            lines_of_code=analysis_context["lines_of_code"],
+            last_modified=analysis_context["last_modified"],
+        )
+
+    def _store_file_summary(
+        self,
+        analysis_context: Dict[str, Any],
+        file_summary: FileSummary,
+        analysis_succeeded: bool,
+    ):
+        """Store an analysis result in the in-memory and persistent caches"""
+        # Cache the result if caching is enabled
+        cache_key = analysis_context["cache_key"]
+        if self.enable_content_caching and cache_key:
+            self.content_cache[cache_key] = file_summary
+            self._manage_cache_size()
+
+        # Only successful analyses are persisted so failures get retried next run
+        persistent_key = analysis_context["persistent_key"]
+        if analysis_succeeded and persistent_key:
+            self._get_persistent_cache().put(
+                "summary",
+                persistent_key,
+                {
+                    "file_type": file_summary.file_type,
+                    "main_functions": file_summary.main_functions,
+                    "key_concepts": file_summary.key_concepts,
+                    "dependencies": file_summary.dependencies,
+                    "summary": file_summary.summary,
+                },
+            )
 
-            # Truncate content based on config
-            content_for_analysis = content[: self.max_content_length]
-            content_suffix = "..." if len(content) > self.max_content_length else ""
+    def _get_content_for_analysis(self, analysis_context: Dict[str, Any]) -> str:
+        """Truncate file content based on config"""
+        content = analysis_context["content"]
+        content_suffix = "..." if len(content) > self.max_content_length else ""
+        return content[: self.max_content_length] + content_suffix
+
+    async def analyze_file_content(self, file_path: Path) -> FileSummary:
+        """Analyze a single file and create summary with caching support"""
+        try:
+            file_summary, analysis_context = self._prepare_file_analysis(file_path)
+            if file_summary is not None:
+                return file_summary
 
             # Create analysis prompt
-            analysis_prompt = f"""
+            static_facts = analysis_context["static_facts"]
+            if static_facts:
+                analysis_prompt = f"""
+            Summarize this code file:
+
+            File: {file_path.name}
+            Definitions: {', '.join(static_facts['main_functions']) or 'none'}
+            Imports: {', '.join(static_facts['dependencies']) or 'none'}
+            Content:
+            ```
+            {self._get_content_for_analysis(analysis_context)}
+            ```
+
+            Please provide analysis in this JSON format:
+            {{
+                "key_concepts": ["important", "concepts", "algorithms", "patterns"],
+                "summary": "2-3 sentence summary of what this file does"
+            }}
+
+            Focus on the core functionality and potential reusability.
+            """
+            else:
+                analysis_prompt = f"""
             Analyze this code file and provide a structured summary:
 
             File: {file_path.name}
             Content:
             ```
-            {content_for_analysis}{content_suffix}
+            {self._get_content_for_analysis(analysis_context)}
             ```
 
             Please provide analysis in this JSON format:
@@ -815,12 +2159,16 @@ class CodeIndexer:
             """
 
             # Get LLM analysis with configured parameters
-            llm_response = await self._call_llm(analysis_prompt, max_tokens=1000)
+            llm_response = await self._call_llm(
+                analysis_prompt, max_tokens=500 if static_facts else 1000
+            )
 
+            analysis_succeeded = False
             try:
                 # Try to parse JSON response
                 match = re.search(r"\{.*\}", llm_response, re.DOTALL)
                 analysis_data = json.loads(match.group(0))
+                analysis_succeeded = True
             except json.JSONDecodeError:
                 # Fallback to basic analysis if JSON parsing fails
                 analysis_data = {
@@ -828,24 +2176,11 @@ class CodeIndexer:
                     "main_functions": [],
                     "key_concepts": [],
                     "dependencies": [],
-                    "summary": "File analysis failed - JSON parsing error",
+                    "summary": ANALYSIS_FAILED_SUMMARY,
                 }
 
-            file_summary = FileSummary(
-                file_path=str(file_path.relative_to(self.code_base_path)),
-                file_type=analysis_data.get("file_type", "unknown"),
-                main_functions=analysis_data.get("main_functions", []),
-                key_concepts=analysis_data.get("key_concepts", []),
-                dependencies=analysis_data.get("dependencies", []),
-                summary=analysis_data.get("summary", "No summary available"),
-                lines_of_code=lines_of_code,
-                last_modified=datetime.fromtimestamp(stats.st_mtime).isoformat(),
-            )
-
-            # Cache the result if caching is enabled
-            if self.enable_content_caching and cache_key:
-                self.content_cache[cache_key] = file_summary
-                self._manage_cache_size()
+            file_summary = self._build_file_summary(analysis_context, analysis_data)
+            self._store_file_summary(analysis_context, file_summary, analysis_succeeded)
 
             return file_summary
 
@@ -862,15 +2197,180 @@ class CodeIndexer:
                 last_modified="",
             )
 
+    def _get_relationship_cache_key(self, file_summary: FileSummary) -> Optional[str]:
+        """
+        Persistent cache key for a file's relationships; the key covers both the
+        file content and the summary the relationships are derived from
+        """
+        content_hash = self.file_content_hashes.get(file_summary.file_path)
+        if self._get_persistent_cache() is None or not content_hash:
+            return None
+
+        summary_hash = hashlib.sha256(
+            json.dumps(
+                [
+                    content_hash,
+                    file_summary.file_type,
+                    file_summary.main_functions,
+                    file_summary.key_concepts,
+                    file_summary.summary,
+                ],
+                ensure_ascii=False,
+            ).encode("utf-8")
+        ).hexdigest()
+        return AnalysisCache.make_key(
+            "relationships", summary_hash, self._relationship_fingerprint()
+        )
+
+    def _get_cached_relationships(
+        self, file_summary: FileSummary, persistent_key: Optional[str]
+    ) -> Optional[List[FileRelationship]]:
+        """Look up a file's relationships in the persistent cache"""
+        if not persistent_key:
+            return None
+
+        cached_relationships = self._get_persistent_cache().get(
+            "relationships", persistent_key
+        )
+        if cached_relationships is None:
+            return None
+
+        return [
+            FileRelationship(repo_file_path=file_summary.file_path, **rel_data)
+            for rel_data in cached_relationships
+        ]
+
+    def _store_relationships(
+        self, persistent_key: Optional[str], relationships: List[FileRelationship]
+    ):
+        """Persist a file's relationships without the repo-specific file path"""
+        if not persistent_key:
+            return
+
+        cached_payload = []
+        for relationship in relationships:
+            rel_dict = asdict(relationship)
+            rel_dict.pop("repo_file_path", None)
+            cached_payload.append(rel_dict)
+        self._get_persistent_cache().put(
+            "relationships", persistent_key, cached_payload
+        )
+
+    def _parse_relationships(
+        self, file_summary: FileSummary, relationship_list: List[Dict[str, Any]]
+    ) -> List[FileRelationship]:
+        """Validate relationship entries from an LLM response"""
+        relationships = []
+        for rel_data in relationship_list:
+            confidence_score = float(rel_data.get("confidence_score", 0.0))
+            relationship_type = rel_data.get("relationship_type", "reference")
+
+            # Validate relationship type is in config
+            if relationship_type not in self.relationship_types:
+                if self.verbose_output:
+                    self.logger.warning(
+                        f"Unknown relationship type '{relationship_type}', using 'reference'"
+                    )
+                relationship_type = "reference"
+
+            # Apply configured minimum confidence filter
+            if confidence_score > self.min_confidence_score:
+                relationship = FileRelationship(
+                    repo_file_path=file_summary.file_path,
+                    target_file_path=rel_data.get("target_file_path", ""),
+                    relationship_type=relationship_type,
+                    confidence_score=confidence_score,
+                    helpful_aspects=rel_data.get("helpful_aspects", []),
+                    potential_contributions=rel_data.get("potential_contributions", []),
+                    usage_suggestions=rel_data.get("usage_suggestions", ""),
+                )
+                relationships.append(relationship)
+
+        return relationships
+
+    def _get_relationship_type_description(self) -> str:
+        """Build relationship type description from config"""
+        return "\n".join(
+            f"- {rel_type} (priority: {weight})"
+            for rel_type, weight in self.relationship_types.items()
+        )
+
+    def _get_relationship_prescorer(self) -> RelationshipPreScorer:
+        """Get the pre-scorer for the current target structure"""
+        if (
+            self._relationship_prescorer is None
+            or self._relationship_prescorer.target_structure != self.target_structure
+        ):
+            self._relationship_prescorer = RelationshipPreScorer(self.target_structure)
+        return self._relationship_prescorer
+
+    def _should_skip_relationships(self, file_summary: FileSummary) -> bool:
+        """Check the deterministic pre-score before asking the LLM for relationships"""
+        return self._prescore_skips_relationships(
+            file_summary.file_path,
+            file_summary.main_functions + file_summary.key_concepts,
+        )
+
+    def _prescore_skips_relationships(self, file_path: str, symbols: List[str]) -> bool:
+        """Pre-score a file path and its symbols, counting the relationship call skipped"""
+        if not self.enable_relationship_prescoring:
+            return False
+
+        prescore = self._get_relationship_prescorer().score(file_path, symbols)
+        self.relationship_prescore_stats["evaluated"] += 1
+        if prescore >= self.relationship_prescore_threshold:
+            return False
+
+        self.relationship_prescore_stats["skipped"] += 1
+        progress = _REPO_PROGRESS.get()
+        if progress is not None:
+            progress["prescore_skipped"] += 1
+        if self.verbose_output:
+            self.logger.info(
+                f"Skipping relationship analysis for {file_path} (pre-score {prescore})"
+            )
+        return True
+
+    def _relationship_prescoring_settings(self) -> Optional[float]:
+        """Pre-scoring threshold in effect, or None when pre-scoring is disabled"""
+        if not self.enable_relationship_prescoring:
+            return None
+        return self.relationship_prescore_threshold
+
+    def get_relationship_prescore_statistics(self) -> Dict[str, Any]:
+        """Get relationship pre-scoring statistics"""
+        evaluated = self.relationship_prescore_stats["evaluated"]
+        skipped = self.relationship_prescore_stats["skipped"]
+        return {
+            "enabled": self.enable_relationship_prescoring,
+            "threshold": self.relationship_prescore_threshold,
+            "files_evaluated": evaluated,
+            "relationship_calls_skipped": skipped,
+            "skip_rate": round(skipped / evaluated, 3) if evaluated else 0.0,
+        }
+
     async def find_relationships(
         self, file_summary: FileSummary
     ) -> List[FileRelationship]:
         """Find relationships between a repo file and target structure"""
 
-        # Build relationship type description from config
-        relationship_type_desc = []
-        for rel_type, weight in self.relationship_types.items():
-            relationship_type_desc.append(f"- {rel_type} (priority: {weight})")
+        # Configuration/data files are not related to the target structure by the LLM
+        if self.enable_static_analysis and self.static_analyzer.is_non_source(
+            file_summary.file_path
+        ):
+            return []
+
+        # Skip files that clearly have nothing to do with the target structure
+        if self._should_skip_relationships(file_summary):
+            return []
+
+        # Check persistent cache
+        persistent_key = self._get_relationship_cache_key(file_summary)
+        cached_relationships = self._get_cached_relationships(
+            file_summary, persistent_key
+        )
+        if cached_relationships is not None:
+            return cached_relationships
 
         relationship_prompt = f"""
         Analyze the relationship between this existing code file and the target project structure.
@@ -886,7 +2386,7 @@ class CodeIndexer:
         {self.target_structure}
 
         Available relationship types (with priority weights):
-        {chr(10).join(relationship_type_desc)}
+        {self._get_relationship_type_description()}
 
         Identify potential relationships and provide analysis in this JSON format:
         {{
@@ -912,33 +2412,10 @@ class CodeIndexer:
             match = re.search(r"\{.*\}", llm_response, re.DOTALL)
             relationship_data = json.loads(match.group(0))
 
-            relationships = []
-            for rel_data in relationship_data.get("relationships", []):
-                confidence_score = float(rel_data.get("confidence_score", 0.0))
-                relationship_type = rel_data.get("relationship_type", "reference")
-
-                # Validate relationship type is in config
-                if relationship_type not in self.relationship_types:
-                    if self.verbose_output:
-                        self.logger.warning(
-                            f"Unknown relationship type '{relationship_type}', using 'reference'"
-                        )
-                    relationship_type = "reference"
-
-                # Apply configured minimum confidence filter
-                if confidence_score > self.min_confidence_score:
-                    relationship = FileRelationship(
-                        repo_file_path=file_summary.file_path,
-                        target_file_path=rel_data.get("target_file_path", ""),
-                        relationship_type=relationship_type,
-                        confidence_score=confidence_score,
-                        helpful_aspects=rel_data.get("helpful_aspects", []),
-                        potential_contributions=rel_data.get(
-                            "potential_contributions", []
-                        ),
-                        usage_suggestions=rel_data.get("usage_suggestions", ""),
-                    )
-                    relationships.append(relationship)
+            relationships = self._parse_relationships(
+                file_summary, relationship_data.get("relationships", [])
+            )
+            self._store_relationships(persistent_key, relationships)
 
             return relationships
 
@@ -968,6 +2445,18 @@ class CodeIndexer:
         repo_name = repo_path.name
         self.logger.info(f"Processing repository: {repo_name}")
 
+        progress = {
+            "repo_name": repo_name,
+            "started_at": time.time(),
+            "total_files": 0,
+            "completed_files": 0,
+            "last_reported_percent": 0,
+            "prescore_skipped": 0,
+            "failed_paths": set(),
+        }
+        _REPO_PROGRESS.set(progress)
+        self._emit_progress("started")
+
         # Step 1: Generate file tree
         self.logger.info("Generating file tree structure...")
         file_tree = self.generate_file_tree(repo_path)
@@ -976,28 +2465,48 @@ class CodeIndexer:
         all_files = self.get_all_repo_files(repo_path)
         self.logger.info(f"Found {len(all_files)} files in {repo_name}")
 
-        # Step 3: LLM pre-filtering of relevant files
-        if self.enable_pre_filtering:
-            self.logger.info("Using LLM for file pre-filtering...")
-            selected_file_paths = await self.pre_filter_files(repo_path, file_tree)
-        else:
-            self.logger.info("Pre-filtering is disabled, will analyze all files")
-            selected_file_paths = []
+        # Step 3: Diff against the previous manifest when incremental mode is enabled
+        previous_state = None
+        if self.enable_incremental_indexing:
+            previous_state = self._load_incremental_state(repo_name)
+            if previous_state is None:
+                self.logger.info(
+                    f"No reusable index for {repo_name}, performing full indexing"
+                )
 
-        # Step 4: Filter file list based on filtering results
-        if selected_file_paths:
-            files_to_analyze = self.filter_files_by_paths(
-                all_files, selected_file_paths, repo_path
+        if previous_state is not None:
+            (
+                files_to_analyze,
+                reused_summaries,
+                reused_relationships,
+                incremental_stats,
+            ) = await self._plan_incremental_update(
+                repo_path, file_tree, all_files, previous_state
             )
+        else:
+            files_to_analyze = await self._select_files_to_analyze(
+                repo_path, file_tree, all_files
+            )
+            reused_summaries, reused_relationships = {}, []
+            incremental_stats = {"mode": "full"}
+
+        # Step 4: Analyze filtered files (batched, concurrent or sequential),
+        # resuming from the checkpoint of an interrupted run when enabled
+        selected_files = files_to_analyze
+        if self.enable_checkpointing:
+            files_to_analyze = self._resume_from_checkpoint(repo_name, files_to_analyze)
+        progress["total_files"] = len(files_to_analyze)
+        self._emit_progress("analyzing")
+        if not files_to_analyze:
+            file_summaries, all_relationships = [], []
+        elif self.enable_batched_analysis and len(files_to_analyze) > 1:
             self.logger.info(
-                f"After LLM filtering, will analyze {len(files_to_analyze)} relevant files (from {len(all_files)} total)"
+                f"Using batched analysis with up to {self.batch_max_files} files per request"
             )
-        else:
-            files_to_analyze = all_files
-            self.logger.info("LLM filtering failed, will analyze all files")
-
-        # Step 5: Analyze filtered files (concurrent or sequential)
-        if self.enable_concurrent_analysis and len(files_to_analyze) > 1:
+            file_summaries, all_relationships = await self._process_files_batched(
+                files_to_analyze
+            )
+        elif self.enable_concurrent_analysis and len(files_to_analyze) > 1:
             self.logger.info(
                 f"Using concurrent analysis with max {self.max_concurrent_files} parallel files"
             )
@@ -1010,29 +2519,74 @@ class CodeIndexer:
                 files_to_analyze
             )
 
+        # Step 5: Merge freshly analyzed files with results reused from the previous index
+        checkpoint = progress.get("checkpoint")
+        if checkpoint is not None:
+            # Every analyzed file went to the checkpoint; read them back from it
+            checkpoint.close()
+            results = self._load_checkpointed_results(
+                checkpoint,
+                all_files if previous_state is not None else selected_files,
+                {
+                    str(file_path.relative_to(self.code_base_path))
+                    for file_path in selected_files
+                },
+                reused_summaries,
+                reused_relationships,
+            )
+            file_summaries = results.file_summaries
+            all_relationships = results.relationships
+            analyzed_paths = results.file_paths()
+        else:
+            if previous_state is not None:
+                new_summaries = {fs.file_path: fs for fs in file_summaries}
+                file_summaries = []
+                for file_path in all_files:
+                    relative_path = str(file_path.relative_to(self.code_base_path))
+                    if relative_path in new_summaries:
+                        file_summaries.append(new_summaries[relative_path])
+                    elif relative_path in reused_summaries:
+                        file_summaries.append(reused_summaries[relative_path])
+                all_relationships = reused_relationships + all_relationships
+            analyzed_paths = {fs.file_path for fs in file_summaries}
+        failed_paths = progress["failed_paths"] & analyzed_paths
+        analyzed_file_count = (
+            len(file_summaries) if previous_state is not None else len(selected_files)
+        )
+
+        self._pending_manifests[repo_name] = self._build_repo_manifest(
+            repo_name, all_files, analyzed_paths - failed_paths, failed_paths
+        )
+
+        # Build the import graph from static analysis of the repository's Python files
+        import_graph = (
+            self._build_import_graph(repo_path, all_files)
+            if self.enable_static_analysis
+            else {}
+        )
+
         # Step 6: Create repository index
         repo_index = RepoIndex(
             repo_name=repo_name,
             total_files=len(all_files),  # Record original file count
             file_summaries=file_summaries,
             relationships=all_relationships,
+            import_graph=import_graph,
             analysis_metadata={
                 "analysis_date": datetime.now().isoformat(),
                 "target_structure_analyzed": self.target_structure[:200] + "...",
                 "total_relationships_found": len(all_relationships),
-                "high_confidence_relationships": len(
-                    [
-                        r
-                        for r in all_relationships
-                        if r.confidence_score > self.high_confidence_threshold
-                    ]
+                "high_confidence_relationships": sum(
+                    1
+                    for r in all_relationships
+                    if r.confidence_score > self.high_confidence_threshold
                 ),
                 "analyzer_version": "1.4.0",  # Updated version to reflect augmented LLM support
                 "pre_filtering_enabled": self.enable_pre_filtering,
                 "files_before_filtering": len(all_files),
-                "files_after_filtering": len(files_to_analyze),
+                "files_after_filtering": analyzed_file_count,
                 "filtering_efficiency": round(
-                    (1 - len(files_to_analyze) / len(all_files)) * 100, 2
+                    (1 - analyzed_file_count / len(all_files)) * 100, 2
                 )
                 if all_files
                 else 0,
@@ -1042,149 +2596,778 @@ class CodeIndexer:
                 "concurrent_analysis_used": self.enable_concurrent_analysis,
                 "content_caching_enabled": self.enable_content_caching,
                 "cache_hits": len(self.content_cache) if self.content_cache else 0,
+                "incremental_indexing": incremental_stats,
+                "relationship_calls_skipped_by_prescoring": progress[
+                    "prescore_skipped"
+                ],
+                "static_analysis_enabled": self.enable_static_analysis,
+                "import_graph_edges": sum(
+                    len(targets) for targets in import_graph.values()
+                ),
             },
         )
 
+        self.logger.info(
+            f"[{repo_name}] Indexed {len(file_summaries)} files in {time.time() - progress['started_at']:.1f}s"
+        )
+        self._emit_progress("indexed")
+
         return repo_index
 
-    async def _process_files_sequentially(self, files_to_analyze: list) -> tuple:
-        """Process files sequentially (original method)"""
-        file_summaries = []
-        all_relationships = []
+    def _load_checkpointed_results(
+        self,
+        checkpoint: IndexCheckpoint,
+        ordered_files: List[Path],
+        analyzed_paths: set,
+        reused_summaries: Dict[str, FileSummary],
+        reused_relationships: List[FileRelationship],
+    ) -> CheckpointedResults:
+        """Locate the checkpointed files of this run, in index order"""
+        offsets = checkpoint.locate()
+        entries = []
+        for file_path in ordered_files:
+            relative_path = str(file_path.relative_to(self.code_base_path))
+            if relative_path in analyzed_paths and relative_path in offsets:
+                entries.append((relative_path, offsets[relative_path]))
+            elif relative_path in reused_summaries:
+                entries.append((relative_path, (reused_summaries[relative_path], [])))
+        return CheckpointedResults(checkpoint.path, entries, reused_relationships)
+
+    def _get_checkpoint_path(self, repo_name: str) -> Path:
+        """Get the JSONL checkpoint path stored next to the repository index"""
+        return self._get_index_output_path(repo_name).with_suffix(".checkpoint.jsonl")
+
+    def _resume_from_checkpoint(
+        self, repo_name: str, files_to_analyze: List[Path]
+    ) -> tuple:
+        """
+        Skip files completed in the checkpoint and open it for appending
 
-        for i, file_path in enumerate(files_to_analyze, 1):
-            (
+        Resumed results stay in the checkpoint, from which the final index is
+        written.
+
+        Returns:
+            The files that still have to be analyzed
+        """
+        checkpoint = IndexCheckpoint(
+            self._get_checkpoint_path(repo_name),
+            {
+                "repo_name": repo_name,
+                "relationship_fingerprint": self._relationship_fingerprint(),
+                "relationship_prescoring": self._relationship_prescoring_settings(),
+            },
+        )
+        checkpointed_hashes = checkpoint.load()
+
+        remaining_files = []
+        for file_path in files_to_analyze:
+            relative_path = str(file_path.relative_to(self.code_base_path))
+            if relative_path in checkpointed_hashes:
+                try:
+                    content_hash = self._compute_file_hash(file_path)
+                except (OSError, PermissionError):
+                    content_hash = None
+
+                # Files changed since they were checkpointed are analyzed again
+                if content_hash and content_hash == checkpointed_hashes[relative_path]:
+                    self.file_content_hashes[relative_path] = content_hash
+                    continue
+            remaining_files.append(file_path)
+
+        resumed_count = len(files_to_analyze) - len(remaining_files)
+        if resumed_count:
+            self.logger.info(
+                f"[{repo_name}] Resumed {resumed_count} files from checkpoint, "
+                f"{len(remaining_files)} files remaining"
+            )
+
+        checkpoint.open(checkpointed_hashes)
+        progress = _REPO_PROGRESS.get()
+        if progress is not None:
+            progress["checkpoint"] = checkpoint
+
+        return remaining_files
+
+    def _emit_progress(self, stage: str, **extra):
+        """Send a progress event for the current repository to the progress callback"""
+        progress = _REPO_PROGRESS.get()
+        if progress is None or self.progress_callback is None:
+            return
+
+        event = {
+            "repo_name": progress["repo_name"],
+            "stage": stage,
+            "completed_files": progress["completed_files"],
+            "total_files": progress["total_files"],
+            "elapsed_seconds": round(time.time() - progress["started_at"], 2),
+            **extra,
+        }
+        try:
+            self.progress_callback(event)
+        except Exception as e:
+            self.logger.warning(f"Progress callback failed: {e}")
+
+    def _record_file_result(
+        self, file_summary: FileSummary, relationships: List[FileRelationship]
+    ) -> bool:
+        """
+        Checkpoint a completed file for the current repository and log progress every 10%
+
+        Returns:
+            True if the result went to the checkpoint, in which case the
+            caller does not keep it in memory
+        """
+        progress = _REPO_PROGRESS.get()
+        if progress is None:
+            return False
+
+        if self._is_failed_summary(file_summary):
+            progress["failed_paths"].add(file_summary.file_path)
+        else:
+            progress["failed_paths"].discard(file_summary.file_path)
+
+        checkpoint = progress.get("checkpoint")
+        if checkpoint is not None:
+            checkpoint.append(
                 file_summary,
                 relationships,
-            ) = await self._analyze_single_file_with_relationships(
-                file_path, i, len(files_to_analyze)
+                self.file_content_hashes.get(file_summary.file_path),
             )
-            file_summaries.append(file_summary)
-            all_relationships.extend(relationships)
 
-            # Add configured delay to avoid overwhelming the LLM API
-            await asyncio.sleep(self.request_delay)
+        if not progress["total_files"]:
+            return checkpoint is not None
+
+        progress["completed_files"] += 1
+        completed = progress["completed_files"]
+        total = progress["total_files"]
+        percent = min(100, int(completed * 100 / total))
+        if (
+            percent // 10 > progress["last_reported_percent"] // 10
+            or completed >= total
+        ):
+            progress["last_reported_percent"] = percent
+            self.logger.info(
+                f"[{progress['repo_name']}] {completed}/{total} files analyzed ({percent}%)"
+            )
+        self._emit_progress("analyzing")
+        return checkpoint is not None
+
+    def _build_import_graph(
+        self, repo_path: Path, all_files: List[Path]
+    ) -> Dict[str, List[str]]:
+        """Build the Python import graph of a repository, keyed like FileSummary paths"""
+        python_files = {}
+        for file_path in all_files:
+            if file_path.suffix != ".py":
+                continue
+            try:
+                if file_path.stat().st_size > self.max_file_size:
+                    continue
+                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                    python_files[str(file_path.relative_to(repo_path))] = f.read()
+            except (OSError, PermissionError):
+                continue
 
-        return file_summaries, all_relationships
+        repo_prefix = repo_path.relative_to(self.code_base_path)
+        return {
+            str(repo_prefix / source_path): [
+                str(repo_prefix / target_path) for target_path in target_paths
+            ]
+            for source_path, target_paths in self.static_analyzer.build_import_graph(
+                python_files
+            ).items()
+        }
 
-    async def _process_files_concurrently(self, files_to_analyze: list) -> tuple:
-        """Process files concurrently with semaphore limiting"""
-        file_summaries = []
-        all_relationships = []
+    async def _select_files_to_analyze(
+        self, repo_path: Path, file_tree: str, candidate_files: List[Path]
+    ) -> List[Path]:
+        """Apply optional LLM pre-filtering to a list of candidate files"""
+        if self.enable_pre_filtering:
+            self.logger.info("Using LLM for file pre-filtering...")
+            selected_file_paths = await self.pre_filter_files(repo_path, file_tree)
+        else:
+            self.logger.info("Pre-filtering is disabled, will analyze all files")
+            selected_file_paths = []
 
-        # Create semaphore to limit concurrent tasks
-        semaphore = asyncio.Semaphore(self.max_concurrent_files)
-        tasks = []
+        if selected_file_paths:
+            files_to_analyze = self.filter_files_by_paths(
+                candidate_files, selected_file_paths, repo_path
+            )
+            self.logger.info(
+                f"After LLM filtering, will analyze {len(files_to_analyze)} relevant files (from {len(candidate_files)} total)"
+            )
+        else:
+            files_to_analyze = candidate_files
+            self.logger.info("LLM filtering failed, will analyze all files")
 
-        async def _process_with_semaphore(file_path: Path, index: int, total: int):
-            async with semaphore:
-                # Add a small delay to space out concurrent requests
-                if index > 1:
-                    await asyncio.sleep(
-                        self.request_delay * 0.5
-                    )  # Reduced delay for concurrent processing
-                return await self._analyze_single_file_with_relationships(
-                    file_path, index, total
-                )
+        return files_to_analyze
+
+    def _get_index_output_path(self, repo_name: str) -> Path:
+        """Get the index JSON path for a repository"""
+        return self.output_dir / self.index_filename_pattern.format(repo_name=repo_name)
+
+    def _get_manifest_path(self, repo_name: str) -> Path:
+        """Get the manifest path stored next to the repository index"""
+        return self._get_index_output_path(repo_name).with_suffix(".manifest")
+
+    def _compute_file_hash(self, file_path: Path) -> str:
+        """Hash file content the same way analyze_file_content does"""
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read()
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _build_repo_manifest(
+        self,
+        repo_name: str,
+        all_files: List[Path],
+        analyzed_paths: set,
+        failed_paths: set = frozenset(),
+    ) -> Dict[str, Any]:
+        """
+        Snapshot the repository tree for the next incremental run
+
+        Files whose analysis failed are recorded as failed rather than analyzed
+        so the next run analyzes them again.
+        """
+        files = {}
+        for file_path in all_files:
+            relative_path = str(file_path.relative_to(self.code_base_path))
+            try:
+                stats = file_path.stat()
+                content_hash = self.file_content_hashes.get(
+                    relative_path
+                ) or self._compute_file_hash(file_path)
+            except (OSError, PermissionError):
+                continue
+
+            files[relative_path] = {
+                "mtime_ns": stats.st_mtime_ns,
+                "size": stats.st_size,
+                "sha256": content_hash,
+                "analyzed": relative_path in analyzed_paths,
+                "failed": relative_path in failed_paths,
+            }
+
+        return {
+            "repo_name": repo_name,
+            "created_at": datetime.now().isoformat(),
+            "relationship_fingerprint": self._relationship_fingerprint(),
+            "relationship_prescoring": self._relationship_prescoring_settings(),
+            "files": files,
+        }
+
+    def _save_repo_manifest(self, repo_name: str):
+        """Write the pending manifest for a repository after its index is saved"""
+        manifest = self._pending_manifests.pop(repo_name, None)
+        if manifest is None:
+            return
 
         try:
-            # Create tasks for all files
-            tasks = [
-                _process_with_semaphore(file_path, i, len(files_to_analyze))
-                for i, file_path in enumerate(files_to_analyze, 1)
+            with open(self._get_manifest_path(repo_name), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+        except Exception as e:
+            self.logger.warning(f"Failed to save manifest for {repo_name}: {e}")
+
+    def _load_incremental_state(self, repo_name: str) -> Optional[Dict[str, Any]]:
+        """Load the previous manifest and index if they can be reused"""
+        manifest_path = self._get_manifest_path(repo_name)
+        index_path = self._get_index_output_path(repo_name)
+        if not manifest_path.exists() or not index_path.exists():
+            return None
+
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            with open(index_path, "r", encoding="utf-8") as f:
+                index_data = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Failed to load previous index for {repo_name}: {e}")
+            return None
+
+        # Relationships depend on the target structure and relationship settings
+        if (
+            manifest.get("relationship_fingerprint") != self._relationship_fingerprint()
+            or manifest.get("relationship_prescoring")
+            != self._relationship_prescoring_settings()
+        ):
+            self.logger.info(
+                f"Target structure or analysis settings changed for {repo_name}, full re-index required"
+            )
+            return None
+
+        return {"manifest": manifest, "index": index_data}
+
+    async def _plan_incremental_update(
+        self,
+        repo_path: Path,
+        file_tree: str,
+        all_files: List[Path],
+        previous_state: Dict[str, Any],
+    ) -> tuple:
+        """
+        Diff the repository tree against the previous manifest
+
+        Returns:
+            (files_to_analyze, reused_summaries, reused_relationships, incremental_stats)
+        """
+        previous_files = previous_state["manifest"].get("files", {})
+        index_data = previous_state["index"]
+        previous_summaries = {
+            summary_data["file_path"]: summary_data
+            for summary_data in index_data.get("file_summaries", [])
+        }
+
+        unchanged, modified, added = [], [], []
+        current_paths = set()
+        for file_path in all_files:
+            relative_path = str(file_path.relative_to(self.code_base_path))
+            current_paths.add(relative_path)
+            previous_entry = previous_files.get(relative_path)
+            if previous_entry is None:
+                added.append(file_path)
+                continue
+
+            try:
+                stats = file_path.stat()
+                if (
+                    stats.st_mtime_ns == previous_entry.get("mtime_ns")
+                    and stats.st_size == previous_entry.get("size")
+                ) or self._compute_file_hash(file_path) == previous_entry.get("sha256"):
+                    self.file_content_hashes[relative_path] = previous_entry["sha256"]
+                    unchanged.append(file_path)
+                else:
+                    modified.append(file_path)
+            except (OSError, PermissionError):
+                modified.append(file_path)
+
+        deleted = [path for path in previous_files if path not in current_paths]
+
+        # Files excluded by pre-filtering last time stay excluded unless newly
+        # added; unchanged files whose analysis failed are analyzed again
+        reused_summaries = {}
+        retried = []
+        for file_path in unchanged:
+            relative_path = str(file_path.relative_to(self.code_base_path))
+            if relative_path in previous_summaries:
+                file_summary = FileSummary(**previous_summaries[relative_path])
+                if self._is_failed_summary(file_summary):
+                    retried.append(file_path)
+                else:
+                    reused_summaries[relative_path] = file_summary
+
+        files_to_analyze = list(retried)
+        for file_path in modified:
+            previous_entry = previous_files[
+                str(file_path.relative_to(self.code_base_path))
             ]
+            if previous_entry.get("analyzed") or previous_entry.get("failed"):
+                files_to_analyze.append(file_path)
+        if added:
+            files_to_analyze.extend(
+                await self._select_files_to_analyze(repo_path, file_tree, added)
+            )
 
-            # Process tasks and collect results
-            if self.verbose_output:
-                self.logger.info(
-                    f"Starting concurrent analysis of {len(tasks)} files..."
-                )
+        reused_relationships = [
+            FileRelationship(**rel_data)
+            for rel_data in index_data.get("relationships", [])
+            if rel_data.get("repo_file_path") in reused_summaries
+        ]
+
+        incremental_stats = {
+            "mode": "incremental",
+            "added_files": len(added),
+            "modified_files": len(modified),
+            "deleted_files": len(deleted),
+            "unchanged_files": len(unchanged),
+            "retried_failed_files": len(retried),
+            "reused_summaries": len(reused_summaries),
+            "reused_relationships": len(reused_relationships),
+            "files_reanalyzed": len(files_to_analyze),
+        }
+        self.logger.info(
+            f"Incremental update: {len(added)} added, {len(modified)} modified, "
+            f"{len(deleted)} deleted, {len(unchanged)} unchanged - re-analyzing {len(files_to_analyze)} files"
+        )
+
+        return (
+            files_to_analyze,
+            reused_summaries,
+            reused_relationships,
+            incremental_stats,
+        )
+
+    @staticmethod
+    def _is_failed_summary(file_summary: FileSummary) -> bool:
+        """Whether a summary records a failed analysis rather than a result"""
+        return (
+            file_summary.file_type == "error"
+            or file_summary.summary == ANALYSIS_FAILED_SUMMARY
+        )
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Rough token estimate (about 4 characters per token)"""
+        return len(text) // 4 + 1
+
+    def _plan_analysis_batches(self, analysis_contexts: List[Dict[str, Any]]) -> tuple:
+        """
+        Pack files into batches that fit the configured token budget
 
+        Returns:
+            (batches, oversized_contexts) - oversized files do not fit in a batch
+            together with the shared prompt and are analyzed individually
+        """
+        prompt_overhead = self._estimate_tokens(self.target_structure or "") + 600
+        content_budget = self.batch_token_budget - prompt_overhead
+
+        batches = []
+        oversized_contexts = []
+        current_batch = []
+        current_tokens = 0
+        for analysis_context in analysis_contexts:
+            file_tokens = (
+                self._estimate_tokens(self._get_content_for_analysis(analysis_context))
+                + 30
+            )
+            if file_tokens > content_budget:
+                oversized_contexts.append(analysis_context)
+                continue
+
+            if current_batch and (
+                current_tokens + file_tokens > content_budget
+                or len(current_batch) >= self.batch_max_files
+            ):
+                batches.append(current_batch)
+                current_batch = []
+                current_tokens = 0
+
+            current_batch.append(analysis_context)
+            current_tokens += file_tokens
+
+        if current_batch:
+            batches.append(current_batch)
+
+        return batches, oversized_contexts
+
+    async def _analyze_batch(self, batch: List[Dict[str, Any]]) -> Dict[str, tuple]:
+        """
+        Summarize several files and find their relationships in one LLM request
+
+        Returns:
+            Mapping of relative file path to (file_summary, relationships) for the
+            files that the response covered; missing files are left to the caller
+        """
+        file_sections = []
+        # Files pre-scored as unrelated to the target structure get no relationships
+        skip_relationships = set()
+        for i, analysis_context in enumerate(batch, 1):
+            static_facts = analysis_context.get("static_facts")
+            facts_block = (
+                f"Definitions: {', '.join(static_facts['main_functions']) or 'none'}\n"
+                f"Imports: {', '.join(static_facts['dependencies']) or 'none'}\n"
+                if static_facts
+                else "Static facts: unavailable\n"
+            )
+            if self._prescore_skips_relationships(
+                analysis_context["relative_path"],
+                static_facts["main_functions"] if static_facts else [],
+            ):
+                skip_relationships.add(analysis_context["relative_path"])
+                facts_block += "Relationships: not needed\n"
+            file_sections.append(
+                f"=== FILE F{i}: {analysis_context['relative_path']} ===\n"
+                f"{facts_block}"
+                f"```\n{self._get_content_for_analysis(analysis_context)}\n```"
+            )
+        files_block = "\n\n".join(file_sections)
+
+        batch_prompt = f"""
+        Analyze each of the following code files and relate it to the target project structure.
+
+        Target Project Structure:
+        {self.target_structure}
+
+        Available relationship types (with priority weights):
+        {self._get_relationship_type_description()}
+
+        Files:
+        {files_block}
+
+        For EVERY file above, return one entry in this JSON format:
+        {{
+            "files": [
+                {{
+                    "file_id": "F1",
+                    "key_concepts": ["important", "concepts", "algorithms", "patterns"],
+                    "summary": "2-3 sentence summary of what this file does",
+                    "file_type": "only if static facts are unavailable: what type of file this is",
+                    "main_functions": ["only", "if", "static", "facts", "are", "unavailable"],
+                    "dependencies": ["only", "if", "static", "facts", "are", "unavailable"],
+                    "relationships": [
+                        {{
+                            "target_file_path": "path/in/target/structure",
+                            "relationship_type": "direct_match|partial_match|reference|utility",
+                            "confidence_score": 0.0-1.0,
+                            "helpful_aspects": ["specific", "aspects", "that", "could", "help"],
+                            "potential_contributions": ["how", "this", "could", "contribute"],
+                            "usage_suggestions": "detailed suggestion on how to use this file"
+                        }}
+                    ]
+                }}
+            ]
+        }}
+
+        For files marked "Relationships: not needed", return an empty "relationships" list.
+        Consider the priority weights when determining relationship types. Higher weight types should be preferred when multiple types apply.
+        Only include relationships with confidence > {self.min_confidence_score}. Focus on concrete, actionable connections.
+        """
+
+        llm_response = await self._call_llm(
+            batch_prompt,
+            max_tokens=min(self.batch_max_output_tokens, 500 + 700 * len(batch)),
+        )
+
+        try:
+            match = re.search(r"\{.*\}", llm_response, re.DOTALL)
+            batch_data = json.loads(match.group(0))
+        except (AttributeError, json.JSONDecodeError) as e:
+            self.logger.warning(
+                f"Failed to parse batched analysis of {len(batch)} files: {e}"
+            )
+            return {}
+
+        contexts_by_id = {f"F{i}": ctx for i, ctx in enumerate(batch, 1)}
+        results = {}
+        for file_data in batch_data.get("files", []):
+            analysis_context = contexts_by_id.pop(str(file_data.get("file_id")), None)
+            if analysis_context is None:
+                continue
+
+            skipped = analysis_context["relative_path"] in skip_relationships
             try:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                file_summary = self._build_file_summary(analysis_context, file_data)
+                relationships = (
+                    []
+                    if skipped
+                    else self._parse_relationships(
+                        file_summary, file_data.get("relationships", [])
+                    )
+                )
+            except (TypeError, ValueError) as e:
+                self.logger.warning(
+                    f"Invalid batched result for {analysis_context['relative_path']}: {e}"
+                )
+                continue
 
-                for i, result in enumerate(results):
-                    if isinstance(result, Exception):
-                        self.logger.error(
-                            f"Failed to analyze file {files_to_analyze[i]}: {result}"
-                        )
-                        # Create error summary
-                        error_summary = FileSummary(
-                            file_path=str(
-                                files_to_analyze[i].relative_to(self.code_base_path)
-                            ),
-                            file_type="error",
-                            main_functions=[],
-                            key_concepts=[],
-                            dependencies=[],
-                            summary=f"Concurrent analysis failed: {str(result)}",
-                            lines_of_code=0,
-                            last_modified="",
-                        )
-                        file_summaries.append(error_summary)
-                    else:
-                        file_summary, relationships = result
-                        file_summaries.append(file_summary)
-                        all_relationships.extend(relationships)
+            self._store_file_summary(analysis_context, file_summary, True)
+            if not skipped:
+                self._store_relationships(
+                    self._get_relationship_cache_key(file_summary), relationships
+                )
+            results[analysis_context["relative_path"]] = (file_summary, relationships)
+
+        return results
+
+    async def _process_files_batched(self, files_to_analyze: list) -> tuple:
+        """Process files by packing small files into shared LLM requests"""
+        results = {}
+        cached_summaries = []
+        pending_contexts = []
+        individual_files = []
 
+        # Resolve skipped and cached files first; only the rest needs the LLM
+        # for summaries (cached files may still need it for relationships)
+        for file_path in files_to_analyze:
+            try:
+                file_summary, analysis_context = self._prepare_file_analysis(file_path)
             except Exception as e:
-                self.logger.error(f"Concurrent processing failed: {e}")
-                # Cancel any remaining tasks
-                for task in tasks:
-                    if not task.done() and not task.cancelled():
-                        task.cancel()
+                self.logger.error(f"Error preparing file {file_path}: {e}")
+                individual_files.append(file_path)
+                continue
 
-                # Wait for cancelled tasks to complete
-                try:
-                    await asyncio.sleep(0.1)  # Brief wait for cancellation
-                except Exception:
-                    pass
+            if file_summary is not None:
+                cached_summaries.append(file_summary)
+            else:
+                pending_contexts.append(analysis_context)
 
-                # Fallback to sequential processing
-                self.logger.info("Falling back to sequential processing...")
-                return await self._process_files_sequentially(files_to_analyze)
+        batches, oversized_contexts = self._plan_analysis_batches(pending_contexts)
+        individual_files.extend(ctx["file_path"] for ctx in oversized_contexts)
 
-            if self.verbose_output:
-                self.logger.info(
-                    f"Concurrent analysis completed: {len(file_summaries)} files processed"
+        self.logger.info(
+            f"Batched analysis: {len(pending_contexts) - len(oversized_contexts)} files "
+            f"in {len(batches)} requests, {len(individual_files)} files analyzed individually, "
+            f"{len(cached_summaries)} files resolved from cache"
+        )
+
+        # Batches and the relationship calls of cached files are paced by the
+        # shared rate limiter when running concurrently
+        concurrency = (
+            self._get_rate_limiter().max_concurrency
+            if self.enable_concurrent_analysis
+            else 1
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run_batch(batch: List[Dict[str, Any]]) -> Dict[str, tuple]:
+            async with semaphore:
+                try:
+                    batch_result = await self._analyze_batch(batch)
+                finally:
+                    if not self.enable_concurrent_analysis:
+                        await asyncio.sleep(self.request_delay)
+            for relative_path, (file_summary, relationships) in list(
+                batch_result.items()
+            ):
+                if self._record_file_result(file_summary, relationships):
+                    batch_result[relative_path] = None
+            return batch_result
+
+        async def _run_cached(file_summary: FileSummary) -> tuple:
+            async with semaphore:
+                relationships = await self.find_relationships(file_summary)
+            if self._record_file_result(file_summary, relationships):
+                return file_summary.file_path, None
+            return file_summary.file_path, (file_summary, relationships)
+
+        cached_results, batch_results = await asyncio.gather(
+            asyncio.gather(*[_run_cached(summary) for summary in cached_summaries]),
+            asyncio.gather(
+                *[_run_batch(batch) for batch in batches], return_exceptions=True
+            ),
+        )
+        results.update(cached_results)
+        for batch, batch_result in zip(batches, batch_results):
+            if isinstance(batch_result, Exception):
+                self.logger.error(f"Batched analysis failed: {batch_result}")
+                batch_result = {}
+            results.update(batch_result)
+
+            # Files missing from the batched response are retried one by one
+            individual_files.extend(
+                ctx["file_path"]
+                for ctx in batch
+                if ctx["relative_path"] not in batch_result
+            )
+
+        if individual_files:
+            process_individually = (
+                self._process_files_concurrently
+                if self.enable_concurrent_analysis
+                else self._process_files_sequentially
+            )
+            (
+                fallback_summaries,
+                fallback_relationships,
+            ) = await process_individually(individual_files)
+            for file_summary in fallback_summaries:
+                results[file_summary.file_path] = (
+                    file_summary,
+                    [
+                        r
+                        for r in fallback_relationships
+                        if r.repo_file_path == file_summary.file_path
+                    ],
                 )
 
-            return file_summaries, all_relationships
+        # Keep results in the original file order; checkpointed ones are None
+        file_summaries = []
+        all_relationships = []
+        for file_path in files_to_analyze:
+            relative_path = str(file_path.relative_to(self.code_base_path))
+            if results.get(relative_path) is not None:
+                file_summary, relationships = results[relative_path]
+                file_summaries.append(file_summary)
+                all_relationships.extend(relationships)
+
+        return file_summaries, all_relationships
+
+    async def _analyze_file_or_error(
+        self, file_path: Path, index: int, total: int
+    ) -> tuple:
+        """
+        Analyze a file and its relationships, turning a failure into an error summary
 
+        Failed LLM calls are already retried by _call_llm, so a failing file
+        is not analyzed again here; one file's failure never affects the others.
+        """
+        try:
+            return await self._analyze_single_file_with_relationships(
+                file_path, index, total
+            )
         except Exception as e:
-            # Ensure all tasks are cancelled in case of unexpected errors
-            if tasks:
-                for task in tasks:
-                    if not task.done() and not task.cancelled():
-                        task.cancel()
+            self.logger.error(f"Failed to analyze file {file_path}: {e}")
+            file_summary = FileSummary(
+                file_path=str(file_path.relative_to(self.code_base_path)),
+                file_type="error",
+                main_functions=[],
+                key_concepts=[],
+                dependencies=[],
+                summary=f"Analysis failed: {e}",
+                lines_of_code=0,
+                last_modified="",
+            )
+            return file_summary, []
 
-            # Wait briefly for cancellation to complete
-            try:
-                await asyncio.sleep(0.1)
-            except Exception:
-                pass
+    async def _process_files_sequentially(self, files_to_analyze: list) -> tuple:
+        """Process files sequentially (original method)"""
+        file_summaries = []
+        all_relationships = []
+
+        for i, file_path in enumerate(files_to_analyze, 1):
+            file_summary, relationships = await self._analyze_file_or_error(
+                file_path, i, len(files_to_analyze)
+            )
+            if not self._record_file_result(file_summary, relationships):
+                file_summaries.append(file_summary)
+                all_relationships.extend(relationships)
+
+            # Add configured delay to avoid overwhelming the LLM API
+            await asyncio.sleep(self.request_delay)
+
+        return file_summaries, all_relationships
+
+    async def _process_files_concurrently(self, files_to_analyze: list) -> tuple:
+        """
+        Process files concurrently
 
-            self.logger.error(f"Critical error in concurrent processing: {e}")
-            # Fallback to sequential processing
+        LLM calls are paced by the shared rate limiter, whose AIMD concurrency
+        limit adapts to the provider; a failed file only gets an error summary.
+        """
+        file_summaries = []
+        all_relationships = []
+
+        # Bound the number of files held in memory to the limiter's ceiling
+        file_semaphore = asyncio.Semaphore(self._get_rate_limiter().max_concurrency)
+
+        async def _process_with_semaphore(file_path: Path, index: int, total: int):
+            async with file_semaphore:
+                result = await self._analyze_file_or_error(file_path, index, total)
+            # Checkpointed results are not kept until every file is done
+            return None if self._record_file_result(*result) else result
+
+        if self.verbose_output:
             self.logger.info(
-                "Falling back to sequential processing due to critical error..."
+                f"Starting concurrent analysis of {len(files_to_analyze)} files..."
             )
-            return await self._process_files_sequentially(files_to_analyze)
 
-        finally:
-            # Final cleanup: ensure all tasks are properly finished
-            if tasks:
-                for task in tasks:
-                    if not task.done() and not task.cancelled():
-                        task.cancel()
+        results = await asyncio.gather(
+            *[
+                _process_with_semaphore(file_path, i, len(files_to_analyze))
+                for i, file_path in enumerate(files_to_analyze, 1)
+            ]
+        )
 
-            # Clear task references to help with garbage collection
-            tasks.clear()
+        for result in results:
+            if result is not None:
+                file_summaries.append(result[0])
+                all_relationships.extend(result[1])
 
-            # Force garbage collection to help clean up semaphore and related resources
-            import gc
+        if self.verbose_output:
+            self.logger.info(
+                f"Concurrent analysis completed: {len(files_to_analyze)} files processed, "
+                f"limiter state: {self._get_rate_limiter().get_statistics()}"
+            )
 
-            gc.collect()
+        return file_summaries, all_relationships
 
     async def build_all_indexes(self) -> Dict[str, str]:
         """Build indexes for all repositories in code_base"""
@@ -1205,56 +3388,33 @@ class CodeIndexer:
 
         self.logger.info(f"Found {len(repo_dirs)} repositories to process")
 
-        # Process each repository
-        output_files = {}
-        statistics_data = []
-
-        for repo_dir in repo_dirs:
-            try:
-                # Process repository
-                repo_index = await self.process_repository(repo_dir)
-
-                # Generate output filename using configured pattern
-                output_filename = self.index_filename_pattern.format(
-                    repo_name=repo_index.repo_name
-                )
-                output_file = self.output_dir / output_filename
-
-                # Get output configuration
-                output_config = self.indexer_config.get("output", {})
-                json_indent = output_config.get("json_indent", 2)
-                ensure_ascii = not output_config.get("ensure_ascii", False)
-
-                # Save to JSON file
-                with open(output_file, "w", encoding="utf-8") as f:
-                    if self.include_metadata:
-                        json.dump(
-                            asdict(repo_index),
-                            f,
-                            indent=json_indent,
-                            ensure_ascii=ensure_ascii,
-                        )
-                    else:
-                        # Save without metadata if disabled
-                        index_data = asdict(repo_index)
-                        index_data.pop("analysis_metadata", None)
-                        json.dump(
-                            index_data, f, indent=json_indent, ensure_ascii=ensure_ascii
-                        )
+        # Process repositories; in parallel mode they share the global LLM
+        # rate limiter, so total concurrency stays within the provider budget
+        if self.enable_parallel_repositories and len(repo_dirs) > 1:
+            self.logger.info(
+                f"Processing up to {self.max_concurrent_repositories} repositories in parallel"
+            )
+            repo_semaphore = asyncio.Semaphore(max(1, self.max_concurrent_repositories))
 
-                output_files[repo_index.repo_name] = str(output_file)
-                self.logger.info(
-                    f"Saved index for {repo_index.repo_name} to {output_file}"
-                )
+            async def _index_with_semaphore(repo_dir: Path):
+                async with repo_semaphore:
+                    return await self._index_repository(repo_dir)
 
-                # Collect statistics for report
-                if self.generate_statistics:
-                    stats = self._extract_repository_statistics(repo_index)
-                    statistics_data.append(stats)
+            results = await asyncio.gather(
+                *[_index_with_semaphore(repo_dir) for repo_dir in repo_dirs]
+            )
+        else:
+            results = [await self._index_repository(repo_dir) for repo_dir in repo_dirs]
 
-            except Exception as e:
-                self.logger.error(f"Failed to process repository {repo_dir.name}: {e}")
+        output_files = {}
+        statistics_data = []
+        for result in results:
+            if result is None:
                 continue
+            repo_name, output_file, stats = result
+            output_files[repo_name] = output_file
+            if stats is not None:
+                statistics_data.append(stats)
 
         # Generate additional reports if configured
         if self.generate_summary:
@@ -1265,8 +3425,85 @@ class CodeIndexer:
             stats_path = self.generate_statistics_report(statistics_data)
             self.logger.info(f"Generated statistics report: {stats_path}")
 
+        if self.build_semantic_index and output_files:
+            self._build_semantic_index()
+
         return output_files
 
+    def _build_semantic_index(self):
+        """Precompute semantic search vectors for the written indexes"""
+        try:
+            from tools.code_reference_indexer import build_semantic_indexes
+
+            result = build_semantic_indexes(str(self.output_dir))
+        except Exception as e:
+            self.logger.warning(f"Failed to build semantic index: {e}")
+            return
+        if result.get("status") == "success":
+            self.logger.info(
+                f"Built semantic index: {result['total_vectors']} vectors "
+                f"({result['encoder']}) in {result['build_time_ms']:.0f} ms"
+            )
+        else:
+            self.logger.warning(f"Semantic index not built: {result.get('message')}")
+
+    async def _index_repository(self, repo_dir: Path) -> Optional[tuple]:
+        """
+        Process one repository and save its index
+
+        Returns:
+            (repo_name, output_file, statistics) or None if processing failed
+        """
+        try:
+            # Process repository
+            repo_index = await self.process_repository(repo_dir)
+
+            # Generate output filename using configured pattern
+            output_file = self._get_index_output_path(repo_index.repo_name)
+
+            # Get output configuration
+            output_config = self.indexer_config.get("output", {})
+            json_indent = output_config.get("json_indent", 2)
+            ensure_ascii = not output_config.get("ensure_ascii", False)
+
+            # Save to JSON file, streaming checkpointed results; write to a
+            # temporary file first so an interrupted write never leaves a
+            # truncated index behind
+            fields = [
+                name
+                for name in RepoIndex.__dataclass_fields__
+                # Save without metadata if disabled
+                if self.include_metadata or name != "analysis_metadata"
+            ]
+            temp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+            with open(temp_file, "w", encoding="utf-8") as f:
+                write_repo_index(f, repo_index, json_indent, ensure_ascii, fields)
+            os.replace(temp_file, output_file)
+
+            # Collect statistics for report while the checkpoint still exists
+            stats = None
+            if self.generate_statistics:
+                stats = self._extract_repository_statistics(repo_index)
+
+            # The checkpoint is compacted into the final index
+            progress = _REPO_PROGRESS.get()
+            if progress is not None and progress.get("checkpoint") is not None:
+                progress["checkpoint"].remove()
+
+            self._save_repo_manifest(repo_index.repo_name)
+            self.logger.info(f"Saved index for {repo_index.repo_name} to {output_file}")
+            self._emit_progress("saved", output_file=str(output_file))
+
+            return repo_index.repo_name, str(output_file), stats
+
+        except Exception as e:
+            self.logger.error(f"Failed to process repository {repo_dir.name}: {e}")
+            progress = _REPO_PROGRESS.get()
+            if progress is not None and progress.get("checkpoint") is not None:
+                progress["checkpoint"].close()
+            self._emit_progress("failed", error=str(e))
+            return None
+
     def _extract_repository_statistics(self, repo_index: RepoIndex) -> Dict[str, Any]:
         """Extract statistical information from a repository index"""
         metadata = repo_index.analysis_metadata
@@ -1362,6 +3599,10 @@ class CodeIndexer:
                 "config_file": self.indexer_config_path,
                 "concurrent_analysis_enabled": self.enable_concurrent_analysis,
                 "content_caching_enabled": self.enable_content_caching,
+                "persistent_cache_enabled": self.enable_persistent_cache,
+                "incremental_indexing_enabled": self.enable_incremental_indexing,
+                "batched_analysis_enabled": self.enable_batched_analysis,
+                "static_analysis_enabled": self.enable_static_analysis,
                 "pre_filtering_enabled": self.enable_pre_filtering,
                 "min_confidence_score": self.min_confidence_score,
                 "high_confidence_threshold": self.high_confidence_threshold,
@@ -1393,7 +3634,14 @@ class CodeIndexer:
                     "repositories_with_caching": sum(
                         1 for s in statistics_data if s.get("cache_hits", 0) > 0
                     ),
+                    "persistent_cache": self.persistent_cache.get_statistics()
+                    if self.persistent_cache is not None
+                    else None,
                 },
+                "rate_limiter": self.rate_limiter.get_statistics()
+                if self.rate_limiter is not None
+                else None,
+                "relationship_prescoring": self.get_relationship_prescore_statistics(),
                 "filtering_efficiency": {
                     "average_filtering_efficiency": round(
                         sum(s.get("filtering_efficiency", 0) for s in statistics_data)
@@ -1582,6 +3830,11 @@ async def main():
         # Performance information
         if indexer.enable_content_caching and indexer.content_cache:
             print(f"🗄️  Cache performance: {len(indexer.content_cache)} items cached")
+        if indexer.persistent_cache is not None:
+            cache_stats = indexer.persistent_cache.get_statistics()
+            print(
+                f"💾 Persistent cache: {cache_stats['total_entries']} entries, hit rate {cache_stats['hit_rate']:.1%}"
+            )
 
         print("\n🎉 Code indexing process completed successfully!")
 
@@ -1627,6 +3880,8 @@ def print_usage_example():
     4. Enable caching:
        - Set performance.enable_content_caching: true
        - Adjust performance.max_cache_size as needed
+       - Persistent cache across runs: performance.enable_persistent_cache: true
+       - Share it across papers with performance.persistent_cache_path
 
     5. Mock mode for testing:
        - Set debug.mock_llm_responses: true
@@ -15,14 +15,33 @@ Key Improvement:
 - Single tool call that handles all steps internally
 - Agent only needs to provide indexes_path and target_file
 - No dependency on calling order or global state management
+- Index files are loaded once per directory and reloaded only when they change
 """
 
+import hashlib
+import heapq
 import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from array import array
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
 import logging
 
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # Import MCP modules
 from mcp.server.fastmcp import FastMCP
 
@@ -33,6 +52,14 @@ logger = logging.getLogger(__name__)
 # Create FastMCP server instance
 mcp = FastMCP("code-reference-indexer")
 
+# Search tokenization: words are split on non-alphanumerics (covers snake_case),
+# identifier parts on case changes (covers camelCase and acronyms)
+WORD_PATTERN = re.compile(r"[^\W_]+")
+IDENTIFIER_PART_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# Share of the relevance score given to references with the target's extension
+SAME_EXTENSION_BOOST = 0.15
+
 
 @dataclass
 class CodeReference:
@@ -63,7 +90,7 @@ class RelationshipInfo:
 
 
 def load_index_files_from_directory(indexes_directory: str) -> Dict[str, Dict]:
-    """Load all index files from specified directory"""
+    """Load all index files from specified directory (compact copies when up to date)"""
     indexes_path = Path(indexes_directory).resolve()
 
     if not indexes_path.exists():
@@ -72,12 +99,10 @@ def load_index_files_from_directory(indexes_directory: str) -> Dict[str, Dict]:
 
     index_cache = {}
 
-    for index_file in indexes_path.glob("*.json"):
+    for stem, index_file in select_index_files(indexes_path).items():
         try:
-            with open(index_file, "r", encoding="utf-8") as f:
-                index_data = json.load(f)
-                index_cache[index_file.stem] = index_data
-                logger.info(f"Loaded index file: {index_file.name}")
+            index_cache[stem] = load_index_file(index_file)
+            logger.info(f"Loaded index file: {index_file.name}")
         except Exception as e:
             logger.error(f"Failed to load index file {index_file.name}: {e}")
 
@@ -132,7 +157,7 @@ def extract_relationships(index_data: Dict) -> List[RelationshipInfo]:
 def calculate_relevance_score(
     target_file: str, reference: CodeReference, keywords: List[str] = None
 ) -> float:
-    """Calculate relevance score between reference code and target file"""
+    """Calculate relevance score between reference code and target file (legacy scorer)"""
     score = 0.0
 
     # File name similarity
@@ -172,13 +197,222 @@ def calculate_relevance_score(
     return min(score, 1.0)
 
 
+def tokenize_for_search(text: str) -> List[str]:
+    """Split text into lowercase search tokens, breaking camelCase and snake_case identifiers"""
+    tokens = []
+    for word in WORD_PATTERN.findall(text or ""):
+        lowered = word.lower()
+        parts = IDENTIFIER_PART_PATTERN.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+            # Keep the whole identifier so exact identifier matches rank higher
+            tokens.append(lowered)
+        else:
+            tokens.append(lowered)
+    return tokens
+
+
+def build_reference_document(reference: CodeReference) -> List[str]:
+    """Tokenize a reference for ranking; file name and key concepts count double"""
+    name_tokens = tokenize_for_search(Path(reference.file_path).stem)
+    concept_tokens = tokenize_for_search(" ".join(reference.key_concepts))
+    return (
+        name_tokens * 2
+        + concept_tokens * 2
+        + tokenize_for_search(" ".join(reference.main_functions))
+        + tokenize_for_search(reference.summary)
+        + tokenize_for_search(reference.file_type)
+    )
+
+
+def build_reference_query(
+    target_file: str, keywords: List[str] = None
+) -> Dict[str, float]:
+    """Build weighted query terms from the target file path and keywords"""
+    query_weights: Dict[str, float] = {}
+    target_path = Path(target_file)
+    for token in tokenize_for_search(target_path.stem):
+        query_weights[token] = query_weights.get(token, 0.0) + 1.0
+    # Directory names are weak hints (e.g. "models", "utils")
+    for token in tokenize_for_search(" ".join(target_path.parent.parts)):
+        query_weights.setdefault(token, 0.3)
+    for keyword in keywords or []:
+        for token in tokenize_for_search(keyword):
+            query_weights[token] = query_weights.get(token, 0.0) + 1.0
+    return query_weights
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over tokenized documents
+
+    Per-posting term weights are precomputed at build time, so a query only
+    sums idf-weighted postings of its terms; with NumPy available the
+    accumulation is vectorized.
+    """
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(documents)
+        doc_lengths = [len(tokens) for tokens in documents]
+        avg_doc_length = (sum(doc_lengths) / self.num_docs) if self.num_docs else 1.0
+        avg_doc_length = avg_doc_length or 1.0
+
+        term_frequencies: Dict[str, Dict[int, int]] = {}
+        for doc_id, tokens in enumerate(documents):
+            for token in tokens:
+                doc_counts = term_frequencies.setdefault(token, {})
+                doc_counts[doc_id] = doc_counts.get(doc_id, 0) + 1
+
+        self.idf: Dict[str, float] = {}
+        self.postings: Dict[str, Tuple] = {}
+        for token, doc_counts in term_frequencies.items():
+            document_frequency = len(doc_counts)
+            self.idf[token] = math.log(
+                1
+                + (self.num_docs - document_frequency + 0.5)
+                / (document_frequency + 0.5)
+            )
+            doc_ids = list(doc_counts.keys())
+            weights = [
+                tf
+                * (k1 + 1)
+                / (tf + k1 * (1 - b + b * doc_lengths[doc_id] / avg_doc_length))
+                for doc_id, tf in doc_counts.items()
+            ]
+            if NUMPY_AVAILABLE:
+                self.postings[token] = (
+                    np.array(doc_ids, dtype=np.int64),
+                    np.array(weights, dtype=np.float64),
+                )
+            else:
+                self.postings[token] = (doc_ids, weights)
+
+    def max_score(self, query_weights: Dict[str, float]) -> float:
+        """Upper bound of a document score for the query (used for normalization)"""
+        return sum(
+            self.idf[token] * (self.k1 + 1) * weight
+            for token, weight in query_weights.items()
+            if token in self.idf
+        )
+
+    def top_k(
+        self,
+        query_weights: Dict[str, float],
+        k: int,
+        boost_ids: Optional[Set[int]] = None,
+        boost: float = 0.0,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return the k best (doc_id, relevance) pairs with relevance in [0, 1]
+
+        Relevance is the BM25 score normalized by max_score, scaled to leave
+        room for an optional boost of matching documents in boost_ids.
+        """
+        upper_bound = self.max_score(query_weights)
+        if upper_bound <= 0 or k <= 0:
+            return []
+        scale = (1.0 - boost) / upper_bound
+
+        if NUMPY_AVAILABLE:
+            scores = np.zeros(self.num_docs, dtype=np.float64)
+            for token, weight in query_weights.items():
+                posting = self.postings.get(token)
+                if posting is not None:
+                    scores[posting[0]] += self.idf[token] * weight * posting[1]
+            matched_ids = np.flatnonzero(scores)
+            if matched_ids.size == 0:
+                return []
+            relevance = scores[matched_ids] * scale
+            if boost_ids:
+                relevance += boost * np.fromiter(
+                    (doc_id in boost_ids for doc_id in matched_ids.tolist()),
+                    dtype=np.float64,
+                    count=matched_ids.size,
+                )
+            candidates = zip(relevance.tolist(), matched_ids.tolist())
+        else:
+            scores: Dict[int, float] = {}
+            for token, weight in query_weights.items():
+                posting = self.postings.get(token)
+                if posting is None:
+                    continue
+                term_weight = self.idf[token] * weight
+                for doc_id, posting_weight in zip(*posting):
+                    scores[doc_id] = (
+                        scores.get(doc_id, 0.0) + term_weight * posting_weight
+                    )
+            candidates = (
+                (
+                    score * scale
+                    + (boost if boost_ids and doc_id in boost_ids else 0.0),
+                    doc_id,
+                )
+                for doc_id, score in scores.items()
+            )
+
+        # Heap-based top-k; ties go to the earlier document
+        top_results = heapq.nsmallest(
+            k, ((-score, doc_id) for score, doc_id in candidates)
+        )
+        return [
+            (doc_id, round(min(-neg_score, 1.0), 4))
+            for neg_score, doc_id in top_results
+        ]
+
+
+def rank_references(
+    bm25_index: BM25Index,
+    references: List[CodeReference],
+    target_file: str,
+    keywords: List[str] = None,
+    max_results: int = 10,
+    extension_ids: Optional[Set[int]] = None,
+) -> List[Tuple[CodeReference, float]]:
+    """Rank references for a target file with BM25, boosting same-extension files"""
+    query_weights = build_reference_query(target_file, keywords)
+    return [
+        (references[doc_id], score)
+        for doc_id, score in bm25_index.top_k(
+            query_weights,
+            max_results,
+            boost_ids=extension_ids,
+            boost=SAME_EXTENSION_BOOST if extension_ids else 0.0,
+        )
+    ]
+
+
 def find_relevant_references_in_cache(
     target_file: str,
     index_cache: Dict[str, Dict],
     keywords: List[str] = None,
     max_results: int = 10,
 ) -> List[Tuple[CodeReference, float]]:
-    """Find reference code relevant to target file from provided cache"""
+    """Find reference code relevant to target file from provided cache (BM25 ranking)"""
+    references = []
+    for repo_name, index_data in index_cache.items():
+        references.extend(extract_code_references(index_data))
+
+    target_extension = Path(target_file).suffix
+    extension_ids = {
+        ref_id
+        for ref_id, ref in enumerate(references)
+        if Path(ref.file_path).suffix == target_extension
+    }
+    bm25_index = BM25Index([build_reference_document(ref) for ref in references])
+    return rank_references(
+        bm25_index, references, target_file, keywords, max_results, extension_ids
+    )
+
+
+def find_relevant_references_legacy(
+    target_file: str,
+    index_cache: Dict[str, Dict],
+    keywords: List[str] = None,
+    max_results: int = 10,
+) -> List[Tuple[CodeReference, float]]:
+    """Previous linear scan with calculate_relevance_score, kept for benchmarking"""
     all_references = []
 
     # Collect reference information from all index files
@@ -195,51 +429,501 @@ def find_relevant_references_in_cache(
     return all_references[:max_results]
 
 
-def find_direct_relationships_in_cache(
-    target_file: str, index_cache: Dict[str, Dict]
-) -> List[RelationshipInfo]:
-    """Find direct relationships with target file from provided cache"""
-    relationships = []
-
-    # Normalize target file path (remove common prefixes if exists)
+def _normalize_target_path(file_path: str) -> str:
+    """Normalize a target file path (remove common prefixes if exists)"""
     common_prefixes = ["src/", "core/", "lib/", "main/", "./"]
-    normalized_target = target_file.strip("/")
+    normalized_path = file_path.strip("/")
     for prefix in common_prefixes:
-        if normalized_target.startswith(prefix):
-            normalized_target = normalized_target[len(prefix) :]
+        if normalized_path.startswith(prefix):
+            normalized_path = normalized_path[len(prefix) :]
             break
+    return normalized_path
+
+
+def _target_path_parts(file_path: str) -> List[str]:
+    """Split a normalized target file path into components"""
+    normalized_path = _normalize_target_path(file_path.replace("\\", "/"))
+    return [part for part in normalized_path.split("/") if part and part != "."]
+
+
+# Match types of direct relationships, best first
+MATCH_TYPES = ("exact", "suffix", "basename")
+
+
+class RelationshipPathTrie:
+    """
+    Trie over reversed path components of normalized relationship targets
+
+    A lookup walks the query path from the file name upwards, so it costs
+    O(path depth) plus the number of matches:
+    - exact: same normalized path
+    - suffix: one path ends with the other at a component boundary
+      (e.g. "models/user.py" and "app/models/user.py")
+    - basename: only the file name matches, or one of the paths is a bare
+      file name
+    """
+
+    def __init__(self, relationships: List[RelationshipInfo]):
+        self.relationships = relationships
+        # Node: [children, ids of relationships whose path ends at this node]
+        self._root: List = [{}, []]
+        for rel_id, rel in enumerate(relationships):
+            node = self._root
+            for part in reversed(_target_path_parts(rel.target_file_path)):
+                node = node[0].setdefault(part, [{}, []])
+            node[1].append(rel_id)
+
+    def _subtree_ids(self, node: List) -> List[int]:
+        rel_ids = []
+        stack = list(node[0].values())
+        while stack:
+            current = stack.pop()
+            rel_ids.extend(current[1])
+            stack.extend(current[0].values())
+        return rel_ids
+
+    def lookup(self, target_file: str) -> List[Tuple[RelationshipInfo, str]]:
+        """Relationships matching the target file with their match type, best first"""
+        parts = _target_path_parts(target_file)
+        if not parts:
+            return []
+
+        matched: Dict[int, str] = {}
+        basename_node = self._root[0].get(parts[-1])
+        node = self._root
+        depth = 0
+        for part in reversed(parts):
+            node = node[0].get(part)
+            if node is None:
+                break
+            depth += 1
+            if depth < len(parts):
+                # Relationship path is a shorter suffix of the query path
+                for rel_id in node[1]:
+                    matched[rel_id] = "suffix" if depth > 1 else "basename"
+        else:
+            for rel_id in node[1]:
+                matched[rel_id] = "exact"
+            # Query path is a suffix of longer relationship paths
+            suffix_type = "suffix" if len(parts) > 1 else "basename"
+            for rel_id in self._subtree_ids(node):
+                matched[rel_id] = suffix_type
+
+        # Same file name in an unrelated directory
+        if basename_node is not None:
+            for rel_id in basename_node[1] + self._subtree_ids(basename_node):
+                matched.setdefault(rel_id, "basename")
+
+        match_rank = {match_type: rank for rank, match_type in enumerate(MATCH_TYPES)}
+        results = [
+            (self.relationships[rel_id], match_type)
+            for rel_id, match_type in matched.items()
+        ]
+        # Best match type first, then by confidence score
+        results.sort(key=lambda item: (match_rank[item[1]], -item[0].confidence_score))
+        return results
+
+
+def find_direct_relationships_in_cache(
+    target_file: str, index_cache: Dict[str, Dict]
+) -> List[Tuple[RelationshipInfo, str]]:
+    """Find direct relationships with target file from provided cache, with match types"""
+    relationships = []
 
     # Collect relationship information from all index files
     for repo_name, index_data in index_cache.items():
-        repo_relationships = extract_relationships(index_data)
-        for rel in repo_relationships:
-            # Normalize target file path in relationship
-            normalized_rel_target = rel.target_file_path.strip("/")
-            for prefix in common_prefixes:
-                if normalized_rel_target.startswith(prefix):
-                    normalized_rel_target = normalized_rel_target[len(prefix) :]
-                    break
-
-            # Check target file path matching (support multiple matching methods)
-            if (
-                normalized_target == normalized_rel_target
-                or normalized_target in normalized_rel_target
-                or normalized_rel_target in normalized_target
-                or target_file in rel.target_file_path
-                or rel.target_file_path in target_file
-            ):
-                relationships.append(rel)
+        relationships.extend(extract_relationships(index_data))
 
-    # Sort by confidence score
-    relationships.sort(key=lambda x: x.confidence_score, reverse=True)
+    return RelationshipPathTrie(relationships).lookup(target_file)
 
-    return relationships
+
+# ==================== Semantic Search ====================
+
+# Vectors of each index file are cached next to it as <stem>.semantic.npz
+SEMANTIC_INDEX_SUFFIX = ".semantic.npz"
+SEMANTIC_HASH_DIMENSIONS = 1024
+# Optional local sentence-transformers model (name or path); it is only loaded
+# from local files, otherwise the hashing vectorizer is used
+SEMANTIC_MODEL_ENV = "CODE_REFERENCE_EMBEDDING_MODEL"
+RANKING_MODES = ("bm25", "semantic", "hybrid")
+
+
+class SemanticEncoder:
+    """
+    Offline text encoder for semantic reference search
+
+    Uses a local sentence-transformers model when one is configured and
+    installed; otherwise a signed hashing vectorizer over words and character
+    trigrams, which also matches different forms of the same word
+    (e.g. "normalize" / "normalization"). Vectors are L2-normalized.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        dimensions: int = SEMANTIC_HASH_DIMENSIONS,
+    ):
+        self.dimensions = dimensions
+        self.model = None
+        self.name = f"hashing-{dimensions}-v1"
+        self._feature_buckets: Dict[str, int] = {}
+        if model_name:
+            try:
+                from sentence_transformers import SentenceTransformer
+
+                self.model = SentenceTransformer(
+                    model_name, device="cpu", local_files_only=True
+                )
+                self.name = f"model:{model_name}"
+            except Exception as e:
+                logger.warning(
+                    f"Embedding model {model_name} unavailable ({e}), using hashing vectorizer"
+                )
+
+    def _bucket(self, feature: str) -> int:
+        """Signed bucket of a feature (crc32 is stable across processes, unlike hash())"""
+        bucket = self._feature_buckets.get(feature)
+        if bucket is None:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            bucket = (digest % self.dimensions) + 1
+            if digest & 0x80000000:
+                bucket = -bucket
+            self._feature_buckets[feature] = bucket
+        return bucket
+
+    def _hash_vector(self, text: str, vector) -> None:
+        counts: Dict[str, float] = {}
+        for token in tokenize_for_search(text):
+            counts[token] = counts.get(token, 0.0) + 1.0
+            padded = f"#{token}#"
+            for start in range(len(padded) - 2):
+                trigram = padded[start : start + 3]
+                counts[trigram] = counts.get(trigram, 0.0) + 0.5
+        for feature, count in counts.items():
+            bucket = self._bucket(feature)
+            weight = 1.0 + math.log(count) if count >= 1 else count
+            if bucket > 0:
+                vector[bucket - 1] += weight
+            else:
+                vector[-bucket - 1] -= weight
+
+    def encode(self, texts: List[str]):
+        """Encode texts into an (n, dimensions) float32 matrix of unit vectors"""
+        if self.model is not None:
+            return np.asarray(
+                self.model.encode(
+                    texts, normalize_embeddings=True, convert_to_numpy=True
+                ),
+                dtype=np.float32,
+            )
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            self._hash_vector(text, vectors[row])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+_SEMANTIC_ENCODER: Optional[SemanticEncoder] = None
+
+
+def get_semantic_encoder() -> SemanticEncoder:
+    """Shared encoder for the configured embedding model (or the hashing fallback)"""
+    global _SEMANTIC_ENCODER
+    if _SEMANTIC_ENCODER is None:
+        _SEMANTIC_ENCODER = SemanticEncoder(os.environ.get(SEMANTIC_MODEL_ENV) or None)
+    return _SEMANTIC_ENCODER
+
+
+def build_semantic_text(reference: CodeReference) -> str:
+    """Text embedded for a reference: file name, key concepts and summary"""
+    return " ".join(
+        [
+            Path(reference.file_path).stem,
+            " ".join(reference.key_concepts),
+            reference.summary,
+        ]
+    )
+
+
+def load_or_build_semantic_vectors(
+    vectors_path: Path, texts: List[str], encoder: SemanticEncoder, persist: bool = True
+):
+    """Load cached vectors if they match the texts and encoder, otherwise encode them"""
+    fingerprint = hashlib.sha1("\0".join(texts).encode("utf-8")).hexdigest()
+    if vectors_path.exists():
+        try:
+            with np.load(vectors_path, allow_pickle=False) as cached:
+                if (
+                    str(cached["encoder"]) == encoder.name
+                    and str(cached["fingerprint"]) == fingerprint
+                ):
+                    return cached["vectors"]
+        except Exception as e:
+            logger.warning(
+                f"Ignoring unreadable semantic index {vectors_path.name}: {e}"
+            )
+
+    vectors = encoder.encode(texts)
+    if persist:
+        temp_path = vectors_path.with_name(vectors_path.name + ".tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                np.savez(
+                    f,
+                    vectors=vectors,
+                    encoder=np.array(encoder.name),
+                    fingerprint=np.array(fingerprint),
+                )
+            os.replace(temp_path, vectors_path)
+            logger.info(
+                f"Saved semantic index: {vectors_path.name} ({len(texts)} vectors)"
+            )
+        except OSError as e:
+            logger.warning(f"Failed to save semantic index {vectors_path.name}: {e}")
+    return vectors
+
+
+def rank_references_semantic(
+    semantic_matrix,
+    encoder: SemanticEncoder,
+    references: List[CodeReference],
+    target_file: str,
+    keywords: List[str] = None,
+    max_results: int = 10,
+    extension_ids: Optional[Set[int]] = None,
+) -> List[Tuple[CodeReference, float]]:
+    """Rank references by cosine similarity to the target file and keywords"""
+    if semantic_matrix is None or not len(references) or max_results <= 0:
+        return []
+    target_path = Path(target_file)
+    query_text = " ".join(
+        [target_path.stem, " ".join(target_path.parent.parts), " ".join(keywords or [])]
+    )
+    similarities = semantic_matrix @ encoder.encode([query_text])[0]
+    boost = SAME_EXTENSION_BOOST if extension_ids else 0.0
+    relevance = np.clip(similarities, 0.0, 1.0) * (1.0 - boost)
+    if extension_ids:
+        relevance[list(extension_ids)] += boost
+    relevance[similarities <= 0] = 0.0
+
+    top_count = min(max_results, len(references))
+    top_ids = np.argpartition(-relevance, top_count - 1)[:top_count]
+    top_ids = top_ids[np.argsort(-relevance[top_ids], kind="stable")]
+    return [
+        (references[ref_id], round(float(relevance[ref_id]), 4))
+        for ref_id in top_ids.tolist()
+        if relevance[ref_id] > 0
+    ]
+
+
+def build_semantic_indexes(indexes_directory: str) -> Dict[str, Any]:
+    """Build (or refresh) the semantic vectors of every index in a directory"""
+    if not NUMPY_AVAILABLE:
+        return {"status": "error", "message": "NumPy is required for semantic indexes"}
+    store = get_index_store(indexes_directory)
+    start_time = time.perf_counter()
+    matrix = store.semantic_matrix()
+    return {
+        "status": "success",
+        "indexes_directory": indexes_directory,
+        "encoder": get_semantic_encoder().name,
+        "total_vectors": 0 if matrix is None else int(matrix.shape[0]),
+        "build_time_ms": round((time.perf_counter() - start_time) * 1000, 3),
+    }
+
+
+class ReferenceIndexStore:
+    """
+    In-memory store of the index files in one indexes directory
+
+    Index files are parsed once and reloaded only when their mtime or size
+    changes; up-to-date compact copies are loaded instead of the JSON.
+    References are kept in a BM25 index over file names, key concepts,
+    main functions, summary and file type, so repeated searches do not re-read
+    or rescan every index.
+    """
+
+    def __init__(self, indexes_path: Path):
+        self.indexes_path = indexes_path
+        self.index_cache: Dict[str, Dict] = {}
+        self.references: List[CodeReference] = []
+        self.relationships: List[RelationshipInfo] = []
+        self.last_refresh_changed = False
+        self._file_signatures: Dict[Path, Tuple[int, int]] = {}
+        self._reset_search_structures()
+
+    def _reset_search_structures(self):
+        self.bm25_index = BM25Index([])
+        self._reference_ranges: Dict[str, Tuple[int, int]] = {}
+        self._semantic_matrix = None
+        self._extension_sets: Dict[str, Set[int]] = {}
+        self.relationship_trie = RelationshipPathTrie([])
+
+    def refresh(self) -> bool:
+        """Reload index files whose mtime/size changed; returns True if anything changed"""
+        current_signatures = {}
+        for stem, index_file in select_index_files(self.indexes_path).items():
+            try:
+                stats = index_file.stat()
+            except OSError:
+                continue
+            current_signatures[index_file] = (stats.st_mtime_ns, stats.st_size)
+
+        if current_signatures == self._file_signatures:
+            self.last_refresh_changed = False
+            return False
+
+        current_stems = {index_file.stem for index_file in current_signatures}
+        for index_file in self._file_signatures:
+            if index_file.stem not in current_stems:
+                self.index_cache.pop(index_file.stem, None)
+                logger.info(f"Index file removed: {index_file.name}")
+
+        for index_file, signature in current_signatures.items():
+            if self._file_signatures.get(index_file) == signature:
+                continue
+            try:
+                self.index_cache[index_file.stem] = load_index_file(index_file)
+                logger.info(f"Loaded index file: {index_file.name}")
+            except Exception as e:
+                self.index_cache.pop(index_file.stem, None)
+                logger.error(f"Failed to load index file {index_file.name}: {e}")
+
+        self._file_signatures = current_signatures
+        self._rebuild()
+        self.last_refresh_changed = True
+        logger.info(
+            f"Index store for {self.indexes_path}: {len(self.index_cache)} index files, "
+            f"{len(self.references)} references, {len(self.bm25_index.idf)} terms"
+        )
+        return True
+
+    def _rebuild(self):
+        """Rebuild references, relationships and the BM25 index"""
+        self.references = []
+        self.relationships = []
+        self._reset_search_structures()
+
+        for stem, index_data in self.index_cache.items():
+            start = len(self.references)
+            self.references.extend(extract_code_references(index_data))
+            self._reference_ranges[stem] = (start, len(self.references))
+            self.relationships.extend(extract_relationships(index_data))
+
+        self.bm25_index = BM25Index(
+            [build_reference_document(reference) for reference in self.references]
+        )
+        self._extension_sets = {}
+        for ref_id, reference in enumerate(self.references):
+            extension = Path(reference.file_path).suffix
+            self._extension_sets.setdefault(extension, set()).add(ref_id)
+        self.relationship_trie = RelationshipPathTrie(self.relationships)
+
+    def semantic_matrix(self):
+        """Vectors of all references in store order, loaded or built per index file"""
+        if not NUMPY_AVAILABLE:
+            return None
+        if self._semantic_matrix is None:
+            encoder = get_semantic_encoder()
+            blocks = []
+            for stem, (start, end) in self._reference_ranges.items():
+                texts = [build_semantic_text(ref) for ref in self.references[start:end]]
+                if texts:
+                    blocks.append(
+                        load_or_build_semantic_vectors(
+                            self.indexes_path / f"{stem}{SEMANTIC_INDEX_SUFFIX}",
+                            texts,
+                            encoder,
+                        )
+                    )
+            self._semantic_matrix = (
+                np.vstack(blocks)
+                if blocks
+                else np.zeros((0, encoder.dimensions), dtype=np.float32)
+            )
+        return self._semantic_matrix
+
+    def find_relevant_references(
+        self,
+        target_file: str,
+        keywords: List[str] = None,
+        max_results: int = 10,
+        ranking_mode: str = "bm25",
+    ) -> List[Tuple[CodeReference, float]]:
+        """
+        Rank references for the target file
+
+        ranking_mode is "bm25" (lexical), "semantic" (embedding similarity) or
+        "hybrid" (average of both over their top candidates); the semantic
+        modes need NumPy and fall back to BM25 without it.
+        """
+        extension_ids = self._extension_sets.get(Path(target_file).suffix)
+        if ranking_mode == "bm25" or not NUMPY_AVAILABLE:
+            return rank_references(
+                self.bm25_index,
+                self.references,
+                target_file,
+                keywords,
+                max_results,
+                extension_ids,
+            )
+
+        semantic_results = rank_references_semantic(
+            self.semantic_matrix(),
+            get_semantic_encoder(),
+            self.references,
+            target_file,
+            keywords,
+            max_results if ranking_mode == "semantic" else max_results * 3,
+            extension_ids,
+        )
+        if ranking_mode == "semantic":
+            return semantic_results
+
+        combined: Dict[int, List] = {}
+        for ref, score in semantic_results:
+            combined[id(ref)] = [ref, 0.5 * score]
+        for ref, score in rank_references(
+            self.bm25_index,
+            self.references,
+            target_file,
+            keywords,
+            max_results * 3,
+            extension_ids,
+        ):
+            combined.setdefault(id(ref), [ref, 0.0])[1] += 0.5 * score
+        ranked = sorted(combined.values(), key=lambda item: item[1], reverse=True)
+        return [(ref, round(score, 4)) for ref, score in ranked[:max_results]]
+
+    def find_direct_relationships(
+        self, target_file: str
+    ) -> List[Tuple[RelationshipInfo, str]]:
+        """Direct relationships for the target file via the prebuilt path trie"""
+        return self.relationship_trie.lookup(target_file)
+
+
+# Index stores keyed by resolved indexes directory; they live as long as the server
+INDEX_STORES: Dict[str, ReferenceIndexStore] = {}
+
+
+def get_index_store(indexes_directory: str) -> ReferenceIndexStore:
+    """Get the store for an indexes directory, reloading changed index files"""
+    indexes_path = Path(indexes_directory).resolve()
+    store = INDEX_STORES.get(str(indexes_path))
+    if store is None:
+        if not indexes_path.exists():
+            logger.warning(f"Indexes directory does not exist: {indexes_path}")
+        store = ReferenceIndexStore(indexes_path)
+        INDEX_STORES[str(indexes_path)] = store
+    store.refresh()
+    return store
 
 
 def format_reference_output(
     target_file: str,
     relevant_refs: List[Tuple[CodeReference, float]],
-    relationships: List[RelationshipInfo],
+    relationships: List[Tuple[RelationshipInfo, str]],
 ) -> str:
     """Format reference information output"""
     output_lines = []
@@ -253,9 +937,12 @@ def format_reference_output(
         output_lines.append("## 🎯 Direct Relationships")
         output_lines.append("")
 
-        for i, rel in enumerate(relationships[:5], 1):
+        for i, (rel, match_type) in enumerate(relationships[:5], 1):
             output_lines.append(f"### {i}. {rel.repo_file_path}")
             output_lines.append(f"**Relationship Type**: {rel.relationship_type}")
+            output_lines.append(
+                f"**Path Match**: {match_type} ({rel.target_file_path})"
+            )
             output_lines.append(f"**Confidence Score**: {rel.confidence_score:.2f}")
             output_lines.append(
                 f"**Helpful Aspects**: {', '.join(rel.helpful_aspects)}"
@@ -328,12 +1015,401 @@ def format_reference_output(
     return "\n".join(output_lines)
 
 
+# ==================== Compact Index Format ====================
+
+# Binary columnar copy of a JSON repo index, written next to it as <stem>.cidx
+# by convert_indexes_to_compact: MAGIC, u32 header length, JSON header (section
+# offsets), then 8-byte aligned sections. Every string is stored once in a
+# string table and referenced by id; a list field is an offset column plus an
+# items column of string ids. It is a storage format only: it is smaller and
+# faster to load than the JSON, but is always loaded whole into the JSON index
+# structure, since searches run on the in-memory ReferenceIndexStore.
+COMPACT_INDEX_MAGIC = b"DCIDX001"
+COMPACT_INDEX_SUFFIX = ".cidx"
+COMPACT_INDEX_VERSION = 1
+
+# Row fields per table with their column kind; rows that do not match this
+# schema exactly are kept verbatim in the "extras" section
+COMPACT_INDEX_TABLES = {
+    "file_summaries": (
+        ("file_path", "str"),
+        ("file_type", "str"),
+        ("main_functions", "list"),
+        ("key_concepts", "list"),
+        ("dependencies", "list"),
+        ("summary", "str"),
+        ("lines_of_code", "int"),
+        ("last_modified", "str"),
+    ),
+    "relationships": (
+        ("repo_file_path", "str"),
+        ("target_file_path", "str"),
+        ("relationship_type", "str"),
+        ("confidence_score", "float"),
+        ("helpful_aspects", "list"),
+        ("potential_contributions", "list"),
+        ("usage_suggestions", "str"),
+    ),
+}
+COMPACT_COLUMN_TYPECODES = {"str": "I", "list": "I", "int": "q", "float": "d"}
+
+
+def _matches_compact_schema(row: Any, fields: Tuple) -> bool:
+    """Whether a row can be stored in columns without losing information"""
+    if not isinstance(row, dict) or len(row) != len(fields):
+        return False
+    for name, kind in fields:
+        if name not in row:
+            return False
+        value = row[name]
+        if kind == "str" and not isinstance(value, str):
+            return False
+        if kind == "int" and not (type(value) is int and -(2**63) <= value < 2**63):
+            return False
+        if kind == "float" and type(value) is not float:
+            return False
+        if kind == "list" and not (
+            isinstance(value, list) and all(isinstance(item, str) for item in value)
+        ):
+            return False
+    return True
+
+
+def write_compact_index(index_data: Dict, output_path: Path) -> Path:
+    """Write a JSON repo index in the compact format (atomically)"""
+    string_ids: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(string_ids)
+        return string_id
+
+    sections: Dict[str, Tuple[str, Any]] = {}
+    extras: Dict[str, Dict[str, Any]] = {}
+    row_counts: Dict[str, int] = {}
+
+    for table, fields in COMPACT_INDEX_TABLES.items():
+        rows = index_data.get(table) or []
+        row_counts[table] = len(rows)
+        columns = {}
+        for name, kind in fields:
+            columns[name] = array(COMPACT_COLUMN_TYPECODES[kind])
+            if kind == "list":
+                columns[name].append(0)
+                columns[f"{name}.items"] = array("I")
+
+        table_extras = {}
+        for row_id, row in enumerate(rows):
+            conforming = _matches_compact_schema(row, fields)
+            if not conforming:
+                table_extras[str(row_id)] = row
+            for name, kind in fields:
+                column = columns[name]
+                if kind == "list":
+                    list_items = columns[f"{name}.items"]
+                    if conforming:
+                        list_items.extend(intern(item) for item in row[name])
+                    column.append(len(list_items))
+                elif not conforming:
+                    column.append(0)
+                elif kind == "str":
+                    column.append(intern(row[name]))
+                else:
+                    column.append(row[name])
+        if table_extras:
+            extras[table] = table_extras
+        for name, column in columns.items():
+            sections[f"{table}.{name}"] = (column.typecode, column)
+
+    metadata = {
+        key: value
+        for key, value in index_data.items()
+        if key not in COMPACT_INDEX_TABLES
+    }
+    string_offsets = array("I", [0])
+    string_data = bytearray()
+    for value in string_ids:  # dicts keep insertion order, i.e. string id order
+        string_data += value.encode("utf-8")
+        string_offsets.append(len(string_data))
+
+    sections["string_offsets"] = ("I", string_offsets)
+    sections["string_data"] = ("B", bytes(string_data))
+    sections["metadata"] = (
+        "B",
+        json.dumps(metadata, ensure_ascii=False).encode("utf-8"),
+    )
+    sections["extras"] = ("B", json.dumps(extras, ensure_ascii=False).encode("utf-8"))
+
+    payloads = []
+    for name, (typecode, data) in sections.items():
+        if isinstance(data, array):
+            if sys.byteorder != "little":
+                data = array(data.typecode, data)
+                data.byteswap()
+            data = data.tobytes()
+        payloads.append((name, typecode, data))
+
+    def build_header(base_offset: int) -> Tuple[bytes, Dict]:
+        layout = {}
+        offset = base_offset
+        for name, typecode, data in payloads:
+            offset = (offset + 7) & ~7
+            layout[name] = [offset, len(data), typecode]
+            offset += len(data)
+        header = {
+            "version": COMPACT_INDEX_VERSION,
+            "key_order": list(index_data.keys()),
+            "row_counts": row_counts,
+            "string_count": len(string_ids),
+            "sections": layout,
+        }
+        return json.dumps(header).encode("utf-8"), layout
+
+    # Section offsets depend on the header length; iterate until it is stable
+    header_bytes, layout = build_header(0)
+    while True:
+        base_offset = len(COMPACT_INDEX_MAGIC) + 4 + len(header_bytes)
+        new_header_bytes, layout = build_header(base_offset)
+        if len(new_header_bytes) == len(header_bytes):
+            header_bytes = new_header_bytes
+            break
+        header_bytes = new_header_bytes
+
+    output_path = Path(output_path)
+    temp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(temp_path, "wb") as f:
+        f.write(COMPACT_INDEX_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for name, typecode, data in payloads:
+            f.write(b"\0" * (layout[name][0] - f.tell()))
+            f.write(data)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+class CompactIndex:
+    """
+    Memory-mapped reader for the compact index format
+
+    Columns are zero-copy views into the mapping, decoded table by table by
+    to_dict into the JSON index structure.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._views: List[memoryview] = []
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mmap[: len(COMPACT_INDEX_MAGIC)] != COMPACT_INDEX_MAGIC:
+                raise ValueError(f"Not a compact index file: {self.path}")
+            header_start = len(COMPACT_INDEX_MAGIC) + 4
+            (header_length,) = struct.unpack_from(
+                "<I", self._mmap, len(COMPACT_INDEX_MAGIC)
+            )
+            self.header = json.loads(
+                self._mmap[header_start : header_start + header_length]
+            )
+        except Exception:
+            self.close()
+            raise
+        if self.header.get("version") != COMPACT_INDEX_VERSION:
+            self.close()
+            raise ValueError(
+                f"Unsupported compact index version {self.header.get('version')} in {self.path}"
+            )
+        self._columns: Dict[str, Any] = {}
+        self._extras: Optional[Dict] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release column views and unmap the file"""
+        self._columns = {}
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def _section(self, name: str) -> Any:
+        column = self._columns.get(name)
+        if column is None:
+            offset, length, typecode = self.header["sections"][name]
+            view = memoryview(self._mmap)[offset : offset + length]
+            self._views.append(view)
+            if typecode == "B":
+                column = view
+            elif sys.byteorder == "little":
+                column = view.cast(typecode)
+                self._views.append(column)
+            else:
+                column = array(typecode, view.tobytes())
+                column.byteswap()
+            self._columns[name] = column
+        return column
+
+    def _json_section(self, name: str) -> Any:
+        return json.loads(self._section(name).tobytes().decode("utf-8"))
+
+    @property
+    def metadata(self) -> Dict:
+        return self._json_section("metadata")
+
+    def all_strings(self) -> List[str]:
+        """Decode the whole string table"""
+        offsets = self._section("string_offsets").tolist()
+        string_data = self._section("string_data").tobytes()
+        return [
+            string_data[start:end].decode("utf-8")
+            for start, end in zip(offsets, offsets[1:])
+        ]
+
+    def _get_extras(self, table: str) -> Dict[str, Any]:
+        if self._extras is None:
+            self._extras = self._json_section("extras")
+        return self._extras.get(table, {})
+
+    def _table_rows(self, table: str, strings: List[str]) -> List[Dict]:
+        """Materialize all rows of a table column by column"""
+        names = []
+        field_values = []
+        for name, kind in COMPACT_INDEX_TABLES[table]:
+            column = self._section(f"{table}.{name}").tolist()
+            if kind == "list":
+                items = [
+                    strings[item] for item in self._section(f"{table}.{name}.items")
+                ]
+                values = [items[start:end] for start, end in zip(column, column[1:])]
+            elif kind == "str":
+                values = [strings[string_id] for string_id in column]
+            else:
+                values = column
+            names.append(name)
+            field_values.append(values)
+
+        rows = [dict(zip(names, values)) for values in zip(*field_values)]
+        for row_id, extra_row in self._get_extras(table).items():
+            rows[int(row_id)] = extra_row
+        return rows
+
+    def to_dict(self) -> Dict:
+        """Materialize the whole index in the JSON index structure"""
+        metadata = self.metadata
+        strings = self.all_strings()
+        index_data = {}
+        for key in self.header["key_order"]:
+            if key in COMPACT_INDEX_TABLES:
+                index_data[key] = self._table_rows(key, strings)
+            else:
+                index_data[key] = metadata.get(key)
+        return index_data
+
+
+def select_index_files(indexes_path: Path) -> Dict[str, Path]:
+    """Index file per stem, preferring a compact copy not older than its JSON"""
+    selected: Dict[str, Path] = {}
+    if not indexes_path.exists():
+        return selected
+    for index_file in indexes_path.glob("*.json"):
+        selected[index_file.stem] = index_file
+    for compact_file in indexes_path.glob(f"*{COMPACT_INDEX_SUFFIX}"):
+        json_file = selected.get(compact_file.stem)
+        try:
+            if (
+                json_file is None
+                or compact_file.stat().st_mtime_ns >= json_file.stat().st_mtime_ns
+            ):
+                selected[compact_file.stem] = compact_file
+        except OSError:
+            continue
+    return selected
+
+
+def load_index_file(index_file: Path) -> Dict:
+    """Load a JSON or compact index file into the JSON index structure"""
+    if index_file.suffix == COMPACT_INDEX_SUFFIX:
+        with CompactIndex(index_file) as compact_index:
+            return compact_index.to_dict()
+    with open(index_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def convert_indexes_to_compact(indexes_directory: str) -> Dict[str, Any]:
+    """Write a compact copy next to every JSON index file in a directory"""
+    results = {}
+    for json_file in sorted(Path(indexes_directory).glob("*.json")):
+        try:
+            with open(json_file, "r", encoding="utf-8") as f:
+                index_data = json.load(f)
+            compact_file = write_compact_index(
+                index_data, json_file.with_suffix(COMPACT_INDEX_SUFFIX)
+            )
+            results[json_file.name] = {
+                "compact_file": compact_file.name,
+                "json_bytes": json_file.stat().st_size,
+                "compact_bytes": compact_file.stat().st_size,
+            }
+            logger.info(f"Converted {json_file.name} -> {compact_file.name}")
+        except Exception as e:
+            results[json_file.name] = {"error": str(e)}
+            logger.error(f"Failed to convert {json_file.name}: {e}")
+    return results
+
+
+def run_load_benchmark(indexes_directory: str, repeat: int = 5) -> Dict[str, Any]:
+    """Compare loading JSON index files with their compact copies"""
+    results: Dict[str, Any] = {"indexes_directory": indexes_directory, "files": {}}
+    totals = {"json_load_ms": 0.0, "compact_load_ms": 0.0}
+
+    def best_of(load) -> Tuple[float, Any]:
+        best_ms = None
+        value = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            value = load()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            best_ms = elapsed_ms if best_ms is None else min(best_ms, elapsed_ms)
+        return best_ms, value
+
+    for json_file in sorted(Path(indexes_directory).glob("*.json")):
+        compact_file = json_file.with_suffix(COMPACT_INDEX_SUFFIX)
+        if not compact_file.exists():
+            continue
+        json_ms, json_data = best_of(lambda: load_index_file(json_file))
+        compact_ms, compact_data = best_of(lambda: load_index_file(compact_file))
+        results["files"][json_file.stem] = {
+            "json_bytes": json_file.stat().st_size,
+            "compact_bytes": compact_file.stat().st_size,
+            "json_load_ms": round(json_ms, 3),
+            "compact_load_ms": round(compact_ms, 3),
+            "identical": compact_data == json_data,
+        }
+        totals["json_load_ms"] += json_ms
+        totals["compact_load_ms"] += compact_ms
+
+    results["totals"] = {name: round(value, 3) for name, value in totals.items()}
+    return results
+
+
 # ==================== MCP Tool Definitions ====================
 
 
 @mcp.tool()
 async def search_code_references(
-    indexes_path: str, target_file: str, keywords: str = "", max_results: int = 10
+    indexes_path: str,
+    target_file: str,
+    keywords: str = "",
+    max_results: int = 10,
+    ranking_mode: str = "bm25",
 ) -> str:
     """
     **UNIFIED TOOL**: Search relevant reference code from index files for target file implementation.
@@ -344,14 +1420,27 @@ async def search_code_references(
         target_file: Target file path (file to be implemented)
         keywords: Search keywords, comma-separated
         max_results: Maximum number of results to return
+        ranking_mode: "bm25" (lexical), "semantic" (offline embeddings of summaries
+                      and key concepts) or "hybrid" (both)
 
     Returns:
         Formatted reference code information JSON string
     """
     try:
-        # Step 1: Load index files from specified directory
-        logger.info(f"Loading index files from: {indexes_path}")
-        index_cache = load_index_files_from_directory(indexes_path)
+        search_start = time.perf_counter()
+
+        if ranking_mode not in RANKING_MODES:
+            result = {
+                "status": "error",
+                "message": f"Unknown ranking_mode '{ranking_mode}', expected one of {', '.join(RANKING_MODES)}",
+                "target_file": target_file,
+                "indexes_path": indexes_path,
+            }
+            return json.dumps(result, ensure_ascii=False, indent=2)
+
+        # Step 1: Get the in-memory index store (index files are only re-read when changed)
+        store = get_index_store(indexes_path)
+        index_cache = store.index_cache
 
         if not index_cache:
             result = {
@@ -368,12 +1457,13 @@ async def search_code_references(
         )
 
         # Step 3: Find relevant reference code
-        relevant_refs = find_relevant_references_in_cache(
-            target_file, index_cache, keyword_list, max_results
+        relevant_refs = store.find_relevant_references(
+            target_file, keyword_list, max_results, ranking_mode
         )
 
         # Step 4: Find direct relationships
-        relationships = find_direct_relationships_in_cache(target_file, index_cache)
+        relationships = store.find_direct_relationships(target_file)
+        search_time_ms = (time.perf_counter() - search_start) * 1000
 
         # Step 5: Format output
         formatted_output = format_reference_output(
@@ -385,15 +1475,24 @@ async def search_code_references(
             "target_file": target_file,
             "indexes_path": indexes_path,
             "keywords_used": keyword_list,
+            "ranking_mode": ranking_mode if NUMPY_AVAILABLE else "bm25",
             "total_references_found": len(relevant_refs),
             "total_relationships_found": len(relationships),
+            "relationship_match_types": {
+                match_type: sum(
+                    1 for _, rel_match in relationships if rel_match == match_type
+                )
+                for match_type in MATCH_TYPES
+            },
             "formatted_content": formatted_output,
             "indexes_loaded": list(index_cache.keys()),
             "total_indexes_loaded": len(index_cache),
+            "indexes_reloaded": store.last_refresh_changed,
+            "search_time_ms": round(search_time_ms, 3),
         }
 
         logger.info(
-            f"Successfully found {len(relevant_refs)} references and {len(relationships)} relationships for {target_file}"
+            f"Successfully found {len(relevant_refs)} references and {len(relationships)} relationships for {target_file} in {search_time_ms:.2f} ms"
         )
         return json.dumps(result, ensure_ascii=False, indent=2)
 
@@ -408,6 +1507,157 @@ async def search_code_references(
         return json.dumps(result, ensure_ascii=False, indent=2)
 
 
+def parse_batch_queries(queries: str) -> List[Tuple[str, List[str]]]:
+    """
+    Parse batch search queries into (target_file, keywords) pairs
+
+    Accepts a JSON list of target files, a list of
+    {"target_file": ..., "keywords": ...} objects, or an object mapping target
+    files to keywords; keywords may be a comma-separated string or a list.
+    Repeated target files are merged into one query.
+    """
+    queries_data = json.loads(queries)
+    if isinstance(queries_data, dict):
+        raw_queries = list(queries_data.items())
+    elif isinstance(queries_data, list):
+        raw_queries = []
+        for query in queries_data:
+            if isinstance(query, str):
+                raw_queries.append((query, ""))
+            elif isinstance(query, dict) and query.get("target_file"):
+                raw_queries.append((query["target_file"], query.get("keywords", "")))
+            else:
+                raise ValueError(f"Invalid query entry: {query!r}")
+    else:
+        raise ValueError("queries must be a JSON list or object")
+
+    merged: Dict[str, List[str]] = {}
+    for target_file, keywords in raw_queries:
+        if isinstance(keywords, str):
+            keywords = keywords.split(",")
+        keyword_list = merged.setdefault(target_file, [])
+        for keyword in keywords or []:
+            keyword = str(keyword).strip()
+            if keyword and keyword not in keyword_list:
+                keyword_list.append(keyword)
+    return list(merged.items())
+
+
+@mcp.tool()
+async def search_code_references_batch(
+    indexes_path: str, queries: str, max_results: int = 5, ranking_mode: str = "bm25"
+) -> str:
+    """
+    Search reference code for several target files in one call.
+    All queries are answered from the same loaded indexes; each reference
+    is returned once and the per-file results point at it by id.
+
+    Args:
+        indexes_path: Path to the indexes directory containing JSON index files
+        queries: JSON string with target files and keywords, e.g.,
+                 '[{"target_file": "src/model.py", "keywords": "attention,encoder"}]',
+                 '{"src/model.py": "attention", "src/train.py": ""}'
+                 or simple array: '["src/model.py", "src/train.py"]'
+        max_results: Maximum number of references per target file
+        ranking_mode: "bm25", "semantic" or "hybrid" (see search_code_references)
+
+    Returns:
+        JSON string with deduplicated references and per-file results
+    """
+    try:
+        search_start = time.perf_counter()
+
+        try:
+            if ranking_mode not in RANKING_MODES:
+                raise ValueError(
+                    f"unknown ranking_mode '{ranking_mode}', expected one of {', '.join(RANKING_MODES)}"
+                )
+            parsed_queries = parse_batch_queries(queries)
+        except (json.JSONDecodeError, ValueError) as e:
+            result = {
+                "status": "error",
+                "message": f"Invalid queries: {str(e)}",
+                "indexes_path": indexes_path,
+            }
+            return json.dumps(result, ensure_ascii=False, indent=2)
+
+        store = get_index_store(indexes_path)
+        if not store.index_cache:
+            result = {
+                "status": "error",
+                "message": f"No index files found or failed to load from: {indexes_path}",
+                "indexes_path": indexes_path,
+            }
+            return json.dumps(result, ensure_ascii=False, indent=2)
+
+        references: Dict[str, Dict] = {}
+        results: Dict[str, Dict] = {}
+        for target_file, keyword_list in parsed_queries:
+            file_results = []
+            for ref, score in store.find_relevant_references(
+                target_file, keyword_list, max_results, ranking_mode
+            ):
+                reference_id = f"{ref.repo_name}:{ref.file_path}"
+                if reference_id not in references:
+                    references[reference_id] = {
+                        "repo_name": ref.repo_name,
+                        "file_path": ref.file_path,
+                        "file_type": ref.file_type,
+                        "main_functions": ref.main_functions[:5],
+                        "key_concepts": ref.key_concepts[:8],
+                        "dependencies": ref.dependencies[:6],
+                        "lines_of_code": ref.lines_of_code,
+                        "summary": ref.summary[:300],
+                    }
+                file_results.append({"reference_id": reference_id, "relevance": score})
+
+            results[target_file] = {
+                "keywords_used": keyword_list,
+                "references": file_results,
+                "relationships": [
+                    {
+                        "repo_file_path": rel.repo_file_path,
+                        "relationship_type": rel.relationship_type,
+                        "confidence_score": rel.confidence_score,
+                        "match_type": match_type,
+                        "helpful_aspects": rel.helpful_aspects,
+                        "usage_suggestions": rel.usage_suggestions,
+                    }
+                    for rel, match_type in store.find_direct_relationships(target_file)[
+                        :5
+                    ]
+                ],
+            }
+
+        search_time_ms = (time.perf_counter() - search_start) * 1000
+        result = {
+            "status": "success",
+            "indexes_path": indexes_path,
+            "total_queries": len(parsed_queries),
+            "ranking_mode": ranking_mode if NUMPY_AVAILABLE else "bm25",
+            "total_unique_references": len(references),
+            "references": references,
+            "results": results,
+            "indexes_loaded": list(store.index_cache.keys()),
+            "indexes_reloaded": store.last_refresh_changed,
+            "search_time_ms": round(search_time_ms, 3),
+        }
+
+        logger.info(
+            f"Batch search for {len(parsed_queries)} target files returned {len(references)} unique references in {search_time_ms:.2f} ms"
+        )
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        logger.error(f"Error in search_code_references_batch: {str(e)}")
+        result = {
+            "status": "error",
+            "message": f"Failed to search reference code: {str(e)}",
+            "indexes_path": indexes_path,
+        }
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+
 @mcp.tool()
 async def get_indexes_overview(indexes_path: str) -> str:
     """
@@ -420,8 +1670,8 @@ async def get_indexes_overview(indexes_path: str) -> str:
         Overview information of all available reference code JSON string
     """
     try:
-        # Load index files from specified directory
-        index_cache = load_index_files_from_directory(indexes_path)
+        # Get index files from the in-memory store for the specified directory
+        index_cache = get_index_store(indexes_path).index_cache
 
         if not index_cache:
             result = {
@@ -476,15 +1726,119 @@ async def get_indexes_overview(indexes_path: str) -> str:
         return json.dumps(result, ensure_ascii=False, indent=2)
 
 
+def run_ranking_benchmark(
+    indexes_directory: str, max_results: int = 10, max_queries: int = 200
+) -> Dict[str, Any]:
+    """
+    Compare the legacy scorer and BM25 on the relationships stored in the indexes
+
+    Every target file with relationships is a query (keywords are its name
+    parts); the repository files related to it are the relevant results.
+    Reports per-query latency and MRR, recall@k and nDCG@k for both rankers.
+    """
+    index_cache = load_index_files_from_directory(indexes_directory)
+    judgments: Dict[str, Set[str]] = {}
+    for index_data in index_cache.values():
+        for rel in extract_relationships(index_data):
+            judgments.setdefault(rel.target_file_path, set()).add(rel.repo_file_path)
+    queries = sorted(judgments)[:max_queries]
+
+    references = []
+    for index_data in index_cache.values():
+        references.extend(extract_code_references(index_data))
+    build_start = time.perf_counter()
+    bm25_index = BM25Index([build_reference_document(ref) for ref in references])
+    build_time_ms = (time.perf_counter() - build_start) * 1000
+    extension_sets: Dict[str, Set[int]] = {}
+    for ref_id, ref in enumerate(references):
+        extension_sets.setdefault(Path(ref.file_path).suffix, set()).add(ref_id)
+
+    rankers = {
+        "legacy": lambda target, keywords: find_relevant_references_legacy(
+            target, index_cache, keywords, max_results
+        ),
+        "bm25": lambda target, keywords: rank_references(
+            bm25_index,
+            references,
+            target,
+            keywords,
+            max_results,
+            extension_sets.get(Path(target).suffix),
+        ),
+    }
+
+    results: Dict[str, Any] = {
+        "indexes_directory": indexes_directory,
+        "total_references": len(references),
+        "total_queries": len(queries),
+        "k": max_results,
+        "numpy_available": NUMPY_AVAILABLE,
+        "bm25_build_time_ms": round(build_time_ms, 3),
+    }
+    for ranker_name, ranker in rankers.items():
+        latencies = []
+        reciprocal_ranks = []
+        recalls = []
+        ndcgs = []
+        for target in queries:
+            relevant = judgments[target]
+            keywords = tokenize_for_search(Path(target).stem)
+            query_start = time.perf_counter()
+            ranked = ranker(target, keywords)
+            latencies.append((time.perf_counter() - query_start) * 1000)
+
+            hits = [ref.file_path in relevant for ref, _ in ranked]
+            first_hit = next((rank for rank, hit in enumerate(hits, 1) if hit), None)
+            reciprocal_ranks.append(1.0 / first_hit if first_hit else 0.0)
+            recalls.append(
+                len({ref.file_path for ref, _ in ranked} & relevant) / len(relevant)
+            )
+            dcg = sum(
+                1.0 / math.log2(rank + 1) for rank, hit in enumerate(hits, 1) if hit
+            )
+            ideal_dcg = sum(
+                1.0 / math.log2(rank + 1)
+                for rank in range(1, min(len(relevant), max_results) + 1)
+            )
+            ndcgs.append(dcg / ideal_dcg if ideal_dcg else 0.0)
+
+        query_count = len(queries) or 1
+        latencies.sort()
+        results[ranker_name] = {
+            "mean_latency_ms": round(sum(latencies) / query_count, 3),
+            "p50_latency_ms": round(latencies[len(latencies) // 2], 3)
+            if latencies
+            else 0.0,
+            "mrr": round(sum(reciprocal_ranks) / query_count, 4),
+            f"recall@{max_results}": round(sum(recalls) / query_count, 4),
+            f"ndcg@{max_results}": round(sum(ndcgs) / query_count, 4),
+        }
+    return results
+
+
 def main():
     """Main function"""
+    # Maintenance commands: python tools/code_reference_indexer.py <command> <indexes_dir>
+    commands = {
+        "--benchmark": run_ranking_benchmark,
+        "--benchmark-load": run_load_benchmark,
+        "--convert-compact": convert_indexes_to_compact,
+        "--build-semantic": build_semantic_indexes,
+    }
+    if len(sys.argv) >= 3 and sys.argv[1] in commands:
+        print(json.dumps(commands[sys.argv[1]](sys.argv[2]), indent=2))
+        return
+
     logger.info("Starting unified Code Reference Indexer MCP server")
     logger.info("Available tools:")
     logger.info(
-        "1. search_code_references(indexes_path, target_file, keywords, max_results) - UNIFIED TOOL"
+        "1. search_code_references(indexes_path, target_file, keywords, max_results, ranking_mode) - UNIFIED TOOL"
+    )
+    logger.info(
+        "2. search_code_references_batch(indexes_path, queries, max_results, ranking_mode) - Search for several target files at once"
     )
     logger.info(
-        "2. get_indexes_overview(indexes_path) - Get overview of available indexes"
+        "3. get_indexes_overview(indexes_path) - Get overview of available indexes"
     )
 
     # Run MCP server
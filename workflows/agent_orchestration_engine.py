@@ -1401,12 +1401,31 @@ async def orchestrate_codebase_intelligence_agent(
 
         print(f"Found {len(repo_dirs)} repositories to index: {repo_dirs}")
 
+        # Forward per-repository indexing events to the progress callback,
+        # reporting file analysis at most once per 10% step
+        reported_steps = {}
+
+        def report_indexing_progress(event: Dict) -> None:
+            repo_name = event["repo_name"]
+            completed = event["completed_files"]
+            total = event["total_files"]
+            if event["stage"] == "analyzing":
+                step = completed * 10 // total if total else 10
+                if reported_steps.get(repo_name) == step:
+                    return
+                reported_steps[repo_name] = step
+            progress_callback(
+                70,
+                f"🧮 Indexing {repo_name}: {event['stage']} ({completed}/{total} files)",
+            )
+
         # Run codebase index workflow
         index_result = await run_codebase_indexing(
             paper_dir=dir_info["paper_dir"],
             initial_plan_path=dir_info["initial_plan_path"],
             config_path="mcp_agent.secrets.yaml",
             logger=logger,
+            progress_callback=report_indexing_progress if progress_callback else None,
         )
 
         # Log indexing results
@@ -1173,7 +1173,11 @@ Requirements:
         all_tools = get_mcp_tools("code_implementation")
 
         # Define essential tools for code implementation
-        essential_tool_names = {"write_file", "search_code_references"}
+        essential_tool_names = {
+            "write_file",
+            "search_code_references",
+            "search_code_references_batch",
+        }
 
         # Filter to only essential tools
         filtered_tools = [
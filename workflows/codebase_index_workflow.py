@@ -18,7 +18,7 @@ import os
 import re
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 import yaml
 
 # Add tools directory to path
@@ -408,6 +408,7 @@ project/
         paper_dir: str,
         initial_plan_path: Optional[str] = None,
         config_path: str = "mcp_agent.secrets.yaml",
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> Dict[str, Any]:
         """
         Run the complete code indexing workflow
@@ -416,6 +417,7 @@ project/
             paper_dir: Paper directory path
             initial_plan_path: Initial plan file path (optional)
             config_path: API configuration file path
+            progress_callback: Callable receiving per-repository progress events (optional)
 
         Returns:
             Index result dictionary
@@ -473,6 +475,7 @@ project/
 
             # Apply configuration settings
             self.indexer.indexer_config = indexer_config
+            self.indexer.progress_callback = progress_callback
 
             # Directly set configuration attributes to indexer
             if "file_analysis" in indexer_config:
@@ -491,6 +494,9 @@ project/
                 self.indexer.max_content_length = file_config.get(
                     "max_content_length", self.indexer.max_content_length
                 )
+                self.indexer.enable_static_analysis = file_config.get(
+                    "enable_static_analysis", self.indexer.enable_static_analysis
+                )
 
             if "llm" in indexer_config:
                 llm_config = indexer_config["llm"]
@@ -512,6 +518,12 @@ project/
                 self.indexer.retry_delay = llm_config.get(
                     "retry_delay", self.indexer.retry_delay
                 )
+                self.indexer.requests_per_minute = llm_config.get(
+                    "requests_per_minute", self.indexer.requests_per_minute
+                )
+                self.indexer.tokens_per_minute = llm_config.get(
+                    "tokens_per_minute", self.indexer.tokens_per_minute
+                )
 
             if "relationships" in indexer_config:
                 rel_config = indexer_config["relationships"]
@@ -524,6 +536,14 @@ project/
                 self.indexer.relationship_types = rel_config.get(
                     "relationship_types", self.indexer.relationship_types
                 )
+                self.indexer.enable_relationship_prescoring = rel_config.get(
+                    "enable_relationship_prescoring",
+                    self.indexer.enable_relationship_prescoring,
+                )
+                self.indexer.relationship_prescore_threshold = rel_config.get(
+                    "relationship_prescore_threshold",
+                    self.indexer.relationship_prescore_threshold,
+                )
 
             if "performance" in indexer_config:
                 perf_config = indexer_config["performance"]
@@ -534,12 +554,55 @@ project/
                 self.indexer.max_concurrent_files = perf_config.get(
                     "max_concurrent_files", self.indexer.max_concurrent_files
                 )
+                self.indexer.min_concurrent_requests = perf_config.get(
+                    "min_concurrent_requests", self.indexer.min_concurrent_requests
+                )
+                self.indexer.max_concurrent_requests = perf_config.get(
+                    "max_concurrent_requests", self.indexer.max_concurrent_requests
+                )
+                self.indexer.enable_checkpointing = perf_config.get(
+                    "enable_checkpointing", self.indexer.enable_checkpointing
+                )
+                self.indexer.enable_parallel_repositories = perf_config.get(
+                    "enable_parallel_repositories",
+                    self.indexer.enable_parallel_repositories,
+                )
+                self.indexer.max_concurrent_repositories = perf_config.get(
+                    "max_concurrent_repositories",
+                    self.indexer.max_concurrent_repositories,
+                )
                 self.indexer.enable_content_caching = perf_config.get(
                     "enable_content_caching", self.indexer.enable_content_caching
                 )
                 self.indexer.max_cache_size = perf_config.get(
                     "max_cache_size", self.indexer.max_cache_size
                 )
+                self.indexer.enable_persistent_cache = perf_config.get(
+                    "enable_persistent_cache", self.indexer.enable_persistent_cache
+                )
+                self.indexer.persistent_cache_path = perf_config.get(
+                    "persistent_cache_path", self.indexer.persistent_cache_path
+                )
+                self.indexer.persistent_cache_max_entries = perf_config.get(
+                    "persistent_cache_max_entries",
+                    self.indexer.persistent_cache_max_entries,
+                )
+                self.indexer.enable_incremental_indexing = perf_config.get(
+                    "enable_incremental_indexing",
+                    self.indexer.enable_incremental_indexing,
+                )
+                self.indexer.enable_batched_analysis = perf_config.get(
+                    "enable_batched_analysis", self.indexer.enable_batched_analysis
+                )
+                self.indexer.batch_max_files = perf_config.get(
+                    "batch_max_files", self.indexer.batch_max_files
+                )
+                self.indexer.batch_token_budget = perf_config.get(
+                    "batch_token_budget", self.indexer.batch_token_budget
+                )
+                self.indexer.batch_max_output_tokens = perf_config.get(
+                    "batch_max_output_tokens", self.indexer.batch_max_output_tokens
+                )
 
             if "debug" in indexer_config:
                 debug_config = indexer_config["debug"]
@@ -564,6 +627,9 @@ project/
                 self.indexer.include_metadata = output_config.get(
                     "include_metadata", self.indexer.include_metadata
                 )
+                self.indexer.build_semantic_index = output_config.get(
+                    "build_semantic_index", self.indexer.build_semantic_index
+                )
 
             self.logger.info("🔧 Indexer configuration completed")
             self.logger.info(f"🤖 Model provider: {self.indexer.model_provider}")
@@ -684,6 +750,7 @@ async def run_codebase_indexing(
     initial_plan_path: Optional[str] = None,
     config_path: str = "mcp_agent.secrets.yaml",
     logger=None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> Dict[str, Any]:
     """
     Convenience function to run codebase indexing
@@ -693,6 +760,7 @@ async def run_codebase_indexing(
         initial_plan_path: Initial plan file path (optional)
         config_path: API configuration file path
         logger: Logger instance (optional)
+        progress_callback: Callable receiving per-repository progress events (optional)
 
     Returns:
         Index result dictionary
@@ -704,6 +772,7 @@ async def run_codebase_indexing(
         paper_dir=paper_dir,
         initial_plan_path=initial_plan_path,
         config_path=config_path,
+        progress_callback=progress_callback,
     )
 
 